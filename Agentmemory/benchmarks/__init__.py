@@ -0,0 +1,16 @@
+# benchmarks/__init__.py
+# Offline throughput benchmarks for the memory managers. Run from the
+# project root: `python -m benchmarks --help`.
+
+from .fakes import FakeModelProvider, HashingEmbedder
+from .workloads import WorkloadConfig, CaseResult, WORKLOADS, DB_STORES, VECTOR_STORES
+
+__all__ = [
+    "FakeModelProvider",
+    "HashingEmbedder",
+    "WorkloadConfig",
+    "CaseResult",
+    "WORKLOADS",
+    "DB_STORES",
+    "VECTOR_STORES",
+]
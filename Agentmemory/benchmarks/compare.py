@@ -0,0 +1,55 @@
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+def _index(report: Dict[str, Any]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    return {(r["workload"], r["store"]): r for r in report["results"] if "error" not in r}
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.10) -> List[Dict[str, Any]]:
+    """
+    Compares ops/sec of matching (workload, store, op) entries. Returns one row
+    per op, flagged as a regression when throughput dropped by more than
+    `threshold` (a fraction).
+    """
+    rows = []
+    old, new = _index(baseline), _index(current)
+    for key in sorted(old.keys() & new.keys()):
+        for op, stats in new[key]["ops"].items():
+            before = old[key]["ops"].get(op)
+            if before is None or not before["ops_per_sec"]:
+                continue
+            change = stats["ops_per_sec"] / before["ops_per_sec"] - 1.0
+            rows.append({
+                "workload": key[0], "store": key[1], "op": op,
+                "baseline_ops_per_sec": before["ops_per_sec"],
+                "current_ops_per_sec": stats["ops_per_sec"],
+                "change": change,
+                "regression": change < -threshold,
+            })
+    return rows
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare",
+                                     description="Compares two benchmark JSON reports.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Throughput drop (fraction) that counts as a regression")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['workload'] + '/' + row['store']:<22} {row['op']:<24} "
+              f"{row['baseline_ops_per_sec']:>10.1f} -> {row['current_ops_per_sec']:>10.1f} "
+              f"({row['change']:+.1%}) {flag}")
+    # Non-zero exit lets CI fail on a regression
+    sys.exit(1 if any(row["regression"] for row in rows) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Type, Union
+from memory_lib.interfaces import BaseModelProvider, BaseEmbedder
+from memory_lib.ranking import tokenize
+from memory_lib.schemas import (
+    Message, BaseModel, Fact, FactExtractPlan, MemoryAction, MemoryUpdatePlan,
+    VectorMemoryAction, VectorMemoryUpdatePlan
+)
+
+_QUOTED_RE = re.compile(r'^\s*(?:\d+\.\s*)?"(.*)"\s*$', re.MULTILINE)
+_ID_RE = re.compile(r"\[ID: ([^\]]+)\]")
+_SENTENCE_RE = re.compile(r"[.;!?]\s*")
+
+def _stable_hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+class FakeModelProvider(BaseModelProvider):
+    """
+    A deterministic stand-in for an LLM, for offline benchmarks.
+
+    With `script`, the responses are returned in order. A script is a list of
+    plans, or a callable(messages, output_model) -> plan. Without one, plans
+    are synthesized from the prompt. Each sentence of the user message becomes
+    a fact, up to `facts_per_message`. Each fact is ADDed, except that a
+    fraction `update_ratio` instead UPDATEs a memory listed in the prompt.
+    The choice is a hash of the fact, so runs are repeatable.
+
+    Every call sleeps `latency` seconds, plus up to `jitter` seconds from a
+    seeded RNG, to stand in for network and inference time.
+    """
+    def __init__(self,
+                 script: Optional[Union[Sequence[BaseModel], Callable[[List[Message], Type[BaseModel]], BaseModel]]] = None,
+                 facts_per_message: int = 3,
+                 update_ratio: float = 0.2,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 seed: int = 0):
+        self.script = script if callable(script) or script is None else list(script)
+        self.facts_per_message = facts_per_message
+        self.update_ratio = update_ratio
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def get_structured_completion(self, messages: List[Message], output_model: Type[BaseModel]) -> BaseModel:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._rng.random() * self.jitter if self.jitter else 0.0)
+            scripted = self.script.pop(0) if isinstance(self.script, list) else None
+        if delay > 0:
+            time.sleep(delay)
+
+        if scripted is not None:
+            return scripted
+        if callable(self.script):
+            return self.script(messages, output_model)
+
+        prompt = "\n".join(msg.content for msg in messages)
+        if output_model is FactExtractPlan:
+            return FactExtractPlan(facts=[Fact(fact=fact) for fact in self._facts_from_messages(prompt)])
+        if output_model is VectorMemoryUpdatePlan:
+            return self._vector_plan(prompt)
+        if output_model is MemoryUpdatePlan:
+            return self._memory_plan(prompt)
+        raise TypeError(f"FakeModelProvider cannot synthesize {output_model.__name__}")
+
+    def _facts_from_messages(self, prompt: str) -> List[str]:
+        facts: List[str] = []
+        for message in _QUOTED_RE.findall(prompt):
+            facts.extend(part.strip() for part in _SENTENCE_RE.split(message) if part.strip())
+        return facts[:self.facts_per_message]
+
+    def _should_update(self, fact: str) -> bool:
+        return (_stable_hash(fact) % 10_000) < self.update_ratio * 10_000
+
+    def _vector_plan(self, prompt: str) -> VectorMemoryUpdatePlan:
+        existing, _, new_section = prompt.partition("NEW FACTS")
+        ids = _ID_RE.findall(existing)
+        facts = [line.strip()[2:] for line in new_section.splitlines() if line.strip().startswith("- ")]
+        plan = []
+        for fact in facts:
+            if ids and self._should_update(fact):
+                plan.append(VectorMemoryAction(action="UPDATE", id=ids[_stable_hash(fact) % len(ids)],
+                                               content=fact, original_fact=fact))
+            else:
+                plan.append(VectorMemoryAction(action="ADD", content=fact, original_fact=fact))
+        return VectorMemoryUpdatePlan(plan=plan)
+
+    def _memory_plan(self, prompt: str) -> MemoryUpdatePlan:
+        existing, _, new_section = prompt.partition("NEW USER MESSAGE")
+        ids = _ID_RE.findall(existing)
+        plan = []
+        for fact in self._facts_from_messages(new_section):
+            if ids and self._should_update(fact):
+                plan.append(MemoryAction(action="UPDATE", memory_id=ids[_stable_hash(fact) % len(ids)], content=fact))
+            else:
+                plan.append(MemoryAction(action="ADD", content=fact))
+        return MemoryUpdatePlan(plan=plan)
+
+class HashingEmbedder(BaseEmbedder):
+    """
+    A deterministic embedder for offline benchmarks: signed feature hashing of
+    word tokens into `dim` buckets, L2-normalized. Texts sharing words end up
+    close, so search results are meaningful without a model.
+    """
+    def __init__(self, dim: int = 256, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+        self.model = f"hashing-{dim}"
+
+    def embed_text(self, text: str) -> List[float]:
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        if self.latency > 0:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for token in tokenize(text, min_length=1, max_tokens=512):
+            h = _stable_hash(token)
+            vector[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = math.sqrt(sum(x * x for x in vector))
+        if norm == 0.0:
+            # Empty text: a fixed unit vector keeps cosine stores well-defined
+            vector[0] = norm = 1.0
+        return [x / norm for x in vector]
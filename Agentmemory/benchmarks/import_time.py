@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+# Third-party packages that only the matching provider may load
+HEAVY_MODULES = ("chromadb", "openai", "psycopg2", "numpy")
+
+# name -> (statement, heavy modules it is allowed to load)
+PROBES: Dict[str, tuple] = {
+    "import memory_lib": ("import memory_lib", ()),
+    "db.SqliteProvider": ("from memory_lib.db import SqliteProvider", ()),
+    "db.ChromaProvider": ("from memory_lib.db import ChromaProvider", ("numpy",)),
+    "db.PostgresProvider": ("from memory_lib.db import PostgresProvider", ("psycopg2",)),
+    "models.OpenAIProvider": ("from memory_lib.models import OpenAIProvider", ()),
+    "registry sqlite": ("from memory_lib import create_provider; create_provider('sqlite', db_path=':memory:')", ()),
+    "core.VectorMemoryManager": ("from memory_lib.core.vector_memory import VectorMemoryManager", ()),
+}
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "modules": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure(statement: str, repeat: int = 5) -> Dict[str, Any]:
+    """Times `statement` in `repeat` fresh interpreters, so nothing is cached in-process."""
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_root, os.environ.get("PYTHONPATH")])))
+    timings, loaded = [], set()
+    for _ in range(repeat):
+        child = _CHILD.format(statement=statement, heavy=HEAVY_MODULES)
+        out = subprocess.run([sys.executable, "-c", child], capture_output=True, text=True, env=env, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        timings.append(result["ms"])
+        loaded.update(result["modules"])
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings), "heavy_modules": sorted(loaded)}
+
+def run(repeat: int = 5, probes: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Measures each probe and flags any that loaded a heavy module it should not."""
+    results = {}
+    for name in probes or PROBES:
+        statement, allowed = PROBES[name]
+        result = measure(statement, repeat)
+        result["unexpected_modules"] = [m for m in result["heavy_modules"] if m not in allowed]
+        results[name] = result
+    return {"python": sys.version.split()[0], "repeat": repeat, "probes": results}
+
+def regressions(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None,
+                threshold: float = 0.25, max_ms: Optional[float] = None) -> List[str]:
+    """Human-readable problems: unexpected heavy imports, budget overruns, slowdowns vs `baseline`."""
+    problems = []
+    for name, result in report["probes"].items():
+        if result["unexpected_modules"]:
+            problems.append(f"{name}: imported {', '.join(result['unexpected_modules'])}")
+        if max_ms is not None and result["median_ms"] > max_ms:
+            problems.append(f"{name}: {result['median_ms']:.0f} ms exceeds budget of {max_ms:.0f} ms")
+        before = (baseline or {}).get("probes", {}).get(name)
+        if before and result["median_ms"] > before["median_ms"] * (1 + threshold):
+            problems.append(f"{name}: {before['median_ms']:.0f} ms -> {result['median_ms']:.0f} ms")
+    return problems
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_time",
+                                     description="Measures cold import time of memory_lib entry points.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per probe")
+    parser.add_argument("--probes", help=f"Comma-separated probe names (default: all of {list(PROBES)})")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Import-time increase (fraction) over the baseline that counts as a regression")
+    parser.add_argument("--max-ms", type=float, help="Absolute per-probe budget in milliseconds")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = run(args.repeat, args.probes.split(",") if args.probes else None)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    for name, result in report["probes"].items():
+        modules = ", ".join(result["heavy_modules"]) or "-"
+        print(f"{name:<26} {result['median_ms']:>8.1f} ms (min {result['min_ms']:.1f})  heavy: {modules}")
+    problems = regressions(report, baseline, args.threshold, args.max_ms)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    # Non-zero exit lets CI fail on a regression
+    sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
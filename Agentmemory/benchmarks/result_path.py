@@ -0,0 +1,72 @@
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from memory_lib.db import NumpyVectorStore
+from memory_lib.schemas import RetrievedMemory, SearchResult, UserMemory, VectorMemory
+
+def _best_ms(fn: Callable[[], Any], repeat: int) -> float:
+    """Best of `repeat` runs, in milliseconds; the minimum is the least noisy estimate."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def _row_cases(rows: int) -> Dict[str, Callable[[], Any]]:
+    """The same rows built the ways a store could build them when reading back."""
+    stamp = datetime.now().isoformat()
+    raw = [(f"id-{i}", "user", f"memory number {i}", 0.5 + i * 1e-6, stamp) for i in range(rows)]
+    return {
+        "UserMemory(...)": lambda: [UserMemory(memory_id=r[0], user_id=r[1], content=r[2],
+                                               updated_at=datetime.fromisoformat(r[4])) for r in raw],
+        "UserMemory.model_construct": lambda: [UserMemory.model_construct(memory_id=r[0], user_id=r[1], content=r[2],
+                                                                          updated_at=datetime.fromisoformat(r[4]))
+                                               for r in raw],
+        "datetime.fromisoformat": lambda: [datetime.fromisoformat(r[4]) for r in raw],
+        "RetrievedMemory(...)": lambda: [RetrievedMemory(id=r[0], content=r[2], score=r[3], user_id=r[1])
+                                         for r in raw],
+        "SearchResult": lambda: SearchResult("user", [r[0] for r in raw], [r[3] for r in raw],
+                                             [r[2] for r in raw]),
+    }
+
+def _store_cases(rows: int, dim: int) -> Dict[str, Callable[[], Any]]:
+    """A search returning all `rows` memories of one user from an in-memory store."""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(rows, dim)).astype(np.float32).tolist()
+    vector_db = NumpyVectorStore()
+    vector_db.upsert_many([VectorMemory(user_id="user", content=f"memory number {i}") for i in range(rows)], vectors)
+    query = vectors[0]
+    return {
+        "numpy search": lambda: vector_db.search("user", query, rows),
+        "numpy search_columns": lambda: vector_db.search_columns("user", query, rows),
+    }
+
+def run(rows: int = 10_000, dim: int = 64, repeat: int = 7) -> Dict[str, Any]:
+    cases = {**_row_cases(rows), **_store_cases(rows, dim)}
+    timings = {name: _best_ms(fn, repeat) for name, fn in cases.items()}
+    return {"python": sys.version.split()[0], "rows": rows, "dim": dim, "repeat": repeat,
+            "ms": timings, "us_per_row": {name: ms * 1000 / rows for name, ms in timings.items()}}
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.result_path",
+                                     description="Measures the cost of building result rows for reads.")
+    parser.add_argument("--rows", type=int, default=10_000, help="Rows per call")
+    parser.add_argument("--dim", type=int, default=64, help="Embedding size for the vector store")
+    parser.add_argument("--repeat", type=int, default=7, help="Runs per case; the best is reported")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = run(args.rows, args.dim, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    for name, ms in report["ms"].items():
+        print(f"{name:<26} {ms:>9.2f} ms  {report['us_per_row'][name]:>7.3f} us/row")
+
+if __name__ == "__main__":
+    main()
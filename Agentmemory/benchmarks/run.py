@@ -0,0 +1,126 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+from .workloads import WORKLOADS, WorkloadConfig, stores_for
+
+def _run_case(workload: str, store: str, config: WorkloadConfig) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="memory-bench-") as workdir:
+        return WORKLOADS[workload](store, config, workdir).to_dict()
+
+def _run_case_in_child(args) -> Dict[str, Any]:
+    # Top-level so it can be pickled for the spawned child
+    return _run_case(*args)
+
+def run_case(workload: str, store: str, config: WorkloadConfig, isolate: bool = True) -> Dict[str, Any]:
+    """
+    Runs one case. With `isolate`, it runs in a fresh spawned process so the
+    reported peak RSS belongs to that case alone.
+    """
+    if not isolate:
+        return _run_case(workload, store, config)
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_run_case_in_child, ((workload, store, config),))
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(cases: List[tuple], config: WorkloadConfig, isolate: bool = True) -> Dict[str, Any]:
+    """Runs (workload, store) cases and returns the JSON-ready report."""
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "git_revision": _git_revision(),
+            "config": asdict(config),
+        },
+        "results": [],
+    }
+    for workload, store in cases:
+        print(f"[bench] {workload}/{store} ...", file=sys.stderr)
+        try:
+            report["results"].append(run_case(workload, store, config, isolate))
+        except Exception as e:
+            print(f"[bench] {workload}/{store} failed: {e}", file=sys.stderr)
+            report["results"].append({"workload": workload, "store": store, "error": str(e)})
+    return report
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'case':<22} {'op':<24} {'ops/sec':>10} {'p50 ms':>9} {'p95 ms':>9} {'peak MiB':>9}"]
+    for result in report["results"]:
+        case = f"{result['workload']}/{result['store']}"
+        if "error" in result:
+            lines.append(f"{case:<22} ERROR: {result['error']}")
+            continue
+        for op, stats in result["ops"].items():
+            latency = result["stages"].get(f"op:{op}", {}).get(result["store"], {})
+            rss = result.get("peak_rss_mb")
+            lines.append(
+                f"{case:<22} {op:<24} {stats['ops_per_sec']:>10.1f} "
+                f"{latency.get('p50_ms', 0.0):>9.2f} {latency.get('p95_ms', 0.0):>9.2f} "
+                f"{rss if rss is not None else float('nan'):>9.1f}"
+            )
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Offline throughput benchmarks with a fake model and a hashing embedder.")
+    parser.add_argument("--workloads", default="memory,vector",
+                        help="Comma-separated workloads (%s)" % ", ".join(WORKLOADS))
+    parser.add_argument("--stores", default="sqlite,chroma,numpy",
+                        help="Comma-separated store names; each runs under the workloads that support it")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--memories-per-user", type=int, default=50)
+    parser.add_argument("--messages-per-user", type=int, default=5)
+    parser.add_argument("--facts-per-message", type=int, default=3)
+    parser.add_argument("--searches-per-user", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--model-latency", type=float, default=0.0, help="Seconds slept per fake LLM call")
+    parser.add_argument("--embed-dim", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run cases in this process (faster, but peak RSS is cumulative)")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    config = WorkloadConfig(
+        users=args.users,
+        memories_per_user=args.memories_per_user,
+        messages_per_user=args.messages_per_user,
+        facts_per_message=args.facts_per_message,
+        searches_per_user=args.searches_per_user,
+        concurrency=args.concurrency,
+        model_latency=args.model_latency,
+        embed_dim=args.embed_dim,
+        seed=args.seed,
+    )
+    stores = [s for s in args.stores.split(",") if s]
+    cases = []
+    for workload in (w for w in args.workloads.split(",") if w):
+        if workload not in WORKLOADS:
+            parser.error(f"unknown workload '{workload}'")
+        cases.extend((workload, store) for store in stores if store in stores_for(workload))
+    if not cases:
+        parser.error("no (workload, store) combination selected")
+
+    report = run_suite(cases, config, isolate=not args.in_process)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(format_report(report), file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field
+from typing import Any, Callable, Dict, List, Optional
+from memory_lib.core.memory_manager import MemoryManager
+from memory_lib.core.vector_memory import VectorMemoryManager
+from memory_lib.instrumentation import Instrumentation
+from memory_lib.registry import create_provider
+from memory_lib.schemas import UserMemory, VectorMemory
+from .fakes import FakeModelProvider, HashingEmbedder
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_SUBJECTS = ["I", "My sister", "My manager", "My dog", "My best friend", "My neighbour"]
+_VERBS = ["likes", "lives in", "works at", "is learning", "visited", "hates", "collects", "plays"]
+_OBJECTS = [
+    "Toronto", "jazz", "sushi", "Berlin", "chess", "the violin", "a bakery", "rock climbing",
+    "Python", "old maps", "tennis", "Lisbon", "board games", "a startup", "gardening", "vinyl records",
+]
+
+@dataclass
+class WorkloadConfig:
+    """Parameters of one benchmark case."""
+    users: int = 10
+    memories_per_user: int = 50
+    messages_per_user: int = 5
+    facts_per_message: int = 3
+    searches_per_user: int = 5
+    concurrency: int = 1
+    model_latency: float = 0.0
+    embed_dim: int = 256
+    seed: int = 0
+
+@dataclass
+class CaseResult:
+    """Machine-readable outcome of one (workload, store) case."""
+    workload: str
+    store: str
+    config: Dict[str, Any]
+    ops: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    stages: Dict[str, Any] = field(default_factory=dict)
+    peak_rss_mb: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def fact_sentence(rng: random.Random) -> str:
+    return f"{rng.choice(_SUBJECTS)} {rng.choice(_VERBS)} {rng.choice(_OBJECTS)}"
+
+def make_message(rng: random.Random, facts: int) -> str:
+    return ". ".join(fact_sentence(rng) for _ in range(facts)) + "."
+
+def peak_rss_mb() -> Optional[float]:
+    """High-water resident set size of this process, in MiB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+# --- Store factories: name -> callable(workdir) returning a provider ---
+# Names are provider registry names (presets included), so these stay in step with migrate specs
+
+def _registered(name: str, kind: str, location: str, **kwargs: Any) -> Callable[[str], Any]:
+    """Factory for registry provider `name`, kept at `location` inside the workdir."""
+    def factory(workdir: str):
+        return create_provider(name, os.path.join(workdir, location), kind=kind, **kwargs)
+    return factory
+
+def _postgres(workdir: str):
+    dsn = os.environ.get("MEMORY_BENCH_POSTGRES_DSN")
+    if not dsn:
+        raise RuntimeError("Set MEMORY_BENCH_POSTGRES_DSN to benchmark Postgres")
+    return create_provider("postgres", dsn, kind="db", pooled=True)
+
+def _sharded(workdir: str, shards: int = 4):
+    from memory_lib.db import ShardedVectorStore
+    return ShardedVectorStore({f"shard-{i}": create_provider("numpy", os.path.join(workdir, f"numpy-shard-{i}"), kind="vector")
+                               for i in range(shards)})
+
+# Stores driven through MemoryManager
+DB_STORES: Dict[str, Callable[[str], Any]] = {
+    "sqlite": _registered("sqlite", "db", "bench.db"),
+    "sqlite-wal": _registered("sqlite-wal", "db", "bench.db"),
+    "postgres": _postgres,
+}
+
+# Stores driven through VectorMemoryManager
+VECTOR_STORES: Dict[str, Callable[[str], Any]] = {
+    "chroma": _registered("chroma", "vector", "chroma"),
+    "numpy": _registered("numpy", "vector", "numpy"),
+    "numpy-int8": _registered("numpy-int8", "vector", "numpy-int8"),
+    "numpy-float16": _registered("numpy-float16", "vector", "numpy-float16"),
+    # Low threshold so benchmark-sized users actually exercise the index
+    "numpy-ivf": _registered("numpy-ivf", "vector", "numpy-ivf", exact_threshold=1_000),
+    "numpy-sharded": _sharded,
+}
+
+def _timed_ops(name: str, jobs: List[Callable[[], Any]], concurrency: int,
+               instrumentation: Instrumentation, store: str) -> Dict[str, float]:
+    """Runs `jobs` on `concurrency` threads, timing each op (as stage `name`) and the whole phase."""
+    def run(job):
+        with instrumentation.span(name, store):
+            job()
+
+    start = time.perf_counter()
+    if concurrency <= 1:
+        for job in jobs:
+            run(job)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(run, jobs))
+    elapsed = time.perf_counter() - start
+    return {"count": len(jobs), "seconds": elapsed, "ops_per_sec": len(jobs) / elapsed if elapsed > 0 else 0.0}
+
+def _close(provider: Any):
+    close = getattr(provider, "close", None)
+    if callable(close):
+        close()
+
+def run_memory_workload(store: str, config: WorkloadConfig, workdir: str) -> CaseResult:
+    """Preloads memories, then drives MemoryManager.process_message and bounded recall."""
+    rng = random.Random(config.seed)
+    instrumentation = Instrumentation()
+    db = DB_STORES[store](workdir)
+    run_id = f"{time.time_ns():x}"
+    users = [f"bench-{run_id}-{i}" for i in range(config.users)]
+    try:
+        with instrumentation.span("preload", store):
+            for user_id in users:
+                db.upsert_many([UserMemory(user_id=user_id, content=fact_sentence(rng))
+                                for _ in range(config.memories_per_user)])
+
+        model = FakeModelProvider(facts_per_message=config.facts_per_message,
+                                  latency=config.model_latency, seed=config.seed)
+        manager = MemoryManager(model, db, instrumentation=instrumentation)
+        messages = [(user_id, make_message(rng, config.facts_per_message))
+                    for _ in range(config.messages_per_user) for user_id in users]
+        queries = [(user_id, fact_sentence(rng))
+                   for _ in range(config.searches_per_user) for user_id in users]
+
+        result = CaseResult("memory", store, asdict(config))
+        result.ops["process_message"] = _timed_ops(
+            "op:process_message", [lambda u=u, m=m: manager.process_message(u, m) for u, m in messages],
+            config.concurrency, instrumentation, store)
+        result.ops["get_relevant_memories"] = _timed_ops(
+            "op:get_relevant_memories", [lambda u=u, q=q: db.get_relevant_memories(u, q, 10) for u, q in queries],
+            config.concurrency, instrumentation, store)
+        result.stages = instrumentation.snapshot()
+        result.peak_rss_mb = peak_rss_mb()
+        return result
+    finally:
+        _close(db)
+
+def run_vector_workload(store: str, config: WorkloadConfig, workdir: str) -> CaseResult:
+    """Preloads embedded memories, then drives VectorMemoryManager.process_message and search."""
+    rng = random.Random(config.seed)
+    instrumentation = Instrumentation()
+    vector_db = VECTOR_STORES[store](workdir)
+    embedder = HashingEmbedder(dim=config.embed_dim)
+    run_id = f"{time.time_ns():x}"
+    users = [f"bench-{run_id}-{i}" for i in range(config.users)]
+    try:
+        with instrumentation.span("preload", store):
+            for user_id in users:
+                memories = [VectorMemory(user_id=user_id, content=fact_sentence(rng))
+                            for _ in range(config.memories_per_user)]
+                vector_db.upsert_many(memories, embedder.embed_texts([mem.content for mem in memories]))
+
+        model = FakeModelProvider(facts_per_message=config.facts_per_message,
+                                  latency=config.model_latency, seed=config.seed)
+        manager = VectorMemoryManager(model, vector_db, embedder, instrumentation=instrumentation)
+        messages = [(user_id, make_message(rng, config.facts_per_message))
+                    for _ in range(config.messages_per_user) for user_id in users]
+        queries = [(user_id, fact_sentence(rng))
+                   for _ in range(config.searches_per_user) for user_id in users]
+
+        result = CaseResult("vector", store, asdict(config))
+        result.ops["process_message"] = _timed_ops(
+            "op:process_message", [lambda u=u, m=m: manager.process_message(u, m) for u, m in messages],
+            config.concurrency, instrumentation, store)
+        result.ops["search"] = _timed_ops(
+            "op:search", [lambda u=u, q=q: manager.search(u, q, 5) for u, q in queries],
+            config.concurrency, instrumentation, store)
+        result.stages = instrumentation.snapshot()
+        result.peak_rss_mb = peak_rss_mb()
+        return result
+    finally:
+        _close(vector_db)
+
+WORKLOADS: Dict[str, Callable[[str, WorkloadConfig, str], CaseResult]] = {
+    "memory": run_memory_workload,
+    "vector": run_vector_workload,
+}
+
+def stores_for(workload: str) -> Dict[str, Callable[[str], Any]]:
+    return DB_STORES if workload == "memory" else VECTOR_STORES
@@ -1,3 +1,4 @@
+import logging
 import os
 import sys
 from dotenv import load_dotenv
@@ -57,6 +58,8 @@ def run_demo(manager: MemoryManager, db: BaseDbProvider, user_id: str):
     print("\nDemo finished.")
 
 def main():
+    # Show the library's progress messages
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     # Load .env file from the project root
     load_dotenv(os.path.join(project_root, '.env'))
     
@@ -1,3 +1,4 @@
+import logging
 import os
 import sys
 from dotenv import load_dotenv
@@ -42,6 +43,8 @@ def print_vector_memories(manager: VectorMemoryManager, user_id: str, query: str
 
 
 def main():
+    # Show the library's progress messages
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     load_dotenv(os.path.join(project_root, '.env'))
     
     # --- 1. Instantiate ALL providers ---
@@ -1,20 +1,44 @@
 # memory_lib/__init__.py
+import importlib
+import logging
 
-# Export the main manager class
-from .core.memory_manager import MemoryManager
+# Library modules log under the "memory_lib" logger; applications choose
+# where that output goes (e.g. logging.basicConfig(level=logging.INFO)).
+logging.getLogger(__name__).addHandler(logging.NullHandler())
 
-# Export the core schemas
-from .schemas import Message, UserMemory, MemoryAction, MemoryUpdatePlan
+# Public names -> defining module. They are imported on first access, so
+# `import memory_lib` stays cheap for workers that only need one provider.
+_EXPORTS = {
+    # The main manager classes
+    "MemoryManager": ".core.memory_manager",
+    "MemoryIngestor": ".core.ingestor",
+    "MemoryConsolidator": ".core.consolidator",
+    "MemoryQuota": ".core.quota",
+    # The core schemas
+    "Message": ".schemas",
+    "UserMemory": ".schemas",
+    "MemoryAction": ".schemas",
+    "MemoryUpdatePlan": ".schemas",
+    # The base interfaces for type-hinting or creating custom providers
+    "BaseModelProvider": ".interfaces",
+    "BaseDbProvider": ".interfaces",
+    # Stage timing
+    "Instrumentation": ".instrumentation",
+    # Providers by name
+    "get_provider": ".registry",
+    "create_provider": ".registry",
+    "register_provider": ".registry",
+}
 
-# Export the base interfaces for type-hinting or creating custom providers
-from .interfaces import BaseModelProvider, BaseDbProvider
+__all__ = list(_EXPORTS)
 
-__all__ = [
-    "MemoryManager",
-    "Message",
-    "UserMemory",
-    "MemoryAction",
-    "MemoryUpdatePlan",
-    "BaseModelProvider",
-    "BaseDbProvider"
-]
\ No newline at end of file
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
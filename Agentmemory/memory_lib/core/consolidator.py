@@ -0,0 +1,364 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from ..interfaces import BaseModelProvider, BaseVectorStore, BaseEmbedder, BaseLexicalIndex
+from ..instrumentation import Instrumentation, metrics
+from ..schemas import Message, VectorMemory, ConsolidationPlan
+
+logger = logging.getLogger(__name__)
+
+class MemoryConsolidator:
+    """
+    Offline job that merges near-duplicate vector memories.
+
+    `consolidate(user_id)` loads a user's memories with their stored
+    embeddings and links every pair whose cosine similarity is at least
+    `similarity`. The similarity matrix is computed in row blocks of at most
+    `block_bytes`, so memory stays bounded. Linked memories form clusters of
+    at most `max_cluster_size`. Clusters of identical text are merged
+    directly. The rest go to the model, `clusters_per_call` clusters per
+    request, which returns one memory per cluster (or keeps it as is). Each
+    merged cluster becomes one memory: the most recently updated member's id
+    with the merged content. The other members are deleted, all in one bulk
+    write.
+
+    Passes are incremental. Each user is first fingerprinted from a pass
+    without embeddings; a user whose memories have not changed since their
+    last pass is skipped without reading any vectors, and a changed user only has their new or
+    updated memories compared against the rest. Progress is kept in
+    `state_path` (JSON) when given. Run it while users are idle: a write made
+    between loading and rewriting a cluster can be overwritten by the merge.
+    """
+    def __init__(self,
+                 model: BaseModelProvider,
+                 vector_db: BaseVectorStore,
+                 embedder: BaseEmbedder,
+                 similarity: float = 0.92,
+                 max_cluster_size: int = 8,
+                 clusters_per_call: int = 16,
+                 block_bytes: int = 64 * 1024 * 1024,
+                 page_size: int = 1000,
+                 state_path: Optional[str] = None,
+                 lexical_index: Optional[BaseLexicalIndex] = None,
+                 instrumentation: Optional[Instrumentation] = None):
+        if not isinstance(model, BaseModelProvider):
+            raise TypeError("model must be an instance of BaseModelProvider")
+        if not isinstance(vector_db, BaseVectorStore):
+            raise TypeError("vector_db must be an instance of BaseVectorStore")
+        if not isinstance(embedder, BaseEmbedder):
+            raise TypeError("embedder must be an instance of BaseEmbedder")
+        if lexical_index is not None and not isinstance(lexical_index, BaseLexicalIndex):
+            raise TypeError("lexical_index must be an instance of BaseLexicalIndex")
+        if not -1.0 <= similarity <= 1.0:
+            raise ValueError("similarity must be a cosine similarity between -1 and 1")
+        if max_cluster_size < 2:
+            raise ValueError("max_cluster_size must be at least 2")
+        if clusters_per_call < 1:
+            raise ValueError("clusters_per_call must be at least 1")
+
+        self.model = model
+        self.vector_db = vector_db
+        self.embedder = embedder
+        self.similarity = similarity
+        self.max_cluster_size = max_cluster_size
+        self.clusters_per_call = clusters_per_call
+        self.block_bytes = block_bytes
+        self.page_size = page_size
+        self.state_path = state_path
+        self.lexical_index = lexical_index
+        self.instrumentation = instrumentation or metrics
+        self._lock = threading.Lock()
+        # user_id -> {"fingerprint": ..., "consolidated_at": isoformat}
+        self._state: Dict[str, Dict[str, str]] = {}
+        if state_path and os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                self._state = json.load(f).get("users", {})
+
+        self.passes = 0
+        self.users_skipped = 0
+        self.rows_reclaimed = 0
+        self.bytes_reclaimed = 0
+        self.llm_calls = 0
+        logger.info("[MemoryConsolidator] Initialized (similarity >= %s).", similarity)
+
+    # --- loading ---
+
+    def _load(self, user_id: str) -> Tuple[List[VectorMemory], np.ndarray]:
+        """All of a user's memories and their unit-normalized embeddings, page by page."""
+        memories: List[VectorMemory] = []
+        blocks = []
+        for page in self.vector_db.iter_memories(user_id, batch_size=self.page_size, include_embeddings=True):
+            memories.extend(page.memories)
+            blocks.append(np.asarray(page.embeddings, dtype=np.float32))
+        if not memories:
+            return [], np.empty((0, 0), dtype=np.float32)
+        vectors = np.concatenate(blocks)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return memories, vectors / np.where(norms > 0, norms, 1.0)
+
+    def _scan_fingerprint(self, user_id: str) -> Tuple[int, str]:
+        """Row count and fingerprint of a user's memories, read without embeddings."""
+        keys = []
+        for page in self.vector_db.iter_memories(user_id, batch_size=self.page_size):
+            keys.extend(self._key(mem) for mem in page.memories)
+        return len(keys), self._digest(keys)
+
+    @staticmethod
+    def _key(memory: VectorMemory) -> str:
+        return f"{memory.id}|{memory.updated_at.isoformat()}"
+
+    @staticmethod
+    def _digest(keys: List[str]) -> str:
+        digest = hashlib.sha1()
+        for key in sorted(keys):
+            digest.update(key.encode("utf-8"))
+        return digest.hexdigest()
+
+    @classmethod
+    def _fingerprint(cls, memories: List[VectorMemory]) -> str:
+        return cls._digest([cls._key(mem) for mem in memories])
+
+    @staticmethod
+    def _payload_bytes(content: str, dim: int) -> int:
+        """Approximate stored size of one memory: UTF-8 content plus a float32 vector."""
+        return len(content.encode("utf-8")) + dim * 4
+
+    # --- clustering ---
+
+    def _find_clusters(self, vectors: np.ndarray, query_rows: np.ndarray) -> List[List[int]]:
+        """
+        Links `query_rows` to every row at or above the similarity threshold,
+        one block of rows at a time, then returns the linked groups (size >= 2).
+        Within a block the most similar pairs are linked first, so capped
+        clusters keep their closest members.
+        """
+        n = vectors.shape[0]
+        parent = list(range(n))
+        size = [1] * n
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        block = max(1, self.block_bytes // (4 * max(1, n)))
+        for start in range(0, len(query_rows), block):
+            rows = query_rows[start:start + block]
+            sims = vectors[rows] @ vectors.T
+            sims[np.arange(len(rows)), rows] = -np.inf
+            hit_rows, hit_cols = np.nonzero(sims >= self.similarity)
+            order = np.argsort(-sims[hit_rows, hit_cols], kind="stable")
+            for a, b in zip(rows[hit_rows[order]], hit_cols[order]):
+                root_a, root_b = find(int(a)), find(int(b))
+                if root_a == root_b or size[root_a] + size[root_b] > self.max_cluster_size:
+                    continue
+                parent[root_b] = root_a
+                size[root_a] += size[root_b]
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(n):
+            if size[find(i)] > 1:
+                groups.setdefault(find(i), []).append(i)
+        return list(groups.values())
+
+    # --- merging ---
+
+    def _merge_plan(self, clusters: List[List[str]]) -> Dict[int, Optional[str]]:
+        """Asks the model for one consolidated memory per cluster, in a single call."""
+        prompt = """
+        You are a memory consolidation expert. Each cluster below holds memories
+        about one user that look like near-duplicates.
+
+        For each cluster, return ONE memory that keeps every distinct detail
+        from its members, without repeating anything. If the memories in a
+        cluster are actually about different things, return null content for
+        that cluster so they stay separate.
+
+        ---
+        CLUSTERS:
+        """
+        for number, contents in enumerate(clusters):
+            prompt += f"\nCluster {number}:\n"
+            for content in contents:
+                prompt += f"- {content}\n"
+        prompt += """
+        ---
+        Provide ONLY a JSON object matching the ConsolidationPlan schema, with
+        one entry per cluster number.
+        """
+
+        messages = [Message(role="system", content=prompt)]
+        try:
+            self.llm_calls += 1
+            with self.instrumentation.span("merge_plan", self.model):
+                response = self.model.get_structured_completion(messages, ConsolidationPlan)
+            if isinstance(response, ConsolidationPlan):
+                return {merge.cluster: merge.content for merge in response.merges
+                        if 0 <= merge.cluster < len(clusters)}
+        except Exception as e:
+            logger.error("[MemoryConsolidator] Error getting merge plan: %s", e)
+        return {} # Keep every cluster as is on failure
+
+    def _merged_contents(self, memories: List[VectorMemory], clusters: List[List[int]]) -> List[Optional[str]]:
+        """Merged content per cluster, or None to leave that cluster alone."""
+        merged: List[Optional[str]] = [None] * len(clusters)
+        needs_model = []
+        for i, cluster in enumerate(clusters):
+            texts = {" ".join(memories[row].content.split()).casefold() for row in cluster}
+            if len(texts) == 1:
+                # Identical text: keep the newest copy, no model call needed
+                merged[i] = max((memories[row] for row in cluster), key=lambda mem: mem.updated_at).content
+            else:
+                needs_model.append(i)
+
+        for start in range(0, len(needs_model), self.clusters_per_call):
+            batch = needs_model[start:start + self.clusters_per_call]
+            plan = self._merge_plan([[memories[row].content for row in clusters[i]] for i in batch])
+            for number, i in enumerate(batch):
+                content = plan.get(number)
+                merged[i] = content.strip() if content and content.strip() else None
+        return merged
+
+    # --- passes ---
+
+    def consolidate(self, user_id: str, force: bool = False) -> Dict[str, Any]:
+        """
+        Runs one pass for a user and reports what it reclaimed. With `force`,
+        the user is scanned in full even if unchanged since the last pass.
+        """
+        started = time.perf_counter()
+        pass_started = datetime.now()
+        report: Dict[str, Any] = {"user_id": user_id, "skipped": False, "rows_before": 0, "rows_after": 0,
+                                  "rows_reclaimed": 0, "bytes_reclaimed": 0, "clusters": 0,
+                                  "merged_clusters": 0, "llm_calls": 0, "seconds": 0.0}
+        previous = self._state.get(user_id)
+        if not force:
+            # Decide from ids and timestamps alone; vectors are only read for changed users
+            with self.instrumentation.span("consolidate_scan", self.vector_db):
+                rows, fingerprint = self._scan_fingerprint(user_id)
+            if not rows or (previous and previous["fingerprint"] == fingerprint):
+                return self._skip(report, rows, started)
+
+        with self.instrumentation.span("consolidate_load", self.vector_db):
+            memories, vectors = self._load(user_id)
+        if not memories:
+            return self._skip(report, 0, started)
+        report["rows_before"] = report["rows_after"] = len(memories)
+
+        if previous and not force:
+            since = datetime.fromisoformat(previous["consolidated_at"])
+            query_rows = np.array([i for i, mem in enumerate(memories) if mem.updated_at > since], dtype=np.int64)
+        else:
+            query_rows = np.arange(len(memories))
+
+        with self.instrumentation.span("similarity", self.vector_db):
+            clusters = self._find_clusters(vectors, query_rows)
+        report["clusters"] = len(clusters)
+        llm_calls = self.llm_calls
+        merged = self._merged_contents(memories, clusters) if clusters else []
+        report["llm_calls"] = self.llm_calls - llm_calls
+
+        dim = vectors.shape[1]
+        survivors: List[VectorMemory] = []
+        survivor_vectors: List[Optional[np.ndarray]] = []
+        removed: List[str] = []
+        bytes_before = bytes_after = 0
+        now = datetime.now()
+        for cluster, content in zip(clusters, merged):
+            if content is None:
+                continue
+            members = sorted((memories[row] for row in cluster), key=lambda mem: mem.updated_at)
+            metadata: Dict[str, Any] = {}
+            for mem in members:
+                metadata.update(mem.metadata)
+            keep = members[-1]
+            survivors.append(VectorMemory(id=keep.id, user_id=user_id, content=content,
+                                          created_at=min(mem.created_at for mem in members),
+                                          updated_at=now, metadata=metadata))
+            # Reuse a member's stored vector when the merge kept its text verbatim
+            same = [row for row in cluster if memories[row].content == content]
+            survivor_vectors.append(vectors[same[0]] if same else None)
+            removed.extend(mem.id for mem in members[:-1])
+            bytes_before += sum(self._payload_bytes(mem.content, dim) for mem in members)
+            bytes_after += self._payload_bytes(content, dim)
+
+        if survivors:
+            to_embed = [i for i, vector in enumerate(survivor_vectors) if vector is None]
+            if to_embed:
+                with self.instrumentation.span("embed", self.embedder):
+                    fresh = self.embedder.embed_texts([survivors[i].content for i in to_embed])
+                for i, vector in zip(to_embed, fresh):
+                    survivor_vectors[i] = np.asarray(vector, dtype=np.float32)
+            with self.instrumentation.span("db_write", self.vector_db):
+                self.vector_db.upsert_many(survivors, [vector.tolist() for vector in survivor_vectors])
+                self.vector_db.delete_many(removed, user_id)
+            if self.lexical_index is not None:
+                with self.instrumentation.span("db_write", self.lexical_index):
+                    self.lexical_index.upsert_many(survivors)
+                    self.lexical_index.delete_many(removed)
+
+        # Fingerprint of the store as this pass left it, so an idle user is skipped next time
+        gone = set(removed)
+        updated = {mem.id: mem for mem in survivors}
+        remaining = [updated.get(mem.id, mem) for mem in memories if mem.id not in gone]
+        with self._lock:
+            self._state[user_id] = {"fingerprint": self._fingerprint(remaining),
+                                    "consolidated_at": pass_started.isoformat()}
+            self._save_state()
+            self.passes += 1
+            self.rows_reclaimed += len(removed)
+            self.bytes_reclaimed += bytes_before - bytes_after
+
+        report.update({"rows_after": len(remaining), "rows_reclaimed": len(removed),
+                       "bytes_reclaimed": bytes_before - bytes_after, "merged_clusters": len(survivors),
+                       "seconds": time.perf_counter() - started})
+        logger.info("[MemoryConsolidator] %s: merged %s cluster(s), reclaimed %s rows / %s bytes",
+                    user_id, len(survivors), len(removed), bytes_before - bytes_after)
+        return report
+
+    def _skip(self, report: Dict[str, Any], rows: int, started: float) -> Dict[str, Any]:
+        self.users_skipped += 1
+        report.update({"skipped": True, "rows_before": rows, "rows_after": rows,
+                       "seconds": time.perf_counter() - started})
+        return report
+
+    def consolidate_all(self, user_ids: Optional[List[str]] = None, force: bool = False) -> Dict[str, Any]:
+        """Runs `consolidate` for each user (default: every user in the store) and totals the reports."""
+        started = time.perf_counter()
+        users = user_ids if user_ids is not None else self.vector_db.list_user_ids()
+        reports = [self.consolidate(user_id, force=force) for user_id in users]
+        changed = [report for report in reports if not report["skipped"]]
+        return {
+            "users_scanned": len(changed),
+            "users_skipped": len(reports) - len(changed),
+            "rows_reclaimed": sum(report["rows_reclaimed"] for report in changed),
+            "bytes_reclaimed": sum(report["bytes_reclaimed"] for report in changed),
+            "llm_calls": sum(report["llm_calls"] for report in changed),
+            "seconds": time.perf_counter() - started,
+            "users": changed,
+        }
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"users": self._state}, f)
+        os.replace(tmp, self.state_path)
+
+    def stats(self) -> Dict[str, int]:
+        """Totals across every pass run by this consolidator."""
+        return {
+            "passes": self.passes,
+            "users_skipped": self.users_skipped,
+            "rows_reclaimed": self.rows_reclaimed,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "llm_calls": self.llm_calls,
+        }
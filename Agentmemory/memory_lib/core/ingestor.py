@@ -0,0 +1,226 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class MemoryIngestor:
+    """
+    Asynchronous front-end for MemoryManager or VectorMemoryManager.
+
+    `submit()` enqueues a message and returns a Future right away; a bounded
+    worker pool calls `manager.process_message` in the background. Messages
+    for different users run in parallel, while each user's messages are
+    processed strictly one at a time in arrival order, so UPDATE/DELETE plans
+    always see the result of the previous message.
+
+    With `debounce` > 0, a user's messages are held until the user has been
+    quiet for `debounce` seconds (or `max_batch` messages are waiting). They
+    are then handed to `manager.process_messages` as one burst, which costs
+    one LLM plan instead of one per message.
+    """
+    def __init__(self,
+                 manager: Any,
+                 max_workers: int = 4,
+                 max_pending: Optional[int] = None,
+                 on_error: Optional[Callable[[str, str, Exception], None]] = None,
+                 debounce: float = 0.0,
+                 max_batch: int = 32):
+        if not callable(getattr(manager, "process_message", None)):
+            raise TypeError("manager must provide process_message(user_id, message)")
+        if debounce > 0 and not callable(getattr(manager, "process_messages", None)):
+            raise TypeError("debounce requires a manager with process_messages(user_id, messages)")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+
+        self.manager = manager
+        self.max_pending = max_pending
+        self.on_error = on_error
+        self.debounce = debounce
+        self.max_batch = max_batch
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="MemoryIngestor")
+        # user_id -> FIFO of (message, enqueued_at, future)
+        self._queues: Dict[str, Deque[Tuple[str, float, Future]]] = {}
+        self._active: set = set()
+        self._pending = 0
+        self._in_flight = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self.processed = 0
+        self.failed = 0
+        self.last_lag = 0.0
+        logger.info("[MemoryIngestor] Initialized with %s worker(s).", max_workers)
+
+    def submit(self, user_id: str, message: str, timeout: Optional[float] = None) -> Future:
+        """
+        Enqueues a message and returns immediately. If `max_pending` messages
+        are already waiting, blocks up to `timeout` seconds for room and then
+        raises TimeoutError.
+        """
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MemoryIngestor is closed")
+            if self.max_pending is not None:
+                if not self._cond.wait_for(lambda: self._pending < self.max_pending or self._closed, timeout):
+                    raise TimeoutError(f"Ingestion queue is full ({self._pending} pending)")
+                if self._closed:
+                    raise RuntimeError("MemoryIngestor is closed")
+            self._queues.setdefault(user_id, deque()).append((message, time.monotonic(), future))
+            self._pending += 1
+            if user_id not in self._active:
+                self._active.add(user_id)
+                self._schedule(user_id, self.debounce)
+        return future
+
+    def _schedule(self, user_id: str, delay: float):
+        """Queues a user's next turn on the pool, optionally after `delay` seconds."""
+        if delay <= 0:
+            try:
+                self._executor.submit(self._run_next, user_id)
+            except RuntimeError:
+                # The pool is gone (drain gave up); also reached from debounce timers
+                with self._cond:
+                    logger.warning("[MemoryIngestor] Pool shut down; failing %s message(s) left for user '%s'.", len(self._queues.get(user_id, ())), user_id)
+                    self._fail_queued([user_id], RuntimeError("MemoryIngestor shut down before the message was processed"))
+            return
+        timer = threading.Timer(delay, self._schedule, args=(user_id, 0))
+        timer.daemon = True
+        timer.start()
+
+    def _run_next(self, user_id: str):
+        """Processes a user's next message (or debounced burst), then reschedules the user if more are queued."""
+        with self._cond:
+            queue = self._queues.get(user_id)
+            if not queue:
+                # Failed by drain() while this turn was waiting
+                self._queues.pop(user_id, None)
+                self._active.discard(user_id)
+                return
+            if self.debounce > 0:
+                quiet_for = time.monotonic() - queue[-1][1]
+                if quiet_for < self.debounce and len(queue) < self.max_batch:
+                    # Still bursting; check again once the window has passed
+                    self._schedule(user_id, self.debounce - quiet_for)
+                    return
+            take = min(len(queue), self.max_batch) if self.debounce > 0 else 1
+            batch = [queue.popleft() for _ in range(take)]
+            self._pending -= take
+            self._in_flight += take
+            self.last_lag = time.monotonic() - batch[0][1]
+            self._cond.notify_all()
+
+        messages = [message for message, _, _ in batch]
+        try:
+            try:
+                if len(messages) == 1:
+                    result = self.manager.process_message(user_id, messages[0])
+                else:
+                    result = self.manager.process_messages(user_id, messages)
+            except Exception as e:
+                logger.error("[MemoryIngestor] Error processing %s message(s) for user '%s': %s", len(messages), user_id, e)
+                with self._cond:
+                    self.failed += len(messages)
+                self._report_error(user_id, messages, e)
+                for _, _, future in batch:
+                    if not future.cancelled():
+                        future.set_exception(e)
+            else:
+                for _, _, future in batch:
+                    if not future.cancelled():
+                        future.set_result(result)
+        finally:
+            # Always settle the user's turn, or flush() and their later messages would wait forever
+            with self._cond:
+                self._in_flight -= len(messages)
+                self.processed += len(messages)
+                if self._queues.get(user_id):
+                    # Requeue at the back of the pool so one busy user can't starve others
+                    self._schedule(user_id, 0)
+                else:
+                    self._queues.pop(user_id, None)
+                    self._active.discard(user_id)
+                self._cond.notify_all()
+
+    def _fail_queued(self, user_ids: List[str], error: Exception):
+        """Fails every message still queued for `user_ids` and retires those users. Caller holds the lock."""
+        for user_id in user_ids:
+            queue = self._queues.pop(user_id, None)
+            self._active.discard(user_id)
+            while queue:
+                _, _, future = queue.popleft()
+                self._pending -= 1
+                if not future.cancelled():
+                    future.set_exception(error)
+        self._cond.notify_all()
+
+    def _report_error(self, user_id: str, messages: List[str], error: Exception):
+        """Calls `on_error` per message; a failing callback is logged, never raised."""
+        if self.on_error is None:
+            return
+        for message in messages:
+            try:
+                self.on_error(user_id, message, error)
+            except Exception as e:
+                logger.error("[MemoryIngestor] on_error callback failed for user '%s': %s", user_id, e)
+
+    def queue_depth(self, user_id: Optional[str] = None) -> int:
+        """Messages waiting to be processed, overall or for one user."""
+        with self._cond:
+            if user_id is None:
+                return self._pending
+            return len(self._queues.get(user_id, ()))
+
+    def lag(self) -> float:
+        """Age in seconds of the oldest message still waiting (0 if none)."""
+        now = time.monotonic()
+        with self._cond:
+            oldest = [queue[0][1] for queue in self._queues.values() if queue]
+            return now - min(oldest) if oldest else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, lag and throughput counters."""
+        lag = self.lag()
+        with self._cond:
+            return {
+                "pending": self._pending,
+                "in_flight": self._in_flight,
+                "active_users": len(self._active),
+                "processed": self.processed,
+                "failed": self.failed,
+                "oldest_lag_seconds": lag,
+                "last_lag_seconds": self.last_lag,
+            }
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every queued message has been processed. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending == 0 and self._in_flight == 0, timeout)
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Stops accepting messages, processes everything queued, and shuts the
+        pool down. If `timeout` passes first, messages not yet started fail
+        with RuntimeError, and False is returned.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        done = self.flush(timeout)
+        self._executor.shutdown(wait=done, cancel_futures=not done)
+        if not done:
+            # Nothing will run the rest; fail it so callers blocked on result() wake up
+            with self._cond:
+                self._fail_queued(list(self._queues), RuntimeError("MemoryIngestor drain timed out before the message was processed"))
+        logger.info("[MemoryIngestor] Drained (%s processed, %s failed).", self.processed, self.failed)
+        return done
+
+    def close(self):
+        """Alias for drain() with no timeout."""
+        self.drain()
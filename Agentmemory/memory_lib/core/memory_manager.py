@@ -1,26 +1,174 @@
+import logging
 from ..interfaces import BaseModelProvider, BaseDbProvider
 from ..schemas import Message, UserMemory, MemoryUpdatePlan, MemoryAction
-from typing import List
+from ..ranking import estimate_tokens
+from ..instrumentation import Instrumentation, metrics
+from .quota import MemoryQuota
+from typing import Dict, List, Optional, Set, Union
+from collections import OrderedDict
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class _CachedMemories:
+    """A user's memory list as last seen, with the DB version it was read at."""
+    __slots__ = ("memories", "version", "loaded_at")
+
+    def __init__(self, memories: List[UserMemory], version: Optional[int]):
+        self.memories = memories
+        self.version = version
+        self.loaded_at = time.monotonic()
 
 class MemoryManager:
     """
     The core class that manages memory by orchestrating
     the AI model and the Database.
     """
-    def __init__(self, model: BaseModelProvider, db: BaseDbProvider):
+    def __init__(self,
+                 model: BaseModelProvider,
+                 db: BaseDbProvider,
+                 cache_size: int = 0,
+                 cache_ttl: Optional[float] = None,
+                 prompt_max_memories: Optional[int] = None,
+                 prompt_max_tokens: Optional[int] = None,
+                 recency_weight: float = 0.3,
+                 instrumentation: Optional[Instrumentation] = None,
+                 quota: Optional[MemoryQuota] = None):
+        """
+        `cache_size` > 0 keeps the memory lists of that many recently active
+        users in an LRU, so `_build_prompt` does not re-read the DB every turn.
+        The cache is updated in place from each executed plan. An entry is
+        reloaded if it is older than `cache_ttl` seconds, or if the provider's
+        `get_memory_version` shows another writer has changed the user's rows.
+
+        Setting `prompt_max_memories` and/or `prompt_max_tokens` bounds the
+        prompt. Only the memories most relevant to the new message are shown,
+        chosen by `db.get_relevant_memories`, which blends full-text relevance
+        with recency by `recency_weight`. The cache is not used in this mode.
+
+        `instrumentation` receives per-stage timings (db_read, update_plan,
+        db_write); defaults to the shared `memory_lib.instrumentation.metrics`.
+
+        `quota` caps each user's memories. After a write that leaves a user
+        over the cap, the lowest-scoring memories are evicted to the quota's
+        cold store. In bounded mode, memories chosen for the prompt count as
+        hits. `restore` brings archived memories back.
+        """
         if not isinstance(model, BaseModelProvider):
             raise TypeError("model must be an instance of BaseModelProvider")
         if not isinstance(db, BaseDbProvider):
             raise TypeError("db must be an instance of BaseDbProvider")
+        if quota is not None and not isinstance(quota, MemoryQuota):
+            raise TypeError("quota must be an instance of MemoryQuota")
             
         self.model = model
         self.db = db
-        print("[MemoryManager] Initialized successfully.")
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache: "OrderedDict[str, _CachedMemories]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.prompt_max_memories = prompt_max_memories
+        self.prompt_max_tokens = prompt_max_tokens
+        self.recency_weight = recency_weight
+        self.instrumentation = instrumentation or metrics
+        self.quota = quota
+        logger.info("[MemoryManager] Initialized successfully.")
+
+    def _select_memories(self, user_id: str, query: str) -> List[UserMemory]:
+        """Bounded mode: the most relevant memories that fit the count and token budgets."""
+        limit = self.prompt_max_memories
+        if limit is None:
+            # Every memory line costs several tokens, so this over-fetches safely
+            limit = max(1, self.prompt_max_tokens // 4)
+        with self.instrumentation.span("db_read", self.db):
+            candidates = self.db.get_relevant_memories(user_id, query, limit, self.recency_weight)
+        if self.prompt_max_tokens is None:
+            self._record_hits(user_id, candidates)
+            return candidates
+
+        selected, used = [], 0
+        for mem in candidates:
+            cost = estimate_tokens(f"- [ID: {mem.memory_id}] {mem.content}")
+            if used + cost > self.prompt_max_tokens:
+                break
+            selected.append(mem)
+            used += cost
+        self._record_hits(user_id, selected)
+        return selected
+
+    def _record_hits(self, user_id: str, memories: List[UserMemory]):
+        if self.quota is not None:
+            self.quota.record_hits(user_id, [mem.memory_id for mem in memories])
 
-    def _build_prompt(self, user_id: str, new_message: str) -> List[Message]:
-        """Builds the system prompt for the AI to make a memory decision."""
-        print(f"[MemoryManager] Building prompt for user: {user_id}")
-        existing_memories = self.db.get_memories(user_id)
+    def _get_memories(self, user_id: str) -> List[UserMemory]:
+        """Returns the user's memories, from the cache when it is still fresh."""
+        if self.cache_size <= 0:
+            with self.instrumentation.span("db_read", self.db):
+                return self.db.get_memories(user_id)
+
+        version = self.db.get_memory_version(user_id)
+        with self._cache_lock:
+            entry = self._cache.get(user_id)
+            fresh = (
+                entry is not None
+                and (self.cache_ttl is None or time.monotonic() - entry.loaded_at < self.cache_ttl)
+                and entry.version == version
+            )
+            if fresh:
+                self._cache.move_to_end(user_id)
+                self.cache_hits += 1
+                return list(entry.memories)
+            self.cache_misses += 1
+
+        with self.instrumentation.span("db_read", self.db):
+            memories = self.db.get_memories(user_id)
+        with self._cache_lock:
+            self._cache[user_id] = _CachedMemories(memories, version)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return list(memories)
+
+    def _apply_to_cache(self, user_id: str, upserts: List[UserMemory], delete_ids: List[str]):
+        """Write-through: mirrors an executed plan onto the cached list."""
+        with self._cache_lock:
+            entry = self._cache.get(user_id)
+            if entry is None:
+                return
+            # Our batch bumps the version exactly once; anything else means
+            # another writer got in between, so drop the entry instead.
+            version_after = self.db.get_memory_version(user_id)
+            if entry.version is not None and version_after != entry.version + 1:
+                del self._cache[user_id]
+                return
+            changed = {mem.memory_id for mem in upserts} | set(delete_ids)
+            # Rows are ordered by updated_at, so rewritten rows move to the end
+            entry.memories = [mem for mem in entry.memories if mem.memory_id not in changed] + list(upserts)
+            entry.version = version_after
+
+    def invalidate(self, user_id: Optional[str] = None):
+        """Drops one user's cached memories, or the whole cache."""
+        with self._cache_lock:
+            if user_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(user_id, None)
+
+    def _build_prompt(self, user_id: str, new_message: Union[str, List[str]]) -> List[Message]:
+        """
+        Builds the system prompt for the AI to make a memory decision.
+        `new_message` may be a list of messages to be planned together.
+        """
+        logger.debug("[MemoryManager] Building prompt for user: %s", user_id)
+        bounded = self.prompt_max_memories is not None or self.prompt_max_tokens is not None
+        if bounded:
+            query = new_message if isinstance(new_message, str) else " ".join(new_message)
+            existing_memories = self._select_memories(user_id, query)
+        else:
+            existing_memories = self._get_memories(user_id)
         
         prompt = """
         You are a highly intelligent memory manager for an AI assistant.
@@ -41,13 +189,16 @@ class MemoryManager:
         EXISTING MEMORIES:
         """
         
+        if bounded and existing_memories:
+            prompt += "(Only the memories most relevant to this message are shown; others may exist.)\n"
         if not existing_memories:
             prompt += "<No memories exist yet.>\n"
         else:
             for mem in existing_memories:
                 prompt += f"- [ID: {mem.memory_id}] {mem.content}\n"
         
-        prompt += f"""
+        if isinstance(new_message, str):
+            prompt += f"""
         ---
         NEW USER MESSAGE:
         "{new_message}"
@@ -55,6 +206,18 @@ class MemoryManager:
         
         Based on this message and the existing memories, what is your memory update plan?
         """
+        else:
+            prompt += """
+        ---
+        NEW USER MESSAGES (oldest first; if they conflict, the LATER message takes precedence):
+        """
+            for i, msg in enumerate(new_message, 1):
+                prompt += f'{i}. "{msg}"\n'
+            prompt += """
+        ---
+        
+        Based on these messages and the existing memories, what is your single memory update plan?
+        """
         
         return [Message(role="system", content=prompt)]
 
@@ -63,41 +226,118 @@ class MemoryManager:
         Processes a new message, updates memories, and returns the actions taken.
         This is the core agentic CRUD logic.
         """
-        
+        self._process(user_id, new_message)
+
+    def process_messages(self, user_id: str, new_messages: List[str]):
+        """
+        Processes a burst of messages from one user with a single LLM plan.
+        Messages are given oldest first; later ones take precedence.
+        """
+        if not new_messages:
+            return
+        self._process(user_id, new_messages[0] if len(new_messages) == 1 else list(new_messages))
+
+    def _process(self, user_id: str, new_message: Union[str, List[str]]):
         # 1. Build the prompt
         messages = self._build_prompt(user_id, new_message)
         
         # 2. Get structured response from AI
-        print("[MemoryManager] Requesting memory plan from AI...")
-        update_plan = self.model.get_structured_completion(messages, MemoryUpdatePlan)
-        
+        logger.debug("[MemoryManager] Requesting memory plan from AI...")
+        try:
+            with self.instrumentation.span("update_plan", self.model):
+                update_plan = self.model.get_structured_completion(messages, MemoryUpdatePlan)
+        except Exception as e:
+            logger.error("[MemoryManager] Error getting memory plan: %s", e)
+            return
+
         if not isinstance(update_plan, MemoryUpdatePlan):
-            print(f"[MemoryManager] Error: Model did not return a valid MemoryUpdatePlan.")
+            logger.error("[MemoryManager] Error: Model did not return a valid MemoryUpdatePlan.")
             return
 
-        print(f"[MemoryManager] Received plan with {len(update_plan.plan)} action(s).")
+        logger.debug("[MemoryManager] Received plan with %s action(s).", len(update_plan.plan))
         
-        # 3. Execute the plan
+        # 3. Collect the plan's writes, then flush them in one batch.
+        # Later actions on the same memory_id win over earlier ones.
+        upserts: Dict[str, UserMemory] = {}
+        delete_ids: Dict[str, None] = {}
         for action in update_plan.plan:
-            try:
-                if action.action == "ADD":
-                    if not action.content:
-                        print("[MemoryManager] Skipping ADD: No content.")
-                        continue
-                    new_mem = UserMemory(user_id=user_id, content=action.content)
-                    self.db.upsert_memory(new_mem)
-                    
-                elif action.action == "UPDATE":
-                    if not action.memory_id or not action.content:
-                        print("[MemoryManager] Skipping UPDATE: Missing ID or content.")
-                        continue
-                    mem = UserMemory(memory_id=action.memory_id, user_id=user_id, content=action.content)
-                    self.db.upsert_memory(mem)
-                    
-                elif action.action == "DELETE":
-                    if not action.memory_id:
-                        print("[MemoryManager] Skipping DELETE: Missing ID.")
-                        continue
-                    self.db.delete_memory(action.memory_id)
-            except Exception as e:
-                print(f"[MemoryManager] Error executing action {action.action}: {e}")
\ No newline at end of file
+            if action.action == "ADD":
+                if not action.content:
+                    logger.warning("[MemoryManager] Skipping ADD: No content.")
+                    continue
+                new_mem = UserMemory(user_id=user_id, content=action.content)
+                upserts[new_mem.memory_id] = new_mem
+                
+            elif action.action == "UPDATE":
+                if not action.memory_id or not action.content:
+                    logger.warning("[MemoryManager] Skipping UPDATE: Missing ID or content.")
+                    continue
+                upserts[action.memory_id] = UserMemory(memory_id=action.memory_id, user_id=user_id, content=action.content)
+                delete_ids.pop(action.memory_id, None)
+                
+            elif action.action == "DELETE":
+                if not action.memory_id:
+                    logger.warning("[MemoryManager] Skipping DELETE: Missing ID.")
+                    continue
+                delete_ids[action.memory_id] = None
+                upserts.pop(action.memory_id, None)
+
+        if not upserts and not delete_ids:
+            return
+        try:
+            with self.instrumentation.span("db_write", self.db):
+                self.db.apply_batch(list(upserts.values()), list(delete_ids))
+        except Exception as e:
+            logger.error("[MemoryManager] Error executing plan (%s upsert(s), %s delete(s)): %s", len(upserts), len(delete_ids), e)
+            self.invalidate(user_id)
+            return
+        if self.cache_size > 0:
+            self._apply_to_cache(user_id, list(upserts.values()), list(delete_ids))
+        if delete_ids and self.quota is not None:
+            self.quota.forget(user_id, list(delete_ids))
+        if upserts:
+            self._enforce_quota(user_id)
+
+    def _enforce_quota(self, user_id: str, protected: Optional[Set[str]] = None):
+        """Moves the user's lowest-scoring memories, other than `protected`, to the cold tier once they exceed the cap."""
+        if self.quota is None:
+            return
+        # Most writes leave the user under the cap; only then read every row
+        if self.db.count_memories(user_id) <= self.quota.max_memories:
+            return
+        memories = self._get_memories(user_id)
+        victims = self.quota.select_evictions(user_id, memories, [mem.memory_id for mem in memories], protected)
+        if not victims:
+            return
+        evicted = [memories[i] for i in victims]
+        evicted_ids = [mem.memory_id for mem in evicted]
+        try:
+            with self.instrumentation.span("evict", self.db):
+                self.quota.archive(user_id, evicted, evicted_ids)
+                self.db.delete_many(evicted_ids)
+            logger.debug("[MemoryManager] Evicted %s memories of %s to the cold tier", len(evicted_ids), user_id)
+        except Exception as e:
+            logger.error("[MemoryManager] Error evicting %s memories: %s", len(evicted_ids), e)
+        self.invalidate(user_id)
+
+    def restore(self, user_id: str, memory_ids: List[str]) -> int:
+        """Moves archived memories back into the DB, keeping their timestamps. Returns how many."""
+        if self.quota is None or self.quota.cold_store is None:
+            raise ValueError("No cold tier configured")
+        taken = [mem for mem, _ in self.quota.cold_store.take(user_id, memory_ids, kind="db")]
+        if not taken:
+            return 0
+        try:
+            with self.instrumentation.span("db_write", self.db):
+                self.db.upsert_many(taken, keep_timestamps=True)
+        except Exception as e:
+            # Put them back so nothing is lost
+            self.quota.cold_store.archive(taken)
+            logger.error("[MemoryManager] Error restoring %s memories: %s", len(taken), e)
+            return 0
+        self.invalidate(user_id)
+        self.quota.promoted += len(taken)
+        self.quota.record_hits(user_id, [mem.memory_id for mem in taken])
+        # The restored memories still carry their old scores; evict others instead
+        self._enforce_quota(user_id, protected={mem.memory_id for mem in taken})
+        return len(taken)
@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DAY = 86400.0
+
+class MemoryQuota:
+    """
+    Per-user memory cap with decay-scored eviction, shared by MemoryManager
+    and VectorMemoryManager.
+
+    When a user holds more than `max_memories`, the lowest-scoring memories
+    are evicted until `evict_to` remain, so eviction runs in occasional
+    batches rather than on every write. A memory's score is the weighted sum
+    of three signals in [0, 1]:
+
+    - recency: 0.5 ** (days since `updated_at` / `half_life_days`)
+    - frequency: 1 - 1 / (1 + hits), where hits are search and prompt
+      appearances, also halved every `half_life_days`
+    - importance: `importance(memory)` if given, otherwise a numeric
+      `metadata["importance"]` on vector memories, otherwise 0.5
+
+    With a `cold_store` (e.g. SqliteColdStore), evicted memories are
+    archived there instead of being lost. With `promote_similarity` as well,
+    VectorMemoryManager probes the archive on each search and moves back any
+    memory whose cosine similarity to a query reaches that value. Hit counts
+    live in memory and reset on restart; recency and importance do not.
+    """
+    def __init__(self,
+                 max_memories: int = 1000,
+                 evict_to: Optional[int] = None,
+                 half_life_days: float = 30.0,
+                 recency_weight: float = 1.0,
+                 frequency_weight: float = 1.0,
+                 importance_weight: float = 1.0,
+                 importance: Optional[Callable[[Any], float]] = None,
+                 cold_store: Optional[Any] = None,
+                 promote_similarity: Optional[float] = None):
+        if max_memories < 1:
+            raise ValueError("max_memories must be at least 1")
+        evict_to = int(max_memories * 0.9) if evict_to is None else evict_to
+        if not 0 <= evict_to <= max_memories:
+            raise ValueError("evict_to must be between 0 and max_memories")
+        if half_life_days <= 0:
+            raise ValueError("half_life_days must be positive")
+        if promote_similarity is not None and cold_store is None:
+            raise ValueError("promote_similarity needs a cold_store")
+
+        self.max_memories = max_memories
+        self.evict_to = evict_to
+        self.half_life = half_life_days * _DAY
+        self.recency_weight = recency_weight
+        self.frequency_weight = frequency_weight
+        self.importance_weight = importance_weight
+        self.importance = importance
+        self.cold_store = cold_store
+        self.promote_similarity = promote_similarity
+        # user_id -> memory_id -> (decayed hit count, time of last hit)
+        self._hits: Dict[str, Dict[str, Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+        self.hits_recorded = 0
+        self.evicted = 0
+        self.archived = 0
+        self.promoted = 0
+
+    # --- signals ---
+
+    def _decayed(self, hits: float, since: float, now: float) -> float:
+        return hits * 0.5 ** (max(0.0, now - since) / self.half_life)
+
+    def record_hits(self, user_id: str, memory_ids: List[str]):
+        """Counts one access for each memory (e.g. it was returned by a search)."""
+        if not memory_ids:
+            return
+        now = time.time()
+        with self._lock:
+            user_hits = self._hits.setdefault(user_id, {})
+            for memory_id in memory_ids:
+                hits, since = user_hits.get(memory_id, (0.0, now))
+                user_hits[memory_id] = (self._decayed(hits, since, now) + 1.0, now)
+            self.hits_recorded += len(memory_ids)
+
+    def forget(self, user_id: str, memory_ids: List[str]):
+        """Drops hit counts of memories that left the hot store."""
+        with self._lock:
+            user_hits = self._hits.get(user_id)
+            if user_hits is None:
+                return
+            for memory_id in memory_ids:
+                user_hits.pop(memory_id, None)
+
+    def _importance(self, memory: Any) -> float:
+        if self.importance is not None:
+            return float(self.importance(memory))
+        value = getattr(memory, "metadata", {}).get("importance")
+        return float(value) if isinstance(value, (int, float)) else 0.5
+
+    def scores(self, user_id: str, memories: List[Any], memory_ids: List[str]) -> List[float]:
+        """Retention score per memory; higher is kept longer."""
+        now = time.time()
+        with self._lock:
+            user_hits = dict(self._hits.get(user_id, {}))
+        scores = []
+        for memory, memory_id in zip(memories, memory_ids):
+            age = max(0.0, now - memory.updated_at.timestamp())
+            recency = 0.5 ** (age / self.half_life)
+            hits, since = user_hits.get(memory_id, (0.0, now))
+            frequency = 1.0 - 1.0 / (1.0 + self._decayed(hits, since, now))
+            scores.append(self.recency_weight * recency
+                          + self.frequency_weight * frequency
+                          + self.importance_weight * self._importance(memory))
+        return scores
+
+    def select_evictions(self, user_id: str, memories: List[Any], memory_ids: List[str],
+                         protected: Optional[Set[str]] = None) -> List[int]:
+        """
+        Indices of the memories to evict, lowest score first; empty while
+        within the cap. Ids in `protected` (e.g. just restored) are never chosen.
+        """
+        if len(memories) <= self.max_memories:
+            return []
+        scores = self.scores(user_id, memories, memory_ids)
+        candidates = [i for i in range(len(memories)) if not protected or memory_ids[i] not in protected]
+        order = sorted(candidates, key=lambda i: (scores[i], memories[i].updated_at))
+        return order[:len(memories) - self.evict_to]
+
+    # --- cold tier ---
+
+    def archive(self, user_id: str, memories: List[Any], memory_ids: List[str],
+                embeddings: Optional[List[Any]] = None):
+        """Moves evicted memories to the cold store, if any, and forgets their hits."""
+        if self.cold_store is not None:
+            self.cold_store.archive(memories, embeddings)
+            self.archived += len(memories)
+        self.evicted += len(memories)
+        self.forget(user_id, memory_ids)
+        logger.debug("[MemoryQuota] Evicted %s memories of %s", len(memories), user_id)
+
+    def promotion_candidates(self, user_id: str, embeddings: List[List[float]], limit: int) -> List[str]:
+        """Archived memory ids whose similarity to any query reaches `promote_similarity`."""
+        if self.promote_similarity is None or not embeddings:
+            return []
+        found: Dict[str, None] = {}
+        for hits in self.cold_store.search_many(user_id, embeddings, limit):
+            for memory_id, similarity in hits:
+                if similarity >= self.promote_similarity:
+                    found[memory_id] = None
+        return list(found)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits_recorded": self.hits_recorded,
+            "evicted": self.evicted,
+            "archived": self.archived,
+            "promoted": self.promoted,
+        }
@@ -1,11 +1,17 @@
-from ..interfaces import BaseModelProvider, BaseVectorStore, BaseEmbedder
+import logging
+from ..interfaces import BaseModelProvider, BaseVectorStore, BaseEmbedder, BaseLexicalIndex
+from ..instrumentation import Instrumentation, metrics
+from .quota import MemoryQuota
+from ..ranking import tokenize, reciprocal_rank_scores
 from ..schemas import (
     Message, VectorMemory, RetrievedMemory, FactExtractPlan, 
     VectorMemoryAction, VectorMemoryUpdatePlan
 )
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Union
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 class VectorMemoryManager:
     """
     Manages "infinite" memory using a vector store and an "extract-search-merge"
@@ -15,65 +21,211 @@ class VectorMemoryManager:
                  model: BaseModelProvider, 
                  vector_db: BaseVectorStore, 
                  embedder: BaseEmbedder,
-                 search_limit: int = 3):
-        
+                 search_limit: int = 3,
+                 redundant_distance: Optional[float] = None,
+                 instrumentation: Optional[Instrumentation] = None,
+                 lexical_index: Optional[BaseLexicalIndex] = None,
+                 lexical_fast_path: bool = True,
+                 quota: Optional[MemoryQuota] = None):
+        """
+        `instrumentation` receives per-stage timings (extract_facts, embed,
+        search, update_plan, db_write); defaults to the shared
+        `memory_lib.instrumentation.metrics`.
+
+        `redundant_distance` enables a pre-LLM gate. A fact whose closest
+        stored memory scores at or below this distance (scores are the store's
+        distance, lower = closer) is resolved as NONE without asking the model.
+        If every fact is resolved this way, the Step 3 plan call is skipped.
+        Lower values are stricter (fewer skips, more accuracy). None disables
+        the gate.
+
+        `lexical_index` turns on hybrid retrieval. The index is written
+        alongside the vector store, and `search` and Step 2 fuse keyword and
+        vector rankings with reciprocal rank fusion. In this mode the scores
+        they return are negated fusion scores (lower is still better), not
+        distances. With `lexical_fast_path`, a query whose top keyword hit
+        contains every query token is answered from the index alone, without
+        embedding. The redundancy gate always compares vector distances.
+
+        `quota` caps each user's hot memories. Memories returned by `search`
+        or shown to the planner count as hits, and after a write that
+        leaves a user over the cap, the lowest-scoring memories move to the
+        quota's cold store. When the quota promotes, each search first moves
+        strongly matching archived memories back into the vector store.
+        """
         if not isinstance(model, BaseModelProvider):
             raise TypeError("model must be an instance of BaseModelProvider")
         if not isinstance(vector_db, BaseVectorStore):
             raise TypeError("vector_db must be an instance of BaseVectorStore")
         if not isinstance(embedder, BaseEmbedder):
             raise TypeError("embedder must be an instance of BaseEmbedder")
+        if lexical_index is not None and not isinstance(lexical_index, BaseLexicalIndex):
+            raise TypeError("lexical_index must be an instance of BaseLexicalIndex")
+        if quota is not None and not isinstance(quota, MemoryQuota):
+            raise TypeError("quota must be an instance of MemoryQuota")
             
         self.model = model
         self.vector_db = vector_db
         self.embedder = embedder
         self.search_limit = search_limit
-        print("[VectorMemoryManager] Initialized successfully.")
+        self.redundant_distance = redundant_distance
+        self.instrumentation = instrumentation or metrics
+        self.lexical_index = lexical_index
+        self.lexical_fast_path = lexical_fast_path
+        self.lexical_fast_paths = 0
+        self.quota = quota
+        self.facts_checked = 0
+        self.facts_short_circuited = 0
+        self.plan_calls_avoided = 0
+        logger.info("[VectorMemoryManager] Initialized successfully.")
 
-    def _extract_facts(self, new_message: str) -> List[str]:
-        """Step 1: Use LLM to extract new facts from the message."""
-        print(f"[VectorMemoryManager] Step 1: Extracting facts from message...")
-        prompt = f"""
+    def _extract_facts(self, new_message: Union[str, List[str]]) -> List[str]:
+        """
+        Step 1: Use LLM to extract new facts from the message.
+        `new_message` may be a list of messages to be handled as one burst.
+        """
+        logger.debug("[VectorMemoryManager] Step 1: Extracting facts from message...")
+        if isinstance(new_message, str):
+            prompt = f"""
         You are an information extractor. Extract all key facts, statements, or
         preferences from the following user message.
         
         USER MESSAGE:
         "{new_message}"
         
+        Return ONLY a JSON object matching the FactExtractPlan schema.
+        """
+        else:
+            prompt = """
+        You are an information extractor. Extract all key facts, statements, or
+        preferences from the following user messages, sent in a row.
+        They are listed oldest first. If a later message corrects or contradicts
+        an earlier one, extract ONLY the later version of that fact.
+        
+        USER MESSAGES:
+        """
+            for i, msg in enumerate(new_message, 1):
+                prompt += f'{i}. "{msg}"\n'
+            prompt += """
         Return ONLY a JSON object matching the FactExtractPlan schema.
         """
         messages = [Message(role="system", content=prompt)]
         
         try:
-            response = self.model.get_structured_completion(messages, FactExtractPlan)
+            with self.instrumentation.span("extract_facts", self.model):
+                response = self.model.get_structured_completion(messages, FactExtractPlan)
             if isinstance(response, FactExtractPlan):
                 facts = [fact.fact for fact in response.facts]
-                print(f"[VectorMemoryManager] Extracted facts: {facts}")
+                logger.debug("[VectorMemoryManager] Extracted facts: %s", facts)
                 return facts
         except Exception as e:
-            print(f"[VectorMemoryManager] Error extracting facts: {e}")
+            logger.error("[VectorMemoryManager] Error extracting facts: %s", e)
             
         return [] # Return empty list on failure
 
-    def _search_relevant_memories(self, user_id: str, facts: List[str]) -> List[RetrievedMemory]:
-        """Step 2: Embed facts and search for relevant memories."""
-        print(f"[VectorMemoryManager] Step 2: Searching for relevant memories...")
+    def _search_per_fact(self, user_id: str, facts: List[str], dedupe: bool) -> List[List[RetrievedMemory]]:
+        """Embeds every fact in one batched call and searches them all at once."""
+        with self.instrumentation.span("embed", self.embedder):
+            embeddings = self.embedder.embed_texts(facts)
+        self._promote_from_cold(user_id, embeddings)
+        with self.instrumentation.span("search", self.vector_db):
+            return self.vector_db.search_many(user_id, embeddings, self.search_limit, dedupe=dedupe)
+
+    @staticmethod
+    def _merge_results(per_fact: List[List[RetrievedMemory]]) -> List[RetrievedMemory]:
+        """Flattens per-fact results, keeping each memory ID once at its best score."""
         all_retrieved: Dict[str, RetrievedMemory] = {}
-        
-        for fact in facts:
-            embedding = self.embedder.embed_text(fact)
-            results = self.vector_db.search(user_id, embedding, self.search_limit)
+        for results in per_fact:
             for res in results:
-                # Use a dict to automatically de-duplicate by memory ID
-                all_retrieved[res.id] = res
-                
-        retrieved_list = list(all_retrieved.values())
-        print(f"[VectorMemoryManager] Found {len(retrieved_list)} relevant memories.")
+                current = all_retrieved.get(res.id)
+                if current is None or res.score < current.score:
+                    all_retrieved[res.id] = res
+        return list(all_retrieved.values())
+
+    @staticmethod
+    def _fuse(rankings: List[List[RetrievedMemory]], limit: Optional[int] = None) -> List[RetrievedMemory]:
+        """
+        Reciprocal rank fusion of several best-first result lists. Each memory
+        appears once, scored by its negated fusion score so lower is better.
+        """
+        by_id: Dict[str, RetrievedMemory] = {}
+        for results in rankings:
+            for res in results:
+                by_id.setdefault(res.id, res)
+        scores = reciprocal_rank_scores([[res.id for res in results] for results in rankings])
+        ranked = sorted(scores, key=lambda mem_id: scores[mem_id], reverse=True)
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [by_id[mem_id].model_copy(update={"score": -scores[mem_id]}) for mem_id in ranked]
+
+    @staticmethod
+    def _lexical_confident(query: str, results: List[RetrievedMemory]) -> bool:
+        """True when the top keyword hit contains every token of the query."""
+        if not results:
+            return False
+        query_tokens = set(tokenize(query))
+        return bool(query_tokens) and query_tokens.issubset(tokenize(results[0].content, max_tokens=256))
+
+    def _lexical_search(self, user_id: str, queries: List[str], limit: int) -> List[List[RetrievedMemory]]:
+        with self.instrumentation.span("lexical_search", self.lexical_index):
+            return [self.lexical_index.search(user_id, query, limit) for query in queries]
+
+    def _search_relevant_memories(self, user_id: str, facts: List[str]) -> List[RetrievedMemory]:
+        """Step 2: Embed facts and search for relevant memories."""
+        logger.debug("[VectorMemoryManager] Step 2: Searching for relevant memories...")
+        if self.lexical_index is not None:
+            lexical = self._lexical_search(user_id, facts, self.search_limit)
+            if self.lexical_fast_path and all(self._lexical_confident(fact, hits) for fact, hits in zip(facts, lexical)):
+                self.lexical_fast_paths += 1
+                retrieved_list = self._fuse(lexical)
+            else:
+                promoted = self.quota.promoted if self.quota is not None else 0
+                per_fact = self._search_per_fact(user_id, facts, dedupe=False)
+                if self.quota is not None and self.quota.promoted != promoted:
+                    # Promoted memories were not in the index when it was first searched
+                    lexical = self._lexical_search(user_id, facts, self.search_limit)
+                retrieved_list = self._fuse(per_fact + lexical)
+            logger.debug("[VectorMemoryManager] Found %s relevant memories (hybrid).", len(retrieved_list))
+            return retrieved_list
+        # The store de-duplicates by memory ID, keeping each memory's best score.
+        retrieved_list = self._merge_results(self._search_per_fact(user_id, facts, dedupe=True))
+        logger.debug("[VectorMemoryManager] Found %s relevant memories.", len(retrieved_list))
         return retrieved_list
 
+    def _gate_redundant_facts(self, user_id: str, facts: List[str]):
+        """
+        Step 2 with the redundancy gate: searches, then drops facts whose best
+        match is within `redundant_distance`. Returns the remaining facts and
+        the memories relevant to them.
+        """
+        logger.debug("[VectorMemoryManager] Step 2: Searching for relevant memories (redundancy gate <= %s)...", self.redundant_distance)
+        per_fact = self._search_per_fact(user_id, facts, dedupe=False)
+        remaining_facts: List[str] = []
+        remaining_results: List[List[RetrievedMemory]] = []
+        for fact, results in zip(facts, per_fact):
+            if results and min(res.score for res in results) <= self.redundant_distance:
+                logger.debug("[VectorMemoryManager] Action: NONE for '%s' (already stored)", fact)
+                continue
+            remaining_facts.append(fact)
+            remaining_results.append(results)
+
+        self.facts_checked += len(facts)
+        self.facts_short_circuited += len(facts) - len(remaining_facts)
+        retrieved_list = self._merge_results(remaining_results)
+        logger.debug("[VectorMemoryManager] %s/%s facts need a plan; found %s relevant memories.", len(remaining_facts), len(facts), len(retrieved_list))
+        return remaining_facts, retrieved_list
+
+    def gate_stats(self) -> Dict[str, int]:
+        """Counters for the redundancy gate."""
+        return {
+            "facts_checked": self.facts_checked,
+            "facts_short_circuited": self.facts_short_circuited,
+            "plan_calls_avoided": self.plan_calls_avoided,
+        }
+
     def _get_memory_update_plan(self, new_facts: List[str], old_memories: List[RetrievedMemory]) -> VectorMemoryUpdatePlan:
         """Step 3: Ask LLM to merge new facts and old memories into a plan."""
-        print(f"[VectorMemoryManager] Step 3: Generating memory update plan...")
+        logger.debug("[VectorMemoryManager] Step 3: Generating memory update plan...")
         
         # --- [FIX 1] --- Updated Prompt ---
         prompt = """
@@ -122,71 +274,125 @@ class VectorMemoryManager:
         messages = [Message(role="system", content=prompt)]
         
         try:
-            response = self.model.get_structured_completion(messages, VectorMemoryUpdatePlan)
+            with self.instrumentation.span("update_plan", self.model):
+                response = self.model.get_structured_completion(messages, VectorMemoryUpdatePlan)
             if isinstance(response, VectorMemoryUpdatePlan):
-                print(f"[VectorMemoryManager] Plan received: {response.model_dump_json(indent=2)}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("[VectorMemoryManager] Plan received: %s", response.model_dump_json(indent=2))
                 return response
         except Exception as e:
-            print(f"[VectorMemoryManager] Error getting update plan: {e}")
+            logger.error("[VectorMemoryManager] Error getting update plan: %s", e)
             
         return VectorMemoryUpdatePlan(plan=[]) # Return empty plan on failure
 
     def _execute_plan(self, user_id: str, plan: VectorMemoryUpdatePlan):
         """Step 4: Execute the ADD, UPDATE, or DELETE actions."""
-        print(f"[VectorMemoryManager] Step 4: Executing {len(plan.plan)} actions...")
+        logger.debug("[VectorMemoryManager] Step 4: Executing %s actions...", len(plan.plan))
+        # Collect the plan's writes and flush them in one batch.
+        # Later actions on the same id win over earlier ones.
+        pending_upserts: Dict[str, VectorMemory] = {}
+        pending_deletes: Dict[str, None] = {}
+
         for action in plan.plan:
-            try:
-                if action.action == "ADD":
-                    # --- [FIX 2] --- Fallback Logic ---
-                    # If AI provides null content, fall back to the original fact.
-                    content_to_add = action.content or action.original_fact 
-                    if not content_to_add:
-                        print(f"[MemoryManager] Skipping ADD: No content or original_fact for '{action.original_fact}'")
-                        continue
-                    # --- [END FIX 2] ---
-                        
-                    new_mem = VectorMemory(user_id=user_id, content=content_to_add)
-                    embedding = self.embedder.embed_text(new_mem.content)
-                    self.vector_db.upsert(new_mem, embedding)
-                
-                elif action.action == "UPDATE":
-                    if not action.id or not action.content:
-                        print(f"[MemoryManager] Skipping UPDATE: Missing ID or content for '{action.original_fact}'")
-                        continue
+            if action.action == "ADD":
+                # --- [FIX 2] --- Fallback Logic ---
+                # If AI provides null content, fall back to the original fact.
+                content_to_add = action.content or action.original_fact 
+                if not content_to_add:
+                    logger.warning("[MemoryManager] Skipping ADD: No content or original_fact for '%s'", action.original_fact)
+                    continue
+                # --- [END FIX 2] ---
                     
-                    updated_mem = VectorMemory(
-                        id=action.id, 
-                        user_id=user_id, 
-                        content=action.content, 
-                        updated_at=datetime.now()
-                    )
-                    embedding = self.embedder.embed_text(updated_mem.content)
-                    self.vector_db.upsert(updated_mem, embedding)
-                
-                elif action.action == "DELETE":
-                    if not action.id:
-                        print(f"[MemoryManager] Skipping DELETE: Missing ID for '{action.original_fact}'")
-                        continue
-                    self.vector_db.delete(action.id)
+                new_mem = VectorMemory(user_id=user_id, content=content_to_add)
+                pending_upserts[new_mem.id] = new_mem
+            
+            elif action.action == "UPDATE":
+                if not action.id or not action.content:
+                    logger.warning("[MemoryManager] Skipping UPDATE: Missing ID or content for '%s'", action.original_fact)
+                    continue
                 
-                elif action.action == "NONE":
-                    print(f"[VectorMemoryManager] Action: NONE for '{action.original_fact}'")
-                    
+                pending_upserts[action.id] = VectorMemory(
+                    id=action.id, 
+                    user_id=user_id, 
+                    content=action.content, 
+                    updated_at=datetime.now()
+                )
+                pending_deletes.pop(action.id, None)
+            
+            elif action.action == "DELETE":
+                if not action.id:
+                    logger.warning("[MemoryManager] Skipping DELETE: Missing ID for '%s'", action.original_fact)
+                    continue
+                pending_deletes[action.id] = None
+                pending_upserts.pop(action.id, None)
+            
+            elif action.action == "NONE":
+                logger.debug("[VectorMemoryManager] Action: NONE for '%s'", action.original_fact)
+
+        if pending_upserts:
+            memories = list(pending_upserts.values())
+            try:
+                # Embed all ADD/UPDATE contents in a single batched call
+                with self.instrumentation.span("embed", self.embedder):
+                    embeddings = self.embedder.embed_texts([mem.content for mem in memories])
+                with self.instrumentation.span("db_write", self.vector_db):
+                    self.vector_db.upsert_many(memories, embeddings)
+                if self.lexical_index is not None:
+                    with self.instrumentation.span("db_write", self.lexical_index):
+                        self.lexical_index.upsert_many(memories)
+            except Exception as e:
+                logger.error("[VectorMemoryManager] Error upserting %s memories: %s", len(memories), e)
+
+        if pending_deletes:
+            try:
+                with self.instrumentation.span("db_write", self.vector_db):
+                    self.vector_db.delete_many(list(pending_deletes), user_id)
+                if self.lexical_index is not None:
+                    with self.instrumentation.span("db_write", self.lexical_index):
+                        self.lexical_index.delete_many(list(pending_deletes))
+                if self.quota is not None:
+                    self.quota.forget(user_id, list(pending_deletes))
             except Exception as e:
-                print(f"[VectorMemoryManager] Error executing action {action.action}: {e}")
+                logger.error("[VectorMemoryManager] Error deleting %s memories: %s", len(pending_deletes), e)
+
+        # After the deletes, so the cap sees the room this plan freed
+        if pending_upserts:
+            self._enforce_quota(user_id)
 
     def process_message(self, user_id: str, new_message: str):
         """
         Processes a new message using the full vector memory pipeline.
         """
-        # Step 1: Extract facts from the new message
+        self._process(user_id, new_message)
+
+    def process_messages(self, user_id: str, new_messages: List[str]):
+        """
+        Processes a burst of messages from one user with one fact extraction
+        and one update plan. Messages are given oldest first; later ones take
+        precedence.
+        """
+        if not new_messages:
+            return
+        self._process(user_id, new_messages[0] if len(new_messages) == 1 else list(new_messages))
+
+    def _process(self, user_id: str, new_message: Union[str, List[str]]):
+        # Step 1: Extract facts from the new message(s)
         new_facts = self._extract_facts(new_message)
         if not new_facts:
-            print("[VectorMemoryManager] No facts extracted. Nothing to do.")
+            logger.debug("[VectorMemoryManager] No facts extracted. Nothing to do.")
             return
 
         # Step 2: Search for relevant memories
-        relevant_memories = self._search_relevant_memories(user_id, new_facts)
+        if self.redundant_distance is None:
+            relevant_memories = self._search_relevant_memories(user_id, new_facts)
+        else:
+            new_facts, relevant_memories = self._gate_redundant_facts(user_id, new_facts)
+            if not new_facts:
+                self.plan_calls_avoided += 1
+                logger.debug("[VectorMemoryManager] All facts already stored. Skipping plan.")
+                return
+        if self.quota is not None:
+            self.quota.record_hits(user_id, [mem.id for mem in relevant_memories])
         
         # Step 3: Get an update plan from the LLM
         update_plan = self._get_memory_update_plan(new_facts, relevant_memories)
@@ -195,7 +401,118 @@ class VectorMemoryManager:
         self._execute_plan(user_id, update_plan)
 
     def search(self, user_id: str, query: str, limit: int = 5) -> List[RetrievedMemory]:
-        """Directly search the vector memory for a user."""
-        print(f"[VectorMemoryManager] Performing direct search for user '{user_id}'...")
-        embedding = self.embedder.embed_text(query)
-        return self.vector_db.search(user_id, embedding, limit)
\ No newline at end of file
+        """Directly search the vector memory for a user (hybrid if a lexical index is set)."""
+        logger.debug("[VectorMemoryManager] Performing direct search for user '%s'...", user_id)
+        lexical = None
+        if self.lexical_index is not None:
+            lexical = self._lexical_search(user_id, [query], limit)[0]
+            if self.lexical_fast_path and self._lexical_confident(query, lexical):
+                self.lexical_fast_paths += 1
+                results = self._fuse([lexical], limit)
+                if self.quota is not None:
+                    self.quota.record_hits(user_id, [res.id for res in results])
+                return results
+        with self.instrumentation.span("embed", self.embedder):
+            embedding = self.embedder.embed_text(query)
+        if self._promote_from_cold(user_id, [embedding]) and lexical is not None:
+            lexical = self._lexical_search(user_id, [query], limit)[0]
+        with self.instrumentation.span("search", self.vector_db):
+            results = self.vector_db.search(user_id, embedding, limit)
+        if lexical is not None:
+            results = self._fuse([results, lexical], limit)
+        if self.quota is not None:
+            self.quota.record_hits(user_id, [res.id for res in results])
+        return results
+
+    def rebuild_lexical_index(self, user_id: str):
+        """Re-indexes a user's stored memories, e.g. after enabling hybrid search on existing data."""
+        if self.lexical_index is None:
+            raise ValueError("No lexical_index configured")
+        memories = self.vector_db.get_all_memories(user_id)
+        self.lexical_index.delete_user(user_id)
+        self.lexical_index.upsert_many(memories)
+        logger.info("[VectorMemoryManager] Re-indexed %s memories for user '%s'", len(memories), user_id)
+
+    # --- quota ---
+
+    def _enforce_quota(self, user_id: str, protected: Optional[Set[str]] = None):
+        """Moves the user's lowest-scoring memories, other than `protected`, to the cold tier once they exceed the cap."""
+        if self.quota is None:
+            return
+        # Most writes leave the user under the cap; only then read every row
+        if self.vector_db.count_memories(user_id) <= self.quota.max_memories:
+            return
+        memories, vectors = self._memories_with_vectors(user_id)
+        victims = self.quota.select_evictions(user_id, memories, [mem.id for mem in memories], protected)
+        if not victims:
+            return
+        evicted = [memories[i] for i in victims]
+        evicted_ids = [mem.id for mem in evicted]
+        try:
+            with self.instrumentation.span("evict", self.vector_db):
+                self.quota.archive(user_id, evicted, evicted_ids, [vectors[i] for i in victims] if vectors else None)
+                self.vector_db.delete_many(evicted_ids, user_id)
+            if self.lexical_index is not None:
+                with self.instrumentation.span("evict", self.lexical_index):
+                    self.lexical_index.delete_many(evicted_ids)
+            logger.debug("[VectorMemoryManager] Evicted %s memories of %s to the cold tier", len(evicted_ids), user_id)
+        except Exception as e:
+            logger.error("[VectorMemoryManager] Error evicting %s memories: %s", len(evicted_ids), e)
+
+    def _memories_with_vectors(self, user_id: str):
+        """
+        All of a user's memories in one scan, plus their stored vectors when a
+        cold store will keep them (so a promotion never re-embeds).
+        """
+        if self.quota.cold_store is not None:
+            try:
+                memories, vectors = [], []
+                for page in self.vector_db.iter_memories(user_id, include_embeddings=True):
+                    memories.extend(page.memories)
+                    vectors.extend(page.embeddings)
+                return memories, vectors
+            except NotImplementedError:
+                logger.warning("[VectorMemoryManager] Store cannot export embeddings; archiving without vectors")
+        return self.vector_db.get_all_memories(user_id), None
+
+    def _promote_from_cold(self, user_id: str, embeddings: List[List[float]]) -> int:
+        """Moves archived memories that strongly match any query back into the vector store."""
+        if self.quota is None or self.quota.promote_similarity is None:
+            return 0
+        with self.instrumentation.span("cold_search", self.quota.cold_store):
+            memory_ids = self.quota.promotion_candidates(user_id, embeddings, self.search_limit)
+        return self.restore(user_id, memory_ids) if memory_ids else 0
+
+    def restore(self, user_id: str, memory_ids: List[str]) -> int:
+        """
+        Moves archived memories back into the vector store (and lexical
+        index), reusing their archived vectors. Returns how many were restored.
+        """
+        if self.quota is None or self.quota.cold_store is None:
+            raise ValueError("No cold tier configured")
+        taken = self.quota.cold_store.take(user_id, memory_ids, kind="vector")
+        if not taken:
+            return 0
+        memories = [mem for mem, _ in taken]
+        missing = [i for i, (_, vector) in enumerate(taken) if vector is None]
+        vectors = [vector for _, vector in taken]
+        try:
+            if missing:
+                with self.instrumentation.span("embed", self.embedder):
+                    for i, vector in zip(missing, self.embedder.embed_texts([memories[i].content for i in missing])):
+                        vectors[i] = vector
+            with self.instrumentation.span("db_write", self.vector_db):
+                self.vector_db.upsert_many(memories, [list(map(float, vector)) for vector in vectors])
+            if self.lexical_index is not None:
+                with self.instrumentation.span("db_write", self.lexical_index):
+                    self.lexical_index.upsert_many(memories)
+        except Exception as e:
+            # Put them back so nothing is lost
+            self.quota.cold_store.archive(memories, [vector for _, vector in taken])
+            logger.error("[VectorMemoryManager] Error restoring %s memories: %s", len(memories), e)
+            return 0
+        self.quota.promoted += len(memories)
+        self.quota.record_hits(user_id, [mem.id for mem in memories])
+        # The restored memories still carry their old scores; evict others instead
+        self._enforce_quota(user_id, protected={mem.id for mem in memories})
+        return len(memories)
@@ -1,5 +1,28 @@
-from .sqlite_provider import SqliteProvider
-from .postgres_provider import PostgresProvider
-from .chroma_provider import ChromaProvider
+# Providers are imported on first attribute access, so `from memory_lib.db import
+# SqliteProvider` does not pull in chromadb, psycopg2 or numpy.
+import importlib
 
-__all__ = ["SqliteProvider", "PostgresProvider", "ChromaProvider"]
\ No newline at end of file
+_EXPORTS = {
+    "SqliteProvider": ".sqlite_provider",
+    "PostgresProvider": ".postgres_provider",
+    "ChromaProvider": ".chroma_provider",
+    "NumpyVectorStore": ".numpy_provider",
+    "QuantizedVectorStore": ".quantized_provider",
+    "IVFVectorStore": ".ivf_provider",
+    "ShardedVectorStore": ".sharded_provider",
+    "SqliteLexicalIndex": ".lexical_provider",
+    "SqliteColdStore": ".cold_provider",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,86 +1,183 @@
-import chromadb
-from typing import List, Dict, Any
+import logging
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional
 from ..interfaces import BaseVectorStore
-from ..schemas import VectorMemory, RetrievedMemory
+from ..schemas import VectorMemory, RetrievedMemory, MemoryPage, SearchResult
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 class ChromaProvider(BaseVectorStore):
     """A concrete implementation of BaseVectorStore using ChromaDB."""
     
     def __init__(self, path: str = "./chroma_db", collection_name: str = "agent_memory"):
+        import chromadb # Imported here: chromadb is slow to import and only needed once a provider exists
+        self.path = path
+        self.collection_name = collection_name
         self.client = chromadb.PersistentClient(path=path)
         self.collection = self.client.get_or_create_collection(name=collection_name)
-        print(f"[ChromaProvider] Connected to collection '{collection_name}' at path: {path}")
+        logger.info("[ChromaProvider] Connected to collection '%s' at path: %s", collection_name, path)
 
     # --- NEW FUNCTION ---
     def get_all_memories(self, user_id: str) -> List[VectorMemory]:
         """Gets all memories for a user, without embeddings."""
         results = self.collection.get(where={"user_id": user_id})
         
-        memories = []
         ids = results.get('ids', [])
         metadatas = results.get('metadatas', [])
-        
-        for i in range(len(ids)):
-            meta = metadatas[i]
-            memories.append(VectorMemory(
-                id=ids[i],
-                user_id=meta.get('user_id', user_id),
-                content=meta.get('content', ''),
-                created_at=datetime.fromisoformat(meta.get('created_at')),
-                updated_at=datetime.fromisoformat(meta.get('updated_at')),
-            ))
-        return memories
+        return [self._from_payload(mem_id, meta, user_id) for mem_id, meta in zip(ids, metadatas)]
     # --- END NEW FUNCTION ---
 
+    def list_user_ids(self) -> List[str]:
+        """Collects user ids by paging through metadata; Chroma has no DISTINCT."""
+        users = set()
+        offset = 0
+        while True:
+            metadatas = self.collection.get(limit=5000, offset=offset, include=["metadatas"]).get('metadatas') or []
+            users.update(meta['user_id'] for meta in metadatas if meta.get('user_id'))
+            if len(metadatas) < 5000:
+                return sorted(users)
+            offset += len(metadatas)
+
+    def count_memories(self, user_id: str) -> int:
+        """Counts ids only; no metadata is fetched."""
+        return len(self.collection.get(where={"user_id": user_id}, include=[]).get('ids') or [])
+
+    def iter_memories(self, user_id: str, batch_size: int = 500,
+                      after: Optional[str] = None,
+                      include_embeddings: bool = False) -> Iterator[MemoryPage]:
+        """Pages through a user's memories with Chroma's limit/offset."""
+        offset = int(after) if after is not None else 0
+        include = ["metadatas", "embeddings"] if include_embeddings else ["metadatas"]
+        while True:
+            results = self.collection.get(
+                where={"user_id": user_id}, limit=batch_size, offset=offset, include=include
+            )
+            ids = results.get('ids', [])
+            if not ids:
+                return
+            batch = [self._from_payload(mem_id, meta, user_id)
+                     for mem_id, meta in zip(ids, results.get('metadatas', []))]
+            embeddings = None
+            if include_embeddings:
+                embeddings = np.asarray(results['embeddings'], dtype=np.float32).reshape(len(ids), -1)
+            offset += len(batch)
+            yield MemoryPage(memories=batch, cursor=str(offset), embeddings=embeddings)
+            if len(batch) < batch_size:
+                return
+
     def search(self, user_id: str, embedding: List[float], limit: int) -> List[RetrievedMemory]:
         """Search for similar memories for a user."""
+        return self.search_many(user_id, [embedding], limit)[0]
+
+    def search_many(self, user_id: str, embeddings: List[List[float]], limit: int,
+                    dedupe: bool = False) -> List[List[RetrievedMemory]]:
+        """Runs all queries for a user in a single collection.query call."""
+        if not embeddings:
+            return []
         where_filter = {"user_id": user_id}
 
         results = self.collection.query(
-            query_embeddings=[embedding],
+            query_embeddings=embeddings,
             n_results=limit,
             where=where_filter
         )
         
-        retrieved_memories = []
-        ids = results.get('ids', [[]])[0]
-        distances = results.get('distances', [[]])[0]
-        metadatas = results.get('metadatas', [[]])[0]
-        
-        for i in range(len(ids)):
-            retrieved_memories.append(
-                RetrievedMemory(
-                    id=ids[i],
-                    score=distances[i],
-                    content=metadatas[i].get('content', ''),
-                    user_id=metadatas[i].get('user_id', '')
+        all_ids = results.get('ids') or [[] for _ in embeddings]
+        all_distances = results.get('distances') or [[] for _ in embeddings]
+        all_metadatas = results.get('metadatas') or [[] for _ in embeddings]
+
+        per_query = []
+        for ids, distances, metadatas in zip(all_ids, all_distances, all_metadatas):
+            retrieved_memories = []
+            for i in range(len(ids)):
+                retrieved_memories.append(
+                    RetrievedMemory(
+                        id=ids[i],
+                        score=distances[i],
+                        content=metadatas[i].get('content', ''),
+                        user_id=metadatas[i].get('user_id', '')
+                    )
                 )
-            )
-        return retrieved_memories
+            per_query.append(retrieved_memories)
+        return self._dedupe_results(per_query) if dedupe else per_query
 
-    def upsert(self, memory: VectorMemory, embedding: List[float]):
-        """Create or update a memory in the vector store."""
-        print(f"[ChromaProvider] UPSERT Memory: {memory.id}")
-        
-        payload = {
+    def search_columns(self, user_id: str, embedding: List[float], limit: int) -> SearchResult:
+        """Top hits as columns, read straight from the query response."""
+        results = self.collection.query(
+            query_embeddings=[embedding],
+            n_results=limit,
+            where={"user_id": user_id},
+            include=["metadatas", "distances"]
+        )
+        ids = (results.get('ids') or [[]])[0]
+        distances = (results.get('distances') or [[]])[0]
+        metadatas = (results.get('metadatas') or [[]])[0]
+        return SearchResult(user_id, list(ids), [float(distance) for distance in distances],
+                            [meta.get('content', '') for meta in metadatas])
+
+    @staticmethod
+    def _to_payload(memory: VectorMemory) -> Dict[str, Any]:
+        return {
             "user_id": memory.user_id,
             "content": memory.content,
             "created_at": memory.created_at.isoformat(),
             "updated_at": memory.updated_at.isoformat(),
             **memory.metadata
         }
-        
+
+    @staticmethod
+    def _from_payload(mem_id: str, meta: Dict[str, Any], user_id: str) -> VectorMemory:
+        extra = {key: value for key, value in meta.items()
+                 if key not in ("user_id", "content", "created_at", "updated_at")}
+        return VectorMemory(
+            id=mem_id,
+            user_id=meta.get('user_id', user_id),
+            content=meta.get('content', ''),
+            created_at=datetime.fromisoformat(meta.get('created_at')),
+            updated_at=datetime.fromisoformat(meta.get('updated_at')),
+            metadata=extra,
+        )
+
+    def upsert(self, memory: VectorMemory, embedding: List[float]):
+        """Create or update a memory in the vector store."""
+        logger.debug("[ChromaProvider] UPSERT Memory: %s", memory.id)
         self.collection.upsert(
             ids=[memory.id],
             embeddings=[embedding],
-            metadatas=[payload]
+            metadatas=[self._to_payload(memory)]
+        )
+
+    def upsert_many(self, memories: List[VectorMemory], embeddings: List[List[float]]):
+        """Create or update many memories with a single collection.upsert call."""
+        logger.debug("[ChromaProvider] UPSERT %s memories", len(memories))
+        # Chroma rejects duplicate ids within one call, so keep the last write per id
+        batch: Dict[str, tuple] = {}
+        for memory, embedding in zip(memories, embeddings):
+            batch[memory.id] = (embedding, self._to_payload(memory))
+        if not batch:
+            return
+        self.collection.upsert(
+            ids=list(batch.keys()),
+            embeddings=[embedding for embedding, _ in batch.values()],
+            metadatas=[payload for _, payload in batch.values()]
         )
 
     def delete(self, memory_id: str):
         """Delete a memory by its ID."""
-        print(f"[ChromaProvider] DELETE Memory: {memory_id}")
+        logger.debug("[ChromaProvider] DELETE Memory: %s", memory_id)
         try:
             self.collection.delete(ids=[memory_id])
         except Exception as e:
-            print(f"[ChromaProvider] Error deleting {memory_id}: {e}. May not exist.")
\ No newline at end of file
+            logger.warning("[ChromaProvider] Error deleting %s: %s. May not exist.", memory_id, e)
+
+    def delete_many(self, memory_ids: List[str], user_id: Optional[str] = None):
+        """Delete many memories with a single collection.delete call, limited to `user_id` if given."""
+        logger.debug("[ChromaProvider] DELETE %s memories", len(memory_ids))
+        ids = list(dict.fromkeys(memory_ids))
+        if not ids:
+            return
+        try:
+            self.collection.delete(ids=ids, where={"user_id": user_id} if user_id is not None else None)
+        except Exception as e:
+            logger.warning("[ChromaProvider] Error deleting %s memories: %s. Some may not exist.", len(ids), e)
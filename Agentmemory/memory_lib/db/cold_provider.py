@@ -0,0 +1,171 @@
+import logging
+import sqlite3
+import threading
+import zlib
+import numpy as np
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+from ..schemas import UserMemory, VectorMemory
+
+logger = logging.getLogger(__name__)
+
+Memory = Union[UserMemory, VectorMemory]
+
+# Ids per IN (...) query, under SQLite's default variable limit
+_BATCH = 500
+
+class SqliteColdStore:
+    """
+    A compressed SQLite archive for memories evicted from the hot store.
+
+    Each row keeps the memory as zlib-compressed JSON. Vector memories also
+    keep their embedding as zlib-compressed float16 (about 2x smaller than
+    float32, close enough to decide on promotion). `search_many` scans a
+    user's archived vectors. Decoded vectors are cached for the
+    `cache_users` most recently searched users, so probing the archive on
+    every hot search stays cheap.
+    """
+    def __init__(self, db_path: str = ":memory:", cache_users: int = 32):
+        self.db_path = db_path
+        self.cache_users = cache_users
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        # user_id -> (memory ids, normalized float32 vectors)
+        self._cache: "OrderedDict[str, Tuple[List[str], np.ndarray]]" = OrderedDict()
+        self._create_table()
+        logger.info("[SqliteColdStore] Connected to DB: %s", db_path)
+
+    def _create_table(self):
+        with self.conn:
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS cold_memories (
+                memory_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                vector BLOB,
+                archived_at TEXT NOT NULL
+            )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_cold_user ON cold_memories (user_id)")
+
+    @staticmethod
+    def _decode(kind: str, payload: bytes) -> Memory:
+        model = VectorMemory if kind == "vector" else UserMemory
+        return model.model_validate_json(zlib.decompress(payload))
+
+    def archive(self, memories: List[Memory], embeddings: Optional[List[List[float]]] = None):
+        """Stores memories (and their embeddings, for vector memories) in one transaction."""
+        if not memories:
+            return
+        now = datetime.now().isoformat()
+        rows = []
+        for i, memory in enumerate(memories):
+            kind = "vector" if isinstance(memory, VectorMemory) else "db"
+            memory_id = memory.id if kind == "vector" else memory.memory_id
+            vector = None
+            if embeddings is not None and embeddings[i] is not None:
+                vector = zlib.compress(np.asarray(embeddings[i], dtype=np.float16).tobytes())
+            rows.append((memory_id, memory.user_id, kind, zlib.compress(memory.model_dump_json().encode("utf-8")), vector, now))
+        with self._lock, self.conn:
+            self.conn.executemany("""
+                INSERT INTO cold_memories (memory_id, user_id, kind, payload, vector, archived_at) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(memory_id) DO UPDATE SET user_id = excluded.user_id, kind = excluded.kind,
+                    payload = excluded.payload, vector = excluded.vector, archived_at = excluded.archived_at
+                """, rows)
+            for user_id in {memory.user_id for memory in memories}:
+                self._cache.pop(user_id, None)
+
+    def get_memories(self, user_id: str) -> List[Memory]:
+        """Every archived memory of a user, oldest archive first."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT kind, payload FROM cold_memories WHERE user_id = ? ORDER BY archived_at, memory_id", (user_id,)
+            ).fetchall()
+        return [self._decode(kind, payload) for kind, payload in rows]
+
+    def take(self, user_id: str, memory_ids: List[str], kind: str) -> List[Tuple[Memory, Optional[np.ndarray]]]:
+        """
+        Removes a user's archived memories of `kind` ("vector" or "db") and
+        returns them with their embeddings (float32, or None). Ids that belong
+        to another user or kind are left in the archive.
+        """
+        if kind not in ("vector", "db"):
+            raise ValueError("kind must be 'vector' or 'db'")
+        taken = []
+        with self._lock, self.conn:
+            for start in range(0, len(memory_ids), _BATCH):
+                chunk = memory_ids[start:start + _BATCH]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT memory_id, payload, vector FROM cold_memories "
+                    f"WHERE memory_id IN ({placeholders}) AND user_id = ? AND kind = ?",
+                    (*chunk, user_id, kind)
+                ).fetchall()
+                for _, payload, vector in rows:
+                    if vector is not None:
+                        vector = np.frombuffer(zlib.decompress(vector), dtype=np.float16).astype(np.float32)
+                    taken.append((self._decode(kind, payload), vector))
+                self.conn.executemany("DELETE FROM cold_memories WHERE memory_id = ?", [(row[0],) for row in rows])
+            if taken:
+                self._cache.pop(user_id, None)
+        return taken
+
+    def _user_vectors(self, user_id: str) -> Tuple[List[str], np.ndarray]:
+        cached = self._cache.get(user_id)
+        if cached is not None:
+            self._cache.move_to_end(user_id)
+            return cached
+        rows = self.conn.execute(
+            "SELECT memory_id, vector FROM cold_memories WHERE user_id = ? AND vector IS NOT NULL", (user_id,)
+        ).fetchall()
+        ids = [memory_id for memory_id, _ in rows]
+        if rows:
+            vectors = np.stack([np.frombuffer(zlib.decompress(vector), dtype=np.float16) for _, vector in rows]).astype(np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.where(norms > 0, norms, 1.0)
+        else:
+            vectors = np.empty((0, 0), dtype=np.float32)
+        self._cache[user_id] = (ids, vectors)
+        while len(self._cache) > self.cache_users:
+            self._cache.popitem(last=False)
+        return ids, vectors
+
+    def search_many(self, user_id: str, embeddings: List[List[float]], limit: int) -> List[List[Tuple[str, float]]]:
+        """Per query, the best (memory_id, cosine similarity) pairs among a user's archived vectors."""
+        with self._lock:
+            ids, vectors = self._user_vectors(user_id)
+        if not ids or not embeddings:
+            return [[] for _ in embeddings]
+        queries = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        sims = (queries / np.where(norms > 0, norms, 1.0)) @ vectors.T
+        k = min(limit, len(ids))
+        results = []
+        for row in sims:
+            best = np.argsort(-row, kind="stable")[:k]
+            results.append([(ids[i], float(row[i])) for i in best])
+        return results
+
+    def count(self, user_id: Optional[str] = None) -> int:
+        with self._lock:
+            if user_id is None:
+                return self.conn.execute("SELECT COUNT(*) FROM cold_memories").fetchone()[0]
+            return self.conn.execute("SELECT COUNT(*) FROM cold_memories WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+    def delete_user(self, user_id: str):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM cold_memories WHERE user_id = ?", (user_id,))
+            self._cache.pop(user_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Archived rows and their stored (compressed) bytes."""
+        with self._lock:
+            rows, stored = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(payload) + COALESCE(LENGTH(vector), 0)), 0) FROM cold_memories"
+            ).fetchone()
+        return {"rows": rows, "stored_bytes": stored}
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,284 @@
+import logging
+import json
+import math
+import os
+import numpy as np
+from typing import Any, Dict, List, Optional
+from .numpy_provider import NumpyVectorStore, _UserShard, _atomic_save
+from ..schemas import RetrievedMemory
+
+logger = logging.getLogger(__name__)
+
+# Rows assigned to centroids per matrix product while (re)building the index
+_ASSIGN_BLOCK = 8192
+# Rows written since the lists were grouped, past which they are regrouped
+_MIN_UNLISTED = 1024
+
+class _IVFShard(_UserShard):
+    """
+    A user shard with an inverted-file (IVF) index over its float32 rows.
+
+    Rows are clustered with spherical k-means and each row records its
+    nearest centroid in `assign`. Rows are grouped by list (CSR: row numbers
+    sorted by list, plus per-list offsets), so a search scores the centroids
+    and then gathers and scores exactly only the rows of the `nprobe` closest
+    lists. New rows are assigned to their nearest existing centroid and kept
+    aside until enough pile up to regroup, and deletes reuse the tombstones,
+    so writes never rebuild the index. The clustering is re-fit
+    only after the shard has grown `retrain_growth` times since the last fit.
+    Below `exact_threshold` live rows the shard is not indexed and searches
+    are exact.
+    """
+    def __init__(self, dim: int, nlist: Optional[int], exact_threshold: int, retrain_growth: float,
+                 vectors: Optional[np.ndarray] = None, ids: Optional[List[str]] = None,
+                 records: Optional[List[Dict[str, Any]]] = None,
+                 centroids: Optional[np.ndarray] = None, assign: Optional[np.ndarray] = None,
+                 trained_size: int = 0):
+        super().__init__(dim, vectors, ids, records)
+        self.nlist = nlist
+        self.exact_threshold = exact_threshold
+        self.retrain_growth = retrain_growth
+        self.centroids = centroids
+        self.assign = assign if assign is not None else np.zeros(self.capacity, dtype=np.int32)
+        self.trained_size = trained_size
+        # CSR grouping of rows by list, built on first search
+        self.list_rows: Optional[np.ndarray] = None
+        self.list_offsets: Optional[np.ndarray] = None
+        self.unlisted: List[int] = []
+        # Set when a search trains the index, which no write marks for flushing
+        self.index_unsaved = False
+
+    @property
+    def indexed(self) -> bool:
+        return self.centroids is not None
+
+    # --- index maintenance ---
+
+    def _nearest_centroid(self, vectors: np.ndarray) -> np.ndarray:
+        out = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], _ASSIGN_BLOCK):
+            block = np.asarray(vectors[start:start + _ASSIGN_BLOCK], dtype=np.float32)
+            out[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        return out
+
+    def train(self, iterations: int = 8, seed: int = 0):
+        """Fits spherical k-means on a sample of live rows and re-assigns every row."""
+        live = np.flatnonzero(self.alive[:self.size])
+        nlist = self.nlist or max(16, int(math.sqrt(len(live))))
+        nlist = min(nlist, len(live))
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(live, size=min(len(live), nlist * 32), replace=False))
+        sample = np.asarray(self.vectors[sample_rows], dtype=np.float32)
+
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            empty = counts == 0
+            # Re-seed empty clusters from random sample rows
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.where(norms > 0, norms, 1.0)
+
+        self.centroids = centroids.astype(np.float32)
+        self.assign = np.zeros(self.capacity, dtype=np.int32)
+        self.assign[:self.size] = self._nearest_centroid(self.vectors[:self.size])
+        self.trained_size = self.count
+        self.list_rows = None
+        logger.debug("[IVFVectorStore] Trained %s lists over %s rows", nlist, self.count)
+
+    def _group_lists(self):
+        """Rebuilds the CSR grouping: the rows of list i are list_rows[list_offsets[i]:list_offsets[i + 1]]."""
+        assign = self.assign[:self.size]
+        counts = np.bincount(assign, minlength=self.centroids.shape[0])
+        self.list_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.list_offsets[1:])
+        self.list_rows = np.argsort(assign, kind="stable")
+        self.unlisted = []
+
+    def _probed_rows(self, probes: np.ndarray) -> np.ndarray:
+        """Sorted live rows currently assigned to one of `probes`."""
+        parts = [self.list_rows[self.list_offsets[p]:self.list_offsets[p + 1]] for p in probes]
+        if self.unlisted:
+            parts.append(np.asarray(self.unlisted, dtype=np.int64))
+        rows = np.unique(np.concatenate(parts))
+        # Grouped rows may since have been deleted or rewritten into another list
+        in_probes = np.zeros(self.centroids.shape[0], dtype=bool)
+        in_probes[probes] = True
+        return rows[self.alive[rows] & in_probes[self.assign[rows]]]
+
+    def maybe_train(self):
+        if not self.indexed:
+            if self.count >= self.exact_threshold:
+                self.train()
+        elif self.count > self.trained_size * self.retrain_growth:
+            self.train()
+
+    # --- vector storage ---
+
+    def _resize(self, capacity: int):
+        super()._resize(capacity)
+        assign = np.zeros(capacity, dtype=np.int32)
+        assign[:self.size] = self.assign[:self.size]
+        self.assign = assign
+
+    def _write_row(self, row: int, vector: np.ndarray):
+        super()._write_row(row, vector)
+        if self.indexed:
+            self.assign[row] = int(np.argmax(self.centroids @ vector))
+            if self.list_rows is not None:
+                self.unlisted.append(row)
+
+    def _take(self, keep: np.ndarray):
+        super()._take(keep)
+        self.assign = np.ascontiguousarray(self.assign[keep])
+        # Row numbers changed
+        self.list_rows = None
+
+    def save_vectors(self, shard_dir: str):
+        super().save_vectors(shard_dir)
+        self.index_unsaved = False
+        if self.indexed:
+            _atomic_save(os.path.join(shard_dir, "centroids.npy"), self.centroids)
+            _atomic_save(os.path.join(shard_dir, "assign.npy"), self.assign[:self.size])
+            tmp_meta = os.path.join(shard_dir, "ivf.tmp.json")
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump({"trained_size": self.trained_size, "nlist": int(self.centroids.shape[0])}, f)
+            os.replace(tmp_meta, os.path.join(shard_dir, "ivf.json"))
+
+    # --- search ---
+
+    def upsert(self, mem_id: str, vector: np.ndarray, record: Dict[str, Any]):
+        super().upsert(mem_id, vector, record)
+        self.maybe_train()
+
+    def top_k(self, queries: np.ndarray, limit: int, nprobe: int = 8):
+        """
+        Scores only the rows in the `nprobe` closest lists. A query whose
+        probed lists hold fewer than `limit` live rows is answered exactly.
+        """
+        if not self.indexed:
+            if self.count < self.exact_threshold:
+                return super().top_k(queries, limit)
+            self.train()
+            self.index_unsaved = True
+        k = min(limit, self.count)
+        if k <= 0:
+            return super().top_k(queries, limit)
+
+        if self.list_rows is None or len(self.unlisted) > max(_MIN_UNLISTED, self.size // 8):
+            self._group_lists()
+        centroid_scores = queries @ self.centroids.T
+        nprobe = min(max(1, nprobe), self.centroids.shape[0])
+        results = []
+        for query, scores in zip(queries, centroid_scores):
+            probes = np.argpartition(-scores, nprobe - 1)[:nprobe] if nprobe < len(scores) else np.arange(len(scores))
+            rows = self._probed_rows(probes)
+            if len(rows) < k:
+                rows = np.flatnonzero(self.alive[:self.size])
+            row_scores = np.asarray(self.vectors[rows], dtype=np.float32) @ query
+            if k < len(rows):
+                best = np.argpartition(-row_scores, k - 1)[:k]
+            else:
+                best = np.arange(len(rows))
+            best = best[np.argsort(-row_scores[best], kind="stable")]
+            results.append((rows[best], row_scores[best]))
+        return results
+
+
+class IVFVectorStore(NumpyVectorStore):
+    """
+    A NumpyVectorStore whose large user shards get an IVF (inverted file)
+    approximate nearest-neighbour index.
+
+    Users with fewer than `exact_threshold` memories are searched exactly,
+    as in NumpyVectorStore. Larger shards are clustered into `nlist` lists
+    (default sqrt(n)). A query scans the `nprobe` closest lists: raise
+    `nprobe` for recall, lower it for latency. It can also be passed per call
+    to `search`/`search_many`. Inserts and deletes update the index in place.
+    The index is persisted next to each shard, so a restart does not rebuild
+    it. Every user still has their own shard, so searches only ever see that
+    user's memories, as with ChromaProvider's `user_id` filter.
+    """
+    def __init__(self,
+                 path: Optional[str] = None,
+                 nlist: Optional[int] = None,
+                 nprobe: int = 8,
+                 exact_threshold: int = 10_000,
+                 retrain_growth: float = 4.0,
+                 compact_ratio: float = 0.25,
+                 flush_every: int = 64):
+        if nprobe < 1:
+            raise ValueError("nprobe must be at least 1")
+        if retrain_growth <= 1:
+            raise ValueError("retrain_growth must be greater than 1")
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.exact_threshold = exact_threshold
+        self.retrain_growth = retrain_growth
+        super().__init__(path=path, compact_ratio=compact_ratio, flush_every=flush_every)
+        logger.info("[IVFVectorStore] Exact search below %s rows, nprobe=%s", exact_threshold, nprobe)
+
+    def _new_shard(self, dim: int) -> _IVFShard:
+        return _IVFShard(dim, self.nlist, self.exact_threshold, self.retrain_growth)
+
+    def _open_shard(self, shard_dir: str, dim: int, ids: List[str], records: List[Dict[str, Any]]) -> _IVFShard:
+        vectors = np.load(os.path.join(shard_dir, "vectors.npy"), mmap_mode="r")
+        centroids = assign = None
+        trained_size = 0
+        meta_path = os.path.join(shard_dir, "ivf.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                trained_size = json.load(f)["trained_size"]
+            centroids = np.load(os.path.join(shard_dir, "centroids.npy"))
+            assign = np.load(os.path.join(shard_dir, "assign.npy"))
+        return _IVFShard(dim, self.nlist, self.exact_threshold, self.retrain_growth, vectors, ids, records,
+                         centroids=centroids, assign=assign, trained_size=trained_size)
+
+    def search(self, user_id: str, embedding: List[float], limit: int,
+               nprobe: Optional[int] = None) -> List[RetrievedMemory]:
+        """Search for similar memories for a user."""
+        return self.search_many(user_id, [embedding], limit, nprobe=nprobe)[0]
+
+    def search_many(self, user_id: str, embeddings: List[List[float]], limit: int,
+                    dedupe: bool = False, nprobe: Optional[int] = None) -> List[List[RetrievedMemory]]:
+        """Answers all queries for a user, probing `nprobe` lists (default: the store's)."""
+        if not embeddings:
+            return []
+        nprobe = self.nprobe if nprobe is None else nprobe
+        with self._lock:
+            shard = self._get_shard(user_id)
+            if shard is None:
+                return [[] for _ in embeddings]
+            queries = np.stack([self._normalize(embedding) for embedding in embeddings])
+            per_query = self._to_results(shard, shard.top_k(queries, limit, nprobe))
+        return self._dedupe_results(per_query) if dedupe else per_query
+
+    def _top_k(self, shard: _IVFShard, queries: np.ndarray, limit: int):
+        return shard.top_k(queries, limit, self.nprobe)
+
+    def flush(self):
+        """Writes dirty shards, plus shards whose index a search trained, and the manifest."""
+        with self._lock:
+            self._dirty.update(user_id for user_id, shard in self._shards.items() if shard.index_unsaved)
+        super().flush()
+
+    def index_stats(self, user_id: str) -> Dict[str, Any]:
+        """Describes a user's shard: size, whether it is indexed, and list sizes."""
+        with self._lock:
+            shard = self._get_shard(user_id)
+            if shard is None:
+                return {"count": 0, "indexed": False}
+            stats: Dict[str, Any] = {"count": shard.count, "indexed": shard.indexed}
+            if shard.indexed:
+                sizes = np.bincount(shard.assign[:shard.size][shard.alive[:shard.size]],
+                                    minlength=shard.centroids.shape[0])
+                stats.update({
+                    "nlist": int(shard.centroids.shape[0]),
+                    "trained_size": shard.trained_size,
+                    "largest_list": int(sizes.max()),
+                    "mean_list": float(sizes.mean()),
+                })
+            return stats
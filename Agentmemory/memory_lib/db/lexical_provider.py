@@ -0,0 +1,113 @@
+import logging
+import sqlite3
+import threading
+from typing import List
+from ..interfaces import BaseLexicalIndex
+from ..schemas import VectorMemory, RetrievedMemory
+from ..ranking import tokenize
+
+logger = logging.getLogger(__name__)
+
+class SqliteLexicalIndex(BaseLexicalIndex):
+    """
+    A BM25 keyword index over vector memories, using SQLite FTS5.
+
+    Documents live in a plain table and an external-content FTS5 table
+    (porter-stemmed) is kept in sync by triggers. Scores are FTS5 bm25
+    values, which are negative, and lower is better, matching the vector
+    stores' convention. If this SQLite build lacks FTS5, search falls back to
+    ranking a user's documents by shared tokens in Python.
+    """
+    def __init__(self, db_path: str = ":memory:"):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._create_table()
+        logger.info("[SqliteLexicalIndex] Connected to DB: %s (fts5=%s)", db_path, self.fts_enabled)
+
+    def _create_table(self):
+        with self.conn:
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS lexical_memories (
+                memory_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                content TEXT NOT NULL
+            )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_lexical_user ON lexical_memories (user_id)")
+        try:
+            with self.conn:
+                self.conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS lexical_memories_fts
+                USING fts5(content, content='lexical_memories', content_rowid='rowid', tokenize='porter unicode61')
+                """)
+                self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS lexical_memories_ai AFTER INSERT ON lexical_memories BEGIN
+                    INSERT INTO lexical_memories_fts(rowid, content) VALUES (new.rowid, new.content);
+                END
+                """)
+                self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS lexical_memories_ad AFTER DELETE ON lexical_memories BEGIN
+                    INSERT INTO lexical_memories_fts(lexical_memories_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+                END
+                """)
+                self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS lexical_memories_au AFTER UPDATE OF content ON lexical_memories BEGIN
+                    INSERT INTO lexical_memories_fts(lexical_memories_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+                    INSERT INTO lexical_memories_fts(rowid, content) VALUES (new.rowid, new.content);
+                END
+                """)
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            logger.warning("[SqliteLexicalIndex] FTS5 unavailable, falling back to Python token matching: %s", e)
+            self.fts_enabled = False
+
+    def search(self, user_id: str, query: str, limit: int) -> List[RetrievedMemory]:
+        """Best keyword matches for a user, best first."""
+        tokens = tokenize(query)
+        if not tokens or limit <= 0:
+            return []
+        with self._lock:
+            if self.fts_enabled:
+                match = " OR ".join(f'"{token}"' for token in tokens)
+                rows = self.conn.execute("""
+                    SELECT m.memory_id, m.content, bm25(lexical_memories_fts)
+                    FROM lexical_memories_fts JOIN lexical_memories m ON m.rowid = lexical_memories_fts.rowid
+                    WHERE lexical_memories_fts MATCH ? AND m.user_id = ?
+                    ORDER BY bm25(lexical_memories_fts) LIMIT ?
+                    """, (match, user_id, limit)).fetchall()
+                return [RetrievedMemory(id=row[0], content=row[1], score=row[2], user_id=user_id) for row in rows]
+
+            rows = self.conn.execute(
+                "SELECT memory_id, content FROM lexical_memories WHERE user_id = ?", (user_id,)
+            ).fetchall()
+        query_tokens = set(tokens)
+        scored = [(-len(query_tokens.intersection(tokenize(content, max_tokens=256))), memory_id, content)
+                  for memory_id, content in rows]
+        scored = sorted((hit for hit in scored if hit[0] < 0), key=lambda hit: hit[0])[:limit]
+        return [RetrievedMemory(id=memory_id, content=content, score=float(score), user_id=user_id)
+                for score, memory_id, content in scored]
+
+    def upsert_many(self, memories: List[VectorMemory]):
+        """Index new memories or re-index changed ones in one transaction."""
+        if not memories:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany("""
+                INSERT INTO lexical_memories (memory_id, user_id, content) VALUES (?, ?, ?)
+                ON CONFLICT(memory_id) DO UPDATE SET user_id = excluded.user_id, content = excluded.content
+                """, [(mem.id, mem.user_id, mem.content) for mem in memories])
+
+    def delete_many(self, memory_ids: List[str]):
+        """Remove memories from the index in one transaction."""
+        if not memory_ids:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM lexical_memories WHERE memory_id = ?", [(mem_id,) for mem_id in memory_ids])
+
+    def delete_user(self, user_id: str):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM lexical_memories WHERE user_id = ?", (user_id,))
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,464 @@
+import logging
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from ..interfaces import BaseVectorStore
+from ..schemas import VectorMemory, RetrievedMemory, MemoryPage, SearchResult
+
+logger = logging.getLogger(__name__)
+
+def _atomic_save(path: str, array: np.ndarray):
+    """np.save to a temp file, then swap it in so readers never see a torn file."""
+    tmp_path = path[:-len(".npy")] + ".tmp.npy"
+    np.save(tmp_path, np.ascontiguousarray(array))
+    os.replace(tmp_path, path)
+
+class _UserShard:
+    """
+    One user's vectors as a contiguous, row-normalized float32 matrix.
+
+    Rows are append-only: updates overwrite a row in place and deletes leave a
+    tombstone, so writes never re-stack the matrix. Capacity grows by doubling
+    and dead rows are squeezed out by `compact()`.
+    """
+    def __init__(self, dim: int, vectors: Optional[np.ndarray] = None,
+                 ids: Optional[List[str]] = None, records: Optional[List[Dict[str, Any]]] = None):
+        self.dim = dim
+        self.vectors = vectors if vectors is not None else np.empty((0, dim), dtype=np.float32)
+        self.ids: List[str] = ids or []
+        self.records: List[Optional[Dict[str, Any]]] = records or []
+        self.size = len(self.ids)
+        self.alive = np.ones(self.capacity, dtype=bool)
+        self.alive[self.size:] = False
+        self.row_of: Dict[str, int] = {mem_id: row for row, mem_id in enumerate(self.ids)}
+        self.dead = 0
+
+    @property
+    def count(self) -> int:
+        return self.size - self.dead
+
+    # --- vector storage; subclasses may store rows differently ---
+
+    @property
+    def capacity(self) -> int:
+        return self.vectors.shape[0]
+
+    def _is_mapped(self) -> bool:
+        return isinstance(self.vectors, np.memmap)
+
+    def _resize(self, capacity: int):
+        """Moves the first `size` rows into fresh in-memory arrays of `capacity` rows."""
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:self.size] = self.vectors[:self.size]
+        self.vectors = grown
+
+    def _write_row(self, row: int, vector: np.ndarray):
+        self.vectors[row] = vector
+
+    def _take(self, keep: np.ndarray):
+        self.vectors = np.ascontiguousarray(self.vectors[keep], dtype=np.float32)
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        return queries @ self.vectors[:self.size].T
+
+    def vectors_for(self, rows: np.ndarray) -> np.ndarray:
+        """Stored float32 vectors for `rows`, as a (len(rows), dim) array."""
+        return np.asarray(self.vectors[rows], dtype=np.float32)
+
+    def save_vectors(self, shard_dir: str):
+        """Writes the vector file(s), each via a temp file and an atomic rename."""
+        _atomic_save(os.path.join(shard_dir, "vectors.npy"), self.vectors[:self.size])
+
+    # --- rows ---
+
+    def _ensure_writable(self, extra: int):
+        """Copies memory-mapped storage into RAM and grows capacity if needed."""
+        needed = self.size + extra
+        capacity = self.capacity
+        if self._is_mapped() or needed > capacity:
+            new_capacity = max(needed, capacity * 2 if needed > capacity else capacity, 16)
+            self._resize(new_capacity)
+            alive = np.zeros(new_capacity, dtype=bool)
+            alive[:self.size] = self.alive[:self.size]
+            self.alive = alive
+
+    def upsert(self, mem_id: str, vector: np.ndarray, record: Dict[str, Any]):
+        row = self.row_of.get(mem_id)
+        self._ensure_writable(0 if row is not None else 1)
+        if row is None:
+            row = self.size
+            self.size += 1
+            self.ids.append(mem_id)
+            self.records.append(record)
+            self.row_of[mem_id] = row
+        else:
+            self.records[row] = record
+        self._write_row(row, vector)
+        self.alive[row] = True
+
+    def delete(self, mem_id: str) -> bool:
+        row = self.row_of.pop(mem_id, None)
+        if row is None:
+            return False
+        self.alive[row] = False
+        self.records[row] = None
+        self.dead += 1
+        return True
+
+    def compact(self):
+        """Drops tombstoned rows so the live matrix is contiguous again."""
+        keep = np.flatnonzero(self.alive[:self.size])
+        self._take(keep)
+        self.ids = [self.ids[row] for row in keep]
+        self.records = [self.records[row] for row in keep]
+        self.size = len(self.ids)
+        self.alive = np.ones(self.size, dtype=bool)
+        self.row_of = {mem_id: row for row, mem_id in enumerate(self.ids)}
+        self.dead = 0
+
+    def top_k(self, queries: np.ndarray, limit: int):
+        """
+        Scores a (num_queries, dim) batch with one matrix product. Returns, per
+        query, (rows, cosine similarities) of the best `limit` live rows.
+        """
+        k = min(limit, self.count)
+        if k <= 0:
+            empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+            return [empty for _ in range(queries.shape[0])]
+        scores = self._scores(queries)
+        scores[:, ~self.alive[:self.size]] = -np.inf
+        if k < self.size:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(self.size), scores.shape)
+        results = []
+        for query_scores, rows in zip(scores, candidates):
+            rows = rows[np.argsort(-query_scores[rows], kind="stable")][:k]
+            results.append((rows, query_scores[rows]))
+        return results
+
+
+class NumpyVectorStore(BaseVectorStore):
+    """
+    An in-process BaseVectorStore doing exact, brute-force cosine search over
+    one float32 matrix per user.
+
+    Scores are cosine distances (1 - cosine similarity), so like ChromaProvider
+    a lower score means a closer match. If `path` is given, each user's shard is
+    persisted as a `.npy` matrix plus a JSON record file, and a small manifest
+    lists the shards. Shards are memory-mapped lazily on first access, so a
+    cold start only reads the manifest. Writes are kept in memory until
+    `flush()` (or every `flush_every` writes).
+    """
+    MANIFEST = "manifest.json"
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 compact_ratio: float = 0.25,
+                 flush_every: int = 64):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.flush_every = flush_every
+        self._shards: Dict[str, _UserShard] = {}
+        self._owner: Dict[str, str] = {}
+        self._manifest: Dict[str, Dict[str, Any]] = {}
+        self._dirty: set = set()
+        self._writes_since_flush = 0
+        self._lock = threading.RLock()
+
+        if self.path:
+            os.makedirs(self.path, exist_ok=True)
+            manifest_path = os.path.join(self.path, self.MANIFEST)
+            if os.path.exists(manifest_path):
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    self._manifest = json.load(f).get("users", {})
+        logger.info("[NumpyVectorStore] Initialized with %s persisted user shard(s) at path: %s", len(self._manifest), path)
+
+    # --- shard management ---
+
+    @staticmethod
+    def _shard_name(user_id: str) -> str:
+        return hashlib.sha1(user_id.encode("utf-8")).hexdigest()
+
+    def _new_shard(self, dim: int) -> _UserShard:
+        return _UserShard(dim)
+
+    def _open_shard(self, shard_dir: str, dim: int, ids: List[str], records: List[Dict[str, Any]]) -> _UserShard:
+        vectors = np.load(os.path.join(shard_dir, "vectors.npy"), mmap_mode="r")
+        return _UserShard(dim, vectors, ids, records)
+
+    def _load_shard(self, user_id: str) -> Optional[_UserShard]:
+        """Memory-maps a persisted shard; returns None if none exists."""
+        entry = self._manifest.get(user_id)
+        if not self.path or entry is None:
+            return None
+        shard_dir = os.path.join(self.path, entry["shard"])
+        with open(os.path.join(shard_dir, "records.json"), "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        shard = self._open_shard(shard_dir, entry["dim"], payload["ids"], payload["records"])
+        for mem_id in shard.ids:
+            self._owner[mem_id] = user_id
+        return shard
+
+    def _get_shard(self, user_id: str) -> Optional[_UserShard]:
+        shard = self._shards.get(user_id)
+        if shard is None:
+            shard = self._load_shard(user_id)
+            if shard is not None:
+                self._shards[user_id] = shard
+        return shard
+
+    def _find_owner(self, memory_id: str, user_id: Optional[str] = None) -> Optional[str]:
+        """
+        Finds which user holds `memory_id`. With `user_id`, only that user's
+        shard and the shards already open are searched; without it, unopened
+        shards are loaded one by one until the id turns up.
+        """
+        owner = self._owner.get(memory_id)
+        if owner is not None:
+            return owner
+        if user_id is not None:
+            self._get_shard(user_id)
+            return self._owner.get(memory_id)
+        for user_id in self._manifest:
+            if user_id not in self._shards:
+                self._get_shard(user_id)
+                owner = self._owner.get(memory_id)
+                if owner is not None:
+                    return owner
+        return None
+
+    def _after_write(self, user_id: str):
+        """Compacts the shard if enough rows are dead and marks it for flushing."""
+        shard = self._shards[user_id]
+        if shard.dead and shard.dead > self.compact_ratio * shard.size:
+            shard.compact()
+        self._dirty.add(user_id)
+        self._writes_since_flush += 1
+
+    def _maybe_flush(self):
+        if self.path and self.flush_every and self._writes_since_flush >= self.flush_every:
+            self.flush()
+
+    # --- helpers ---
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    @staticmethod
+    def _to_record(memory: VectorMemory) -> Dict[str, Any]:
+        return {
+            "user_id": memory.user_id,
+            "content": memory.content,
+            "created_at": memory.created_at.isoformat(),
+            "updated_at": memory.updated_at.isoformat(),
+            "metadata": memory.metadata,
+        }
+
+    # --- BaseVectorStore ---
+
+    def get_all_memories(self, user_id: str) -> List[VectorMemory]:
+        """Gets all memories for a user, without embeddings."""
+        with self._lock:
+            shard = self._get_shard(user_id)
+            if shard is None:
+                return []
+            return [self._to_memory(shard, row) for row in np.flatnonzero(shard.alive[:shard.size])]
+
+    def list_user_ids(self) -> List[str]:
+        with self._lock:
+            users = {user_id for user_id, entry in self._manifest.items()
+                     if user_id not in self._shards and entry.get("count", 1)}
+            users.update(user_id for user_id, shard in self._shards.items() if shard.count)
+            return sorted(users)
+
+    def count_memories(self, user_id: str) -> int:
+        with self._lock:
+            shard = self._get_shard(user_id)
+            return shard.count if shard is not None else 0
+
+    def iter_memories(self, user_id: str, batch_size: int = 500,
+                      after: Optional[str] = None,
+                      include_embeddings: bool = False) -> Iterator[MemoryPage]:
+        """
+        Pages through a user's live rows in row order. The cursor is an offset
+        into the live rows, so only one page of memories is built at a time.
+        Embeddings are the stored (normalized) vectors.
+        """
+        offset = int(after) if after is not None else 0
+        while True:
+            with self._lock:
+                shard = self._get_shard(user_id)
+                if shard is None:
+                    return
+                rows = np.flatnonzero(shard.alive[:shard.size])[offset:offset + batch_size]
+                batch = [self._to_memory(shard, row) for row in rows]
+                embeddings = shard.vectors_for(rows) if include_embeddings else None
+            if not batch:
+                return
+            offset += len(batch)
+            yield MemoryPage(memories=batch, cursor=str(offset), embeddings=embeddings)
+            if len(batch) < batch_size:
+                return
+
+    @staticmethod
+    def _to_memory(shard: _UserShard, row: int) -> VectorMemory:
+        record = shard.records[row]
+        return VectorMemory(
+            id=shard.ids[row],
+            user_id=record["user_id"],
+            content=record["content"],
+            created_at=datetime.fromisoformat(record["created_at"]),
+            updated_at=datetime.fromisoformat(record["updated_at"]),
+            metadata=record.get("metadata", {}),
+        )
+
+    def search(self, user_id: str, embedding: List[float], limit: int) -> List[RetrievedMemory]:
+        """Search for similar memories for a user."""
+        return self.search_many(user_id, [embedding], limit)[0]
+
+    def search_many(self, user_id: str, embeddings: List[List[float]], limit: int,
+                    dedupe: bool = False) -> List[List[RetrievedMemory]]:
+        """Answers all queries for a user with a single matrix product."""
+        if not embeddings:
+            return []
+        with self._lock:
+            shard = self._get_shard(user_id)
+            if shard is None:
+                return [[] for _ in embeddings]
+            queries = np.stack([self._normalize(embedding) for embedding in embeddings])
+            per_query = self._to_results(shard, self._top_k(shard, queries, limit))
+        return self._dedupe_results(per_query) if dedupe else per_query
+
+    def search_columns(self, user_id: str, embedding: List[float], limit: int) -> SearchResult:
+        """Top hits as columns, with scores left as a float32 array."""
+        with self._lock:
+            shard = self._get_shard(user_id)
+            if shard is None:
+                return SearchResult(user_id, [], np.empty(0, dtype=np.float32), [])
+            rows, similarities = self._top_k(shard, self._normalize(embedding)[None, :], limit)[0]
+            return SearchResult(user_id, [shard.ids[row] for row in rows], 1.0 - similarities,
+                                [shard.records[row]["content"] for row in rows])
+
+    def _top_k(self, shard: _UserShard, queries: np.ndarray, limit: int):
+        """Hook for subclasses whose shards take extra search parameters."""
+        return shard.top_k(queries, limit)
+
+    @staticmethod
+    def _to_results(shard: _UserShard, hits) -> List[List[RetrievedMemory]]:
+        """Turns per-query (rows, cosine similarities) into RetrievedMemory lists."""
+        return [
+            [
+                RetrievedMemory(
+                    id=shard.ids[row],
+                    score=float(1.0 - sim),
+                    content=shard.records[row]["content"],
+                    user_id=shard.records[row]["user_id"],
+                )
+                for row, sim in zip(rows, similarities)
+            ]
+            for rows, similarities in hits
+        ]
+
+    def _upsert_locked(self, memory: VectorMemory, vector: np.ndarray):
+        previous_owner = self._find_owner(memory.id, memory.user_id)
+        if previous_owner is not None and previous_owner != memory.user_id:
+            self._shards[previous_owner].delete(memory.id)
+            self._after_write(previous_owner)
+
+        shard = self._get_shard(memory.user_id)
+        if shard is None:
+            shard = self._shards[memory.user_id] = self._new_shard(vector.shape[0])
+        if vector.shape[0] != shard.dim:
+            raise ValueError(f"Embedding has dimension {vector.shape[0]}, expected {shard.dim}")
+        shard.upsert(memory.id, vector, self._to_record(memory))
+        self._owner[memory.id] = memory.user_id
+        self._after_write(memory.user_id)
+
+    def _delete_locked(self, memory_id: str, user_id: Optional[str] = None) -> bool:
+        owner = self._find_owner(memory_id, user_id)
+        if owner is None:
+            return False
+        self._shards[owner].delete(memory_id)
+        del self._owner[memory_id]
+        self._after_write(owner)
+        return True
+
+    def upsert(self, memory: VectorMemory, embedding: List[float]):
+        """Create or update a memory in the vector store."""
+        logger.debug("[NumpyVectorStore] UPSERT Memory: %s", memory.id)
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._upsert_locked(memory, vector)
+            self._maybe_flush()
+
+    def upsert_many(self, memories: List[VectorMemory], embeddings: List[List[float]]):
+        """Create or update many memories under one lock, flushing at most once."""
+        logger.debug("[NumpyVectorStore] UPSERT %s memories", len(memories))
+        vectors = [self._normalize(embedding) for embedding in embeddings]
+        with self._lock:
+            for memory, vector in zip(memories, vectors):
+                self._upsert_locked(memory, vector)
+            self._maybe_flush()
+
+    def delete(self, memory_id: str):
+        """Delete a memory by its ID."""
+        logger.debug("[NumpyVectorStore] DELETE Memory: %s", memory_id)
+        with self._lock:
+            if not self._delete_locked(memory_id):
+                logger.warning("[NumpyVectorStore] Error deleting %s: not found.", memory_id)
+            self._maybe_flush()
+
+    def delete_many(self, memory_ids: List[str], user_id: Optional[str] = None):
+        """
+        Delete many memories under one lock, flushing at most once. Without
+        `user_id`, an id not in an open shard loads every persisted shard to
+        find it.
+        """
+        logger.debug("[NumpyVectorStore] DELETE %s memories", len(memory_ids))
+        with self._lock:
+            for memory_id in memory_ids:
+                self._delete_locked(memory_id, user_id)
+            self._maybe_flush()
+
+    # --- persistence ---
+
+    def flush(self):
+        """Writes dirty shards (compacted) and the manifest to disk."""
+        if not self.path:
+            return
+        with self._lock:
+            for user_id in list(self._dirty):
+                shard = self._shards[user_id]
+                if shard.dead:
+                    shard.compact()
+                name = self._shard_name(user_id)
+                shard_dir = os.path.join(self.path, name)
+                os.makedirs(shard_dir, exist_ok=True)
+
+                # Write to temp files and swap in, so readers never see a torn shard
+                shard.save_vectors(shard_dir)
+                tmp_records = os.path.join(shard_dir, "records.tmp.json")
+                with open(tmp_records, "w", encoding="utf-8") as f:
+                    json.dump({"ids": shard.ids, "records": shard.records}, f)
+                os.replace(tmp_records, os.path.join(shard_dir, "records.json"))
+
+                self._manifest[user_id] = {"shard": name, "dim": shard.dim, "count": shard.count}
+
+            tmp_manifest = os.path.join(self.path, self.MANIFEST + ".tmp")
+            with open(tmp_manifest, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "users": self._manifest}, f)
+            os.replace(tmp_manifest, os.path.join(self.path, self.MANIFEST))
+            self._dirty.clear()
+            self._writes_since_flush = 0
+
+    def close(self):
+        """Flushes pending writes."""
+        self.flush()
@@ -0,0 +1,276 @@
+import logging
+import os
+import numpy as np
+from typing import Any, Dict, List, Optional
+from .numpy_provider import NumpyVectorStore, _UserShard, _atomic_save
+
+logger = logging.getLogger(__name__)
+
+MODES = ("int8", "float16")
+
+# Rows dequantized per block while scoring, bounding the float32 scratch space
+_SCORE_BLOCK = 4096
+
+class _QuantizedShard(_UserShard):
+    """
+    A user shard that scores on compressed codes and keeps full precision aside.
+
+    `codes` holds every row as int8 with a per-row float32 scale, or as
+    float16. It stays in RAM and is what every query scans. `vectors` holds
+    the exact float32 rows used to re-rank the best candidates. Once
+    persisted, it is memory-mapped and only those candidate rows are read.
+    Rows written since then wait in `pending`. `vectors` is None when full
+    precision is not kept.
+    """
+    def __init__(self, dim: int, mode: str, rerank: int,
+                 codes: Optional[np.ndarray] = None, scales: Optional[np.ndarray] = None,
+                 vectors: Optional[np.ndarray] = None, keep_full_precision: bool = True,
+                 ids: Optional[List[str]] = None, records: Optional[List[Dict[str, Any]]] = None):
+        self.mode = mode
+        self.rerank = rerank
+        dtype = np.int8 if mode == "int8" else np.float16
+        self.codes = codes if codes is not None else np.empty((0, dim), dtype=dtype)
+        self.scales = scales if scales is not None else np.ones(self.codes.shape[0], dtype=np.float32)
+        self.pending: Dict[int, np.ndarray] = {}
+        super().__init__(dim, vectors, ids, records)
+        if not keep_full_precision:
+            self.vectors = None
+
+    # --- encoding ---
+
+    def _encode(self, vectors: np.ndarray):
+        """Returns (codes, scales) for a (n, dim) float32 batch."""
+        if self.mode == "float16":
+            return vectors.astype(np.float16), np.ones(vectors.shape[0], dtype=np.float32)
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def full_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Exact float32 vectors for `rows`, reading mapped rows on demand."""
+        if not self.pending:
+            return np.asarray(self.vectors[rows], dtype=np.float32)
+        rows = np.asarray(rows)
+        out = np.empty((len(rows), self.dim), dtype=np.float32)
+        mapped = rows < self.vectors.shape[0]
+        out[mapped] = self.vectors[rows[mapped]]
+        overridden = ~mapped | np.isin(rows, np.fromiter(self.pending, dtype=np.int64))
+        for i in np.flatnonzero(overridden):
+            out[i] = self.pending[int(rows[i])]
+        return out
+
+    def vectors_for(self, rows: np.ndarray) -> np.ndarray:
+        """Full-precision rows when kept, otherwise rows decoded from the codes."""
+        if self.vectors is not None:
+            return self.full_rows(rows)
+        decoded = self.codes[rows].astype(np.float32)
+        return decoded * self.scales[rows][:, None] if self.mode == "int8" else decoded
+
+    # --- vector storage ---
+
+    @property
+    def capacity(self) -> int:
+        return self.codes.shape[0]
+
+    def _is_mapped(self) -> bool:
+        # Only the codes need to be writable; the mapped full tier takes new rows via `pending`
+        return isinstance(self.codes, np.memmap)
+
+    def _resize(self, capacity: int):
+        codes = np.zeros((capacity, self.dim), dtype=self.codes.dtype)
+        codes[:self.size] = self.codes[:self.size]
+        scales = np.ones(capacity, dtype=np.float32)
+        scales[:self.size] = self.scales[:self.size]
+        self.codes, self.scales = codes, scales
+        if self.vectors is not None and not isinstance(self.vectors, np.memmap):
+            super()._resize(capacity)
+
+    def _write_row(self, row: int, vector: np.ndarray):
+        codes, scales = self._encode(vector[None, :])
+        self.codes[row], self.scales[row] = codes[0], scales[0]
+        if self.vectors is None:
+            return
+        if isinstance(self.vectors, np.memmap):
+            self.pending[row] = vector
+        else:
+            self.vectors[row] = vector
+
+    def _take(self, keep: np.ndarray):
+        if self.vectors is not None:
+            self.vectors = self.full_rows(keep)
+            self.pending.clear()
+        self.codes = np.ascontiguousarray(self.codes[keep])
+        self.scales = np.ascontiguousarray(self.scales[keep])
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        scores = np.empty((queries.shape[0], self.size), dtype=np.float32)
+        for start in range(0, self.size, _SCORE_BLOCK):
+            end = min(start + _SCORE_BLOCK, self.size)
+            block = queries @ self.codes[start:end].astype(np.float32).T
+            if self.mode == "int8":
+                block *= self.scales[start:end]
+            scores[:, start:end] = block
+        return scores
+
+    def save_vectors(self, shard_dir: str):
+        """Writes codes (and scales and full vectors, if kept), then re-maps the full tier."""
+        _atomic_save(os.path.join(shard_dir, "codes.npy"), self.codes[:self.size])
+        if self.mode == "int8":
+            _atomic_save(os.path.join(shard_dir, "scales.npy"), self.scales[:self.size])
+        if self.vectors is not None:
+            vectors_path = os.path.join(shard_dir, "vectors.npy")
+            _atomic_save(vectors_path, self.full_rows(np.arange(self.size)))
+            self.vectors = np.load(vectors_path, mmap_mode="r")
+            self.pending.clear()
+
+    # --- search ---
+
+    def top_k(self, queries: np.ndarray, limit: int, rerank: Optional[int] = None):
+        """
+        Approximate top-(limit * rerank) on the codes, then exact re-scoring of
+        those candidates against the full-precision rows when they are kept.
+        """
+        rerank = self.rerank if rerank is None else rerank
+        if self.vectors is None or rerank <= 1:
+            return super().top_k(queries, limit)
+        k = min(limit, self.count)
+        results = []
+        for query, (rows, _) in zip(queries, super().top_k(queries, limit * rerank)):
+            if len(rows) == 0:
+                results.append((rows, np.empty(0, dtype=np.float32)))
+                continue
+            exact = self.full_rows(rows) @ query
+            order = np.argsort(-exact, kind="stable")[:k]
+            results.append((rows[order], exact[order]))
+        return results
+
+    # --- accounting ---
+
+    def code_bytes(self) -> int:
+        return self.codes[:self.size].nbytes + (self.scales[:self.size].nbytes if self.mode == "int8" else 0)
+
+    def full_bytes_in_ram(self) -> int:
+        resident = 0 if self.vectors is None or isinstance(self.vectors, np.memmap) else self.vectors[:self.size].nbytes
+        return resident + sum(vector.nbytes for vector in self.pending.values())
+
+
+class QuantizedVectorStore(NumpyVectorStore):
+    """
+    A NumpyVectorStore that keeps vectors compressed: int8 with a per-vector
+    scale (about 4x smaller), or float16 (2x smaller).
+
+    Search scans the compressed codes for the best `limit * rerank` candidates
+    and re-scores them exactly against full-precision float32 rows. When
+    persisted, those rows are memory-mapped rather than held in RAM. With
+    `keep_full_precision=False` only the codes are stored, and scores are
+    approximate. `quantization_report()` measures the recall/memory trade-off.
+    A directory written by NumpyVectorStore can be opened directly; codes are
+    built from its vectors on first load.
+    """
+    def __init__(self,
+                 path: Optional[str] = None,
+                 mode: str = "int8",
+                 rerank: int = 4,
+                 keep_full_precision: bool = True,
+                 compact_ratio: float = 0.25,
+                 flush_every: int = 64):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got '{mode}'")
+        if rerank < 1:
+            raise ValueError("rerank must be at least 1")
+        self.mode = mode
+        self.rerank = rerank
+        self.keep_full_precision = keep_full_precision
+        super().__init__(path=path, compact_ratio=compact_ratio, flush_every=flush_every)
+        logger.info("[QuantizedVectorStore] Using %s codes (rerank=%s, keep_full_precision=%s)", mode, rerank, keep_full_precision)
+
+    def _new_shard(self, dim: int) -> _QuantizedShard:
+        return _QuantizedShard(dim, self.mode, self.rerank, keep_full_precision=self.keep_full_precision)
+
+    def _open_shard(self, shard_dir: str, dim: int, ids: List[str], records: List[Dict[str, Any]]) -> _QuantizedShard:
+        vectors_path = os.path.join(shard_dir, "vectors.npy")
+        codes_path = os.path.join(shard_dir, "codes.npy")
+        vectors = np.load(vectors_path, mmap_mode="r") if os.path.exists(vectors_path) else None
+        keep_full = self.keep_full_precision and vectors is not None
+        shard = _QuantizedShard(dim, self.mode, self.rerank, vectors=vectors if keep_full else None,
+                                keep_full_precision=keep_full, ids=ids, records=records)
+        expected = np.int8 if self.mode == "int8" else np.float16
+        if os.path.exists(codes_path) and np.load(codes_path, mmap_mode="r").dtype == expected:
+            # Codes are scanned by every query, so they are read fully into RAM
+            shard.codes = np.load(codes_path)
+            scales_path = os.path.join(shard_dir, "scales.npy")
+            if self.mode == "int8":
+                shard.scales = np.load(scales_path)
+            else:
+                shard.scales = np.ones(len(ids), dtype=np.float32)
+        elif vectors is not None:
+            # Plain NumpyVectorStore shard, or stored in another mode: encode from full precision
+            shard.codes, shard.scales = shard._encode(np.asarray(vectors, dtype=np.float32))
+        else:
+            raise ValueError(f"Shard at {shard_dir} has no {self.mode} codes and no full-precision vectors")
+        shard.alive = np.ones(shard.capacity, dtype=bool)
+        return shard
+
+    def quantization_report(self, limit: int = 10, sample: int = 200,
+                            queries: Optional[Dict[str, List[List[float]]]] = None,
+                            seed: int = 0) -> Dict[str, Any]:
+        """
+        Measures recall@limit of approximate and re-ranked search against exact
+        float32 search, plus the memory footprint of each tier.
+
+        `queries` maps user_id -> query embeddings. By default up to `sample`
+        stored vectors (spread across loaded and persisted users) are reused
+        as queries. Needs full-precision vectors.
+        """
+        if not self.keep_full_precision:
+            raise ValueError("quantization_report needs keep_full_precision=True")
+        rng = np.random.default_rng(seed)
+        approx_hits = reranked_hits = total = num_queries = 0
+        with self._lock:
+            user_ids = list(queries) if queries is not None else sorted(set(self._manifest) | set(self._shards))
+            shards = {user_id: self._get_shard(user_id) for user_id in user_ids}
+            shards = {user_id: shard for user_id, shard in shards.items() if shard is not None and shard.count}
+            per_user = max(1, sample // max(1, len(shards)))
+
+            for user_id, shard in shards.items():
+                if queries is not None:
+                    batch = np.stack([self._normalize(q) for q in queries[user_id]])
+                else:
+                    live = np.flatnonzero(shard.alive[:shard.size])
+                    picked = rng.choice(live, size=min(per_user, len(live)), replace=False)
+                    batch = shard.full_rows(picked)
+                live = np.flatnonzero(shard.alive[:shard.size])
+                exact_scores = batch @ shard.full_rows(live).T
+                k = min(limit, len(live))
+                approximate = shard.top_k(batch, limit, rerank=1)
+                reranked = shard.top_k(batch, limit)
+                for i in range(batch.shape[0]):
+                    truth = set(live[np.argsort(-exact_scores[i], kind="stable")[:k]].tolist())
+                    approx_hits += len(truth.intersection(approximate[i][0].tolist()))
+                    reranked_hits += len(truth.intersection(reranked[i][0].tolist()))
+                    total += k
+                num_queries += batch.shape[0]
+
+            vectors = sum(shard.count for shard in self._shards.values())
+            code_bytes = sum(shard.code_bytes() for shard in self._shards.values())
+            full_in_ram = sum(shard.full_bytes_in_ram() for shard in self._shards.values())
+            float32_bytes = sum(shard.size * shard.dim * 4 for shard in self._shards.values())
+
+        return {
+            "mode": self.mode,
+            "rerank": self.rerank,
+            "limit": limit,
+            "queries": num_queries,
+            "recall_at_k": {
+                "approximate": approx_hits / total if total else None,
+                "reranked": reranked_hits / total if total else None,
+            },
+            "memory": {
+                "loaded_vectors": vectors,
+                "code_bytes": code_bytes,
+                "full_precision_bytes_in_ram": full_in_ram,
+                "float32_bytes": float32_bytes,
+                "compression": float32_bytes / code_bytes if code_bytes else None,
+            },
+        }
@@ -0,0 +1,428 @@
+import bisect
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from ..interfaces import BaseVectorStore
+from ..schemas import VectorMemory, RetrievedMemory, MemoryPage, SearchResult
+
+logger = logging.getLogger(__name__)
+
+# Number of per-user lock stripes; a user's reads and writes hold its stripe
+_LOCK_STRIPES = 64
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+class ShardedVectorStore(BaseVectorStore):
+    """
+    Routes each user to one of several underlying vector stores.
+
+    In ring mode, `shards` maps stable shard names to any BaseVectorStore
+    (Chroma collections, NumpyVectorStore directories, ...). Users are placed
+    by consistent hashing with `replicas` virtual nodes per shard, so adding
+    a shard only moves about 1/N of the users. `add_shard` and `remove_shard`
+    rebalance online. Moved users are copied in `move_batch` pages with their
+    stored embeddings, so nothing is re-embedded. Only the user being moved
+    is paused. The first time a user is routed after a start or a ring
+    change, the store checks that the ring owner holds their data and
+    otherwise finds them on another shard, so users left behind by an
+    unfinished rebalance stay reachable after a restart. Up to `route_cache`
+    confirmed users are remembered.
+
+    In per-user mode (`factory` without `shards`), every user gets a store
+    of their own from `factory(user_id)`, such as one Chroma collection per
+    user (see `chroma_per_user`).
+    """
+    def __init__(self,
+                 shards: Optional[Dict[str, BaseVectorStore]] = None,
+                 factory: Optional[Callable[[str], BaseVectorStore]] = None,
+                 discover: Optional[Callable[[], List[str]]] = None,
+                 replicas: int = 64,
+                 move_batch: int = 1000,
+                 route_cache: int = 100_000):
+        if bool(shards) == (factory is not None):
+            raise ValueError("Pass either a non-empty `shards` dict or a per-user `factory`, not both")
+        for name, store in (shards or {}).items():
+            if not isinstance(store, BaseVectorStore):
+                raise TypeError(f"Shard '{name}' must be an instance of BaseVectorStore")
+        if replicas < 1:
+            raise ValueError("replicas must be at least 1")
+        if route_cache < 1:
+            raise ValueError("route_cache must be at least 1")
+        self.per_user = factory is not None
+        self.factory = factory
+        self.discover = discover
+        self.replicas = replicas
+        self.move_batch = move_batch
+        self.route_cache = route_cache
+        self.shards: Dict[str, BaseVectorStore] = dict(shards or {})
+        self._ring: List[Tuple[int, str]] = self._build_ring(self.shards)
+        self._ring_keys = [point for point, _ in self._ring]
+        # Users still living on a shard other than their ring owner, mid-rebalance
+        self._placement: Dict[str, str] = {}
+        # Users known to live on their ring owner, most recently routed last
+        self._confirmed: "OrderedDict[str, None]" = OrderedDict()
+        self._route_lock = threading.Lock()
+        # memory_id -> user_id for recently seen memories, so most deletes can
+        # be routed without a user id; older ids are deleted from every shard
+        self._owner: "OrderedDict[str, str]" = OrderedDict()
+        self._locks = [threading.RLock() for _ in range(_LOCK_STRIPES)]
+        self._admin_lock = threading.Lock()
+        self.users_moved = 0
+        self.memories_moved = 0
+        if self.per_user:
+            logger.info("[ShardedVectorStore] Per-user mode")
+        else:
+            logger.info("[ShardedVectorStore] %s shard(s): %s", len(self.shards), ", ".join(self.shards))
+
+    @classmethod
+    def chroma_per_user(cls, path: str = "./chroma_db", prefix: str = "user-") -> "ShardedVectorStore":
+        """One Chroma collection per user under `path`, named from a hash of the user id."""
+        import chromadb
+        from .chroma_provider import ChromaProvider
+
+        def factory(user_id: str) -> BaseVectorStore:
+            name = prefix + hashlib.sha1(user_id.encode("utf-8")).hexdigest()
+            return ChromaProvider(path=path, collection_name=name)
+
+        def discover() -> List[str]:
+            client = chromadb.PersistentClient(path=path)
+            users = set()
+            for collection in client.list_collections():
+                name = getattr(collection, "name", collection)
+                if name.startswith(prefix):
+                    users.update(ChromaProvider(path=path, collection_name=name).list_user_ids())
+            return sorted(users)
+
+        return cls(factory=factory, discover=discover)
+
+    # --- routing ---
+
+    def _build_ring(self, shards: Dict[str, BaseVectorStore]) -> List[Tuple[int, str]]:
+        return sorted((_hash(f"{name}#{i}"), name) for name in shards for i in range(self.replicas))
+
+    def _ring_owner(self, user_id: str, ring: Optional[List[Tuple[int, str]]] = None,
+                    keys: Optional[List[int]] = None) -> str:
+        if ring is None:
+            ring, keys = self._ring, self._ring_keys
+        index = bisect.bisect(keys, _hash(user_id)) % len(ring)
+        return ring[index][1]
+
+    def shard_for(self, user_id: str) -> str:
+        """Name of the shard currently holding `user_id` (the user id itself in per-user mode)."""
+        if self.per_user:
+            return user_id
+        placed = self._placement.get(user_id)
+        if placed is not None:
+            return placed
+        owner = self._ring_owner(user_id)
+        with self._route_lock:
+            if user_id in self._confirmed:
+                self._confirmed.move_to_end(user_id)
+                return owner
+        return self._locate(user_id, owner)
+
+    @staticmethod
+    def _has_user(store: BaseVectorStore, user_id: str) -> bool:
+        page = next(iter(store.iter_memories(user_id, batch_size=1)), None)
+        return page is not None and bool(page.memories)
+
+    def _locate(self, user_id: str, owner: str) -> str:
+        """
+        Finds the shard holding a user not routed since the last start or ring
+        change. A user found off their ring owner (e.g. an unfinished
+        rebalance before a restart) is served from there until `rebalance()`.
+        """
+        if len(self.shards) > 1 and not self._has_user(self.shards[owner], user_id):
+            for name, store in list(self.shards.items()):
+                if name != owner and self._has_user(store, user_id):
+                    logger.info("[ShardedVectorStore] Found user %s on %s instead of %s; pending a rebalance",
+                                user_id, name, owner)
+                    self._placement[user_id] = name
+                    return name
+        self._confirm(user_id)
+        return owner
+
+    def _confirm(self, user_id: str):
+        with self._route_lock:
+            self._confirmed[user_id] = None
+            self._confirmed.move_to_end(user_id)
+            while len(self._confirmed) > self.route_cache:
+                self._confirmed.popitem(last=False)
+
+    def _store(self, user_id: str) -> BaseVectorStore:
+        if not self.per_user:
+            return self.shards[self.shard_for(user_id)]
+        store = self.shards.get(user_id)
+        if store is None:
+            store = self.shards.setdefault(user_id, self.factory(user_id))
+        return store
+
+    @contextmanager
+    def _user_lock(self, user_id: str):
+        with self._locks[_hash(user_id) % _LOCK_STRIPES]:
+            yield
+
+    def _remember(self, user_id: str, memory_ids: List[str]):
+        with self._route_lock:
+            for memory_id in memory_ids:
+                self._owner[memory_id] = user_id
+                self._owner.move_to_end(memory_id)
+            while len(self._owner) > self.route_cache:
+                self._owner.popitem(last=False)
+
+    # --- BaseVectorStore ---
+
+    def search(self, user_id: str, embedding: List[float], limit: int) -> List[RetrievedMemory]:
+        """Search for similar memories for a user."""
+        return self.search_many(user_id, [embedding], limit)[0]
+
+    def search_many(self, user_id: str, embeddings: List[List[float]], limit: int,
+                    dedupe: bool = False) -> List[List[RetrievedMemory]]:
+        """Answers all queries on the user's shard in one call."""
+        if not embeddings:
+            return []
+        with self._user_lock(user_id):
+            per_query = self._store(user_id).search_many(user_id, embeddings, limit, dedupe=dedupe)
+        self._remember(user_id, [hit.id for hits in per_query for hit in hits])
+        return per_query
+
+    def search_columns(self, user_id: str, embedding: List[float], limit: int) -> SearchResult:
+        """Columnar search on the user's shard."""
+        with self._user_lock(user_id):
+            result = self._store(user_id).search_columns(user_id, embedding, limit)
+        self._remember(user_id, result.ids)
+        return result
+
+    def get_all_memories(self, user_id: str) -> List[VectorMemory]:
+        """Gets all memories for a user, without embeddings."""
+        with self._user_lock(user_id):
+            memories = self._store(user_id).get_all_memories(user_id)
+        self._remember(user_id, [memory.id for memory in memories])
+        return memories
+
+    def count_memories(self, user_id: str) -> int:
+        with self._user_lock(user_id):
+            return self._store(user_id).count_memories(user_id)
+
+    def iter_memories(self, user_id: str, batch_size: int = 500,
+                      after: Optional[str] = None,
+                      include_embeddings: bool = False) -> Iterator[MemoryPage]:
+        """Pages through the user's current shard; a rebalance moving the user mid-iteration cuts it short."""
+        with self._user_lock(user_id):
+            store = self._store(user_id)
+        if include_embeddings:
+            return store.iter_memories(user_id, batch_size=batch_size, after=after, include_embeddings=True)
+        return store.iter_memories(user_id, batch_size=batch_size, after=after)
+
+    def list_user_ids(self) -> List[str]:
+        if self.per_user and self.discover is not None:
+            return self.discover()
+        users = set()
+        for store in self.shards.values():
+            users.update(store.list_user_ids())
+        return sorted(users)
+
+    def upsert(self, memory: VectorMemory, embedding: List[float]):
+        """Create or update a memory on its user's shard."""
+        self.upsert_many([memory], [embedding])
+
+    def upsert_many(self, memories: List[VectorMemory], embeddings: List[List[float]]):
+        """
+        Groups the batch by user and writes each group to its shard in one
+        call. A memory moved to another user is removed from its old shard
+        when the router has seen it; otherwise only the new user's shard is
+        consulted (it drops the old copy if both users live there), so delete
+        a memory from its old user before re-assigning it across shards.
+        """
+        logger.debug("[ShardedVectorStore] UPSERT %s memories", len(memories))
+        groups: Dict[str, Tuple[List[VectorMemory], List[List[float]]]] = {}
+        for memory, embedding in zip(memories, embeddings):
+            group = groups.setdefault(memory.user_id, ([], []))
+            group[0].append(memory)
+            group[1].append(embedding)
+
+        for user_id, (group_memories, group_embeddings) in groups.items():
+            # A memory re-assigned to another user must leave its old shard
+            with self._route_lock:
+                moved: Dict[str, List[str]] = {}
+                for memory in group_memories:
+                    owner = self._owner.get(memory.id, user_id)
+                    if owner != user_id:
+                        moved.setdefault(owner, []).append(memory.id)
+            for owner, ids in moved.items():
+                self._delete_routed(ids, owner)
+            with self._user_lock(user_id):
+                self._store(user_id).upsert_many(group_memories, group_embeddings)
+            self._remember(user_id, [memory.id for memory in group_memories])
+
+    def delete(self, memory_id: str):
+        """Delete a memory by its ID."""
+        self.delete_many([memory_id])
+
+    def delete_many(self, memory_ids: List[str], user_id: Optional[str] = None):
+        """
+        Deletes from each owning shard. Ids the router has not seen go to
+        `user_id`'s shard, or to every shard when no user is given.
+        """
+        logger.debug("[ShardedVectorStore] DELETE %s memories", len(memory_ids))
+        self._delete_routed(memory_ids, user_id)
+
+    def _delete_routed(self, memory_ids: List[str], user_id: Optional[str] = None):
+        by_user: Dict[str, List[str]] = {}
+        unknown = []
+        with self._route_lock:
+            for memory_id in memory_ids:
+                owner = self._owner.pop(memory_id, None) or user_id
+                if owner is None:
+                    unknown.append(memory_id)
+                else:
+                    by_user.setdefault(owner, []).append(memory_id)
+        for owner, ids in by_user.items():
+            with self._user_lock(owner):
+                self._store(owner).delete_many(ids, owner)
+        if unknown:
+            for store in list(self.shards.values()):
+                store.delete_many(unknown)
+
+    # --- rebalancing ---
+
+    def add_shard(self, name: str, store: BaseVectorStore, rebalance: bool = True) -> Dict[str, Any]:
+        """Adds a shard to the ring and (by default) moves the users it now owns onto it."""
+        if self.per_user:
+            raise ValueError("add_shard is not available in per-user mode")
+        if not isinstance(store, BaseVectorStore):
+            raise TypeError("store must be an instance of BaseVectorStore")
+        if name in self.shards:
+            raise ValueError(f"Shard '{name}' already exists")
+        shards = dict(self.shards)
+        shards[name] = store
+        return self._reshard(shards, rebalance)
+
+    def remove_shard(self, name: str) -> BaseVectorStore:
+        """Moves every user off shard `name`, drops it from the ring and returns its store."""
+        if self.per_user:
+            raise ValueError("remove_shard is not available in per-user mode")
+        if name not in self.shards or len(self.shards) == 1:
+            raise ValueError(f"Cannot remove shard '{name}'")
+        store = self.shards[name]
+        shards = {shard: s for shard, s in self.shards.items() if shard != name}
+        self._reshard(shards, rebalance=True, retired={name: store})
+        return store
+
+    def _reshard(self, shards: Dict[str, BaseVectorStore], rebalance: bool,
+                 retired: Optional[Dict[str, BaseVectorStore]] = None) -> Dict[str, Any]:
+        """
+        Swaps in the new ring. Users whose owner changes keep being served
+        from their current shard (via `_placement`) until they are moved.
+        Users are listed before traffic is paused, so the pause only covers
+        the in-memory planning and the ring swap. Users first written in
+        between are found on their next access (see `_locate`).
+        """
+        with self._admin_lock:
+            current = dict(self.shards)
+            current.update(shards)
+            current.update(retired or {})
+            listed = [(shard_name, store.list_user_ids()) for shard_name, store in current.items()]
+            ring = self._build_ring(shards)
+            ring_keys = [point for point, _ in ring]
+            for lock in self._locks:
+                lock.acquire()
+            try:
+                for shard_name, user_ids in listed:
+                    for user_id in user_ids:
+                        located = self._placement.get(user_id, shard_name)
+                        if self._ring_owner(user_id, ring, ring_keys) != located:
+                            self._placement[user_id] = located
+                self.shards = current
+                self._ring = ring
+                self._ring_keys = [point for point, _ in ring]
+                # Owners changed; re-check users on their next access
+                with self._route_lock:
+                    self._confirmed.clear()
+            finally:
+                for lock in reversed(self._locks):
+                    lock.release()
+            logger.info("[ShardedVectorStore] Ring now has %s shard(s); %s user(s) to move",
+                        len(shards), len(self._placement))
+            report = self._move_pending() if rebalance else {"users_moved": 0, "memories_moved": 0, "seconds": 0.0}
+            if rebalance and retired:
+                # Catch users first written to a retired shard while it was being listed
+                for shard_name, store in retired.items():
+                    for user_id in store.list_user_ids():
+                        self._placement.setdefault(user_id, shard_name)
+                late = self._move_pending()
+                report = {key: report[key] + late[key] for key in report}
+            if not self._placement:
+                self.shards = shards
+            return report
+
+    def rebalance(self) -> Dict[str, Any]:
+        """
+        Moves every user not on its ring owner: users left behind by
+        `add_shard(rebalance=False)` or by an interrupted rebalance. Safe to
+        rerun, e.g. after a restart.
+        """
+        if self.per_user:
+            return {"users_moved": 0, "memories_moved": 0, "seconds": 0.0}
+        with self._admin_lock:
+            for shard_name, store in self.shards.items():
+                for user_id in store.list_user_ids():
+                    if self._ring_owner(user_id) != shard_name:
+                        self._placement.setdefault(user_id, shard_name)
+            return self._move_pending()
+
+    def _move_pending(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        users = memories = 0
+        for user_id in list(self._placement):
+            memories += self._move_user(user_id)
+            users += 1
+        self.users_moved += users
+        self.memories_moved += memories
+        seconds = time.perf_counter() - started
+        logger.info("[ShardedVectorStore] Moved %s user(s), %s memories in %.2fs", users, memories, seconds)
+        return {"users_moved": users, "memories_moved": memories, "seconds": seconds}
+
+    def _move_user(self, user_id: str) -> int:
+        """Copies a user's memories and embeddings to their ring owner, then deletes the originals."""
+        with self._user_lock(user_id):
+            source_name = self._placement[user_id]
+            target_name = self._ring_owner(user_id)
+            source, target = self.shards[source_name], self.shards[target_name]
+            moved_ids = []
+            if source_name != target_name:
+                for page in source.iter_memories(user_id, batch_size=self.move_batch, include_embeddings=True):
+                    target.upsert_many(page.memories, page.embeddings.tolist())
+                    moved_ids.extend(memory.id for memory in page.memories)
+                for start in range(0, len(moved_ids), self.move_batch):
+                    source.delete_many(moved_ids[start:start + self.move_batch])
+                logger.debug("[ShardedVectorStore] Moved user %s (%s memories) %s -> %s",
+                             user_id, len(moved_ids), source_name, target_name)
+            del self._placement[user_id]
+            self._confirm(user_id)
+            return len(moved_ids)
+
+    def shard_stats(self) -> Dict[str, Dict[str, int]]:
+        """Users per shard, plus users still waiting to be moved."""
+        stats = {name: {"users": len(store.list_user_ids())} for name, store in self.shards.items()}
+        stats["_pending_moves"] = {"users": len(self._placement)}
+        return stats
+
+    # --- lifecycle ---
+
+    def flush(self):
+        for store in list(self.shards.values()):
+            flush = getattr(store, "flush", None)
+            if callable(flush):
+                flush()
+
+    def close(self):
+        for store in list(self.shards.values()):
+            close = getattr(store, "close", None)
+            if callable(close):
+                close()
@@ -1,17 +1,72 @@
+import logging
 import sqlite3
 import json
+import queue
+import threading
+from concurrent.futures import Future
 from datetime import datetime
-from typing import List
+from typing import Any, Callable, Dict, Iterator, List, Optional
 from ..interfaces import BaseDbProvider
-from ..schemas import UserMemory
+from ..schemas import UserMemory, MemoryPage
+from ..ranking import tokenize, reciprocal_rank_fusion
+
+logger = logging.getLogger(__name__)
 
 class SqliteProvider(BaseDbProvider):
-    """A real implementation of the DB provider using SQLite."""
-    def __init__(self, db_path: str = "agent_memory.db"):
+    """
+    A real implementation of the DB provider using SQLite.
+
+    With `concurrent=True` the database runs in WAL mode. Each thread reads
+    through its own connection, so readers never wait on the writer. All
+    writes go through one background writer thread. It drains queued writes
+    and group-commits them in a single transaction. Callers still block until
+    their own write is committed.
+    """
+    DEFAULT_PRAGMAS: Dict[str, Any] = {
+        "synchronous": "NORMAL",
+        "cache_size": -65536,       # 64 MiB page cache (negative = KiB)
+        "mmap_size": 268435456,     # 256 MiB memory-mapped I/O
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    }
+
+    def __init__(self,
+                 db_path: str = "agent_memory.db",
+                 concurrent: bool = False,
+                 pragmas: Optional[Dict[str, Any]] = None,
+                 max_write_batch: int = 256):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.concurrent = concurrent
+        self.pragmas = {**self.DEFAULT_PRAGMAS, **(pragmas or {})} if concurrent else dict(pragmas or {})
+        self.max_write_batch = max_write_batch
+
+        if concurrent and db_path == ":memory:":
+            raise ValueError("concurrent mode needs a file-backed database; ':memory:' is private to one connection")
+
+        self.conn = self._connect()
+        if concurrent:
+            self.conn.execute("PRAGMA journal_mode=WAL")
         self._create_table()
-        print(f"[SqliteProvider] Connected to DB: {db_path}")
+
+        self._local = threading.local()
+        self._read_conns: List[sqlite3.Connection] = []
+        self._read_conns_lock = threading.Lock()
+        self._write_queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        if concurrent:
+            # The writer thread takes sole ownership of self.conn
+            self._writer = threading.Thread(target=self._writer_loop, name="SqliteProvider-writer", daemon=True)
+            self._writer.start()
+
+        mode = " [concurrent, WAL]" if concurrent else ""
+        logger.info("[SqliteProvider] Connected to DB: %s%s", db_path, mode)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections are confined to one thread by construction; the flag only lets close() reach them
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
 
     def _create_table(self):
         with self.conn:
@@ -23,38 +78,293 @@ class SqliteProvider(BaseDbProvider):
                 updated_at TEXT NOT NULL
             )
             """)
-            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_user_id ON user_memories (user_id)")
+            # The composite index serves both the user filter and ORDER BY updated_at,
+            # which makes the old single-column index redundant.
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_user_updated ON user_memories (user_id, updated_at)")
+            self.conn.execute("DROP INDEX IF EXISTS idx_user_id")
+            # Bumped on every write so caches can detect staleness with one point lookup
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS user_memory_versions (
+                user_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+            """)
+        self.fts_enabled = self._create_fts_index()
+
+    def _create_fts_index(self) -> bool:
+        """
+        Adds an FTS5 index over memory content, kept in sync by triggers.
+        Returns False if this SQLite build lacks FTS5.
+        """
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_memories_fts'"
+        ).fetchone()
+        try:
+            with self.conn:
+                self.conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS user_memories_fts
+                USING fts5(content, content='user_memories', content_rowid='rowid')
+                """)
+                self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS user_memories_fts_ai AFTER INSERT ON user_memories BEGIN
+                    INSERT INTO user_memories_fts(rowid, content) VALUES (new.rowid, new.content);
+                END
+                """)
+                self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS user_memories_fts_ad AFTER DELETE ON user_memories BEGIN
+                    INSERT INTO user_memories_fts(user_memories_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+                END
+                """)
+                self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS user_memories_fts_au AFTER UPDATE OF content ON user_memories BEGIN
+                    INSERT INTO user_memories_fts(user_memories_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+                    INSERT INTO user_memories_fts(rowid, content) VALUES (new.rowid, new.content);
+                END
+                """)
+                if not exists:
+                    # Index rows written before the FTS table existed
+                    self.conn.execute("INSERT INTO user_memories_fts(user_memories_fts) VALUES ('rebuild')")
+        except sqlite3.OperationalError as e:
+            logger.warning("[SqliteProvider] FTS5 unavailable, relevance search falls back to Python: %s", e)
+            return False
+        return True
+
+    # --- connection routing ---
+
+    def _read_conn(self) -> sqlite3.Connection:
+        """The shared connection, or in concurrent mode this thread's own reader."""
+        if not self.concurrent:
+            return self.conn
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            conn.execute("PRAGMA query_only=ON")
+            self._local.conn = conn
+            with self._read_conns_lock:
+                self._read_conns.append(conn)
+        return conn
+
+    def _write(self, work: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Runs `work(conn)` in a write transaction, via the writer thread if concurrent."""
+        if not self.concurrent:
+            with self.conn:
+                return work(self.conn)
+        if self._writer is None:
+            raise RuntimeError("SqliteProvider is closed")
+        future: Future = Future()
+        self._write_queue.put((work, future))
+        return future.result()
+
+    def _writer_loop(self):
+        """Drains queued writes and commits each drained group in one transaction."""
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < self.max_write_batch:
+                try:
+                    item = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            results = []
+            try:
+                with self.conn:
+                    for work, _ in batch:
+                        results.append(work(self.conn))
+            except Exception:
+                # One write failed and rolled back the group; retry each on its own
+                # so only the offending caller sees the error.
+                for work, future in batch:
+                    try:
+                        with self.conn:
+                            future.set_result(work(self.conn))
+                    except Exception as e:
+                        future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            if stop:
+                return
+
+    def close(self):
+        """Stops the writer thread and closes every connection."""
+        if self._writer is not None:
+            self._write_queue.put(None)
+            self._writer.join()
+            self._writer = None
+        with self._read_conns_lock:
+            for conn in self._read_conns:
+                conn.close()
+            self._read_conns.clear()
+        self.conn.close()
+
+    # --- BaseDbProvider ---
 
     def get_memories(self, user_id: str) -> List[UserMemory]:
         """Gets all memories for a user, ordered by time."""
-        cursor = self.conn.cursor()
+        cursor = self._read_conn().cursor()
         cursor.execute(
-            "SELECT memory_id, user_id, content, updated_at FROM user_memories WHERE user_id = ? ORDER BY updated_at", 
+            "SELECT memory_id, user_id, content, updated_at FROM user_memories WHERE user_id = ? ORDER BY updated_at",
             (user_id,)
         )
         rows = cursor.fetchall()
         return [UserMemory(
-            memory_id=row[0], 
-            user_id=row[1], 
-            content=row[2], 
+            memory_id=row[0],
+            user_id=row[1],
+            content=row[2],
             updated_at=datetime.fromisoformat(row[3])
         ) for row in rows]
 
-    def upsert_memory(self, memory: UserMemory):
-        """Creates or updates a memory."""
-        print(f"[SqliteProvider] UPSERT Memory: {memory.memory_id}")
-        memory.updated_at = datetime.now() # Always update timestamp on write
-        with self.conn:
-            self.conn.execute("""
+    def list_user_ids(self) -> List[str]:
+        return [row[0] for row in self._read_conn().execute(
+            "SELECT DISTINCT user_id FROM user_memories ORDER BY user_id"
+        )]
+
+    def count_memories(self, user_id: str) -> int:
+        return self._read_conn().execute(
+            "SELECT COUNT(*) FROM user_memories WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+
+    def iter_memories(self, user_id: str, batch_size: int = 500,
+                      after: Optional[str] = None) -> Iterator[MemoryPage]:
+        """Keyset-paginated scan: each page is one indexed range read of `batch_size` rows."""
+        key = None
+        if after is not None:
+            updated_at, memory_id = self._parse_cursor(after)
+            key = (updated_at.isoformat(), memory_id)
+        while True:
+            if key is None:
+                rows = self._read_conn().execute(
+                    "SELECT memory_id, user_id, content, updated_at FROM user_memories "
+                    "WHERE user_id = ? ORDER BY updated_at, memory_id LIMIT ?",
+                    (user_id, batch_size)
+                ).fetchall()
+            else:
+                rows = self._read_conn().execute(
+                    "SELECT memory_id, user_id, content, updated_at FROM user_memories "
+                    "WHERE user_id = ? AND (updated_at, memory_id) > (?, ?) ORDER BY updated_at, memory_id LIMIT ?",
+                    (user_id, key[0], key[1], batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            batch = [UserMemory(
+                memory_id=row[0],
+                user_id=row[1],
+                content=row[2],
+                updated_at=datetime.fromisoformat(row[3])
+            ) for row in rows]
+            yield MemoryPage(memories=batch, cursor=self._memory_cursor(batch[-1]))
+            if len(rows) < batch_size:
+                return
+            key = (rows[-1][3], rows[-1][0])
+
+    def get_relevant_memories(self, user_id: str, query: str, limit: int,
+                              recency_weight: float = 0.3) -> List[UserMemory]:
+        """Blends FTS5 bm25 relevance with recency, reading only the top candidates."""
+        if not self.fts_enabled:
+            return super().get_relevant_memories(user_id, query, limit, recency_weight)
+
+        conn = self._read_conn()
+        pool = limit * 4
+        rows: Dict[str, tuple] = {}
+        lexical: List[str] = []
+        tokens = tokenize(query)
+        if tokens:
+            match = " OR ".join(f'"{token}"' for token in tokens)
+            for row in conn.execute("""
+                SELECT m.memory_id, m.user_id, m.content, m.updated_at
+                FROM user_memories_fts JOIN user_memories m ON m.rowid = user_memories_fts.rowid
+                WHERE user_memories_fts MATCH ? AND m.user_id = ?
+                ORDER BY bm25(user_memories_fts) LIMIT ?
+                """, (match, user_id, pool)):
+                rows[row[0]] = row
+                lexical.append(row[0])
+        recent: List[str] = []
+        for row in conn.execute(
+            "SELECT memory_id, user_id, content, updated_at FROM user_memories WHERE user_id = ? ORDER BY updated_at DESC LIMIT ?",
+            (user_id, pool)
+        ):
+            rows[row[0]] = row
+            recent.append(row[0])
+
+        ranked = reciprocal_rank_fusion([lexical, recent], [1.0 - recency_weight, recency_weight])
+        return [UserMemory(
+            memory_id=row[0],
+            user_id=row[1],
+            content=row[2],
+            updated_at=datetime.fromisoformat(row[3])
+        ) for row in (rows[mem_id] for mem_id in ranked[:limit])]
+
+    _UPSERT_SQL = """
             INSERT INTO user_memories (memory_id, user_id, content, updated_at)
             VALUES (?, ?, ?, ?)
             ON CONFLICT(memory_id) DO UPDATE SET
                 content=excluded.content,
                 updated_at=excluded.updated_at
-            """, (memory.memory_id, memory.user_id, memory.content, memory.updated_at.isoformat()))
+            """
+
+    def upsert_memory(self, memory: UserMemory):
+        """Creates or updates a memory."""
+        logger.debug("[SqliteProvider] UPSERT Memory: %s", memory.memory_id)
+        self._write(lambda conn: self._apply(conn, [memory], []))
 
     def delete_memory(self, memory_id: str):
         """Deletes a memory."""
-        print(f"[SqliteProvider] DELETE Memory: {memory_id}")
-        with self.conn:
-            self.conn.execute("DELETE FROM user_memories WHERE memory_id = ?", (memory_id,))
\ No newline at end of file
+        logger.debug("[SqliteProvider] DELETE Memory: %s", memory_id)
+        self._write(lambda conn: self._apply(conn, [], [memory_id]))
+
+    def _apply(self, conn: sqlite3.Connection, memories: List[UserMemory], memory_ids: List[str],
+               keep_timestamps: bool = False):
+        """Writes upserts then deletes, bumping each touched user's version once."""
+        touched = set()
+        if memories:
+            now = datetime.now() # Always update timestamp on write, unless importing
+            rows = []
+            for memory in memories:
+                if not keep_timestamps:
+                    memory.updated_at = now
+                rows.append((memory.memory_id, memory.user_id, memory.content, memory.updated_at.isoformat()))
+                touched.add(memory.user_id)
+            conn.executemany(self._UPSERT_SQL, rows)
+        if memory_ids:
+            for start in range(0, len(memory_ids), 500):
+                chunk = memory_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                touched.update(row[0] for row in conn.execute(
+                    f"SELECT DISTINCT user_id FROM user_memories WHERE memory_id IN ({placeholders})", chunk
+                ))
+            conn.executemany("DELETE FROM user_memories WHERE memory_id = ?", [(mid,) for mid in memory_ids])
+        if touched:
+            conn.executemany("""
+            INSERT INTO user_memory_versions (user_id, version) VALUES (?, 1)
+            ON CONFLICT(user_id) DO UPDATE SET version = version + 1
+            """, [(user_id,) for user_id in touched])
+
+    def upsert_many(self, memories: List[UserMemory], keep_timestamps: bool = False):
+        """Creates or updates many memories in a single transaction."""
+        logger.debug("[SqliteProvider] UPSERT %s memories", len(memories))
+        self._write(lambda conn: self._apply(conn, memories, [], keep_timestamps))
+
+    def delete_many(self, memory_ids: List[str]):
+        """Deletes many memories in a single transaction."""
+        logger.debug("[SqliteProvider] DELETE %s memories", len(memory_ids))
+        self._write(lambda conn: self._apply(conn, [], memory_ids))
+
+    def apply_batch(self, upserts: List[UserMemory], delete_ids: List[str]):
+        """Applies upserts and deletes atomically in one transaction."""
+        logger.debug("[SqliteProvider] APPLY batch: %s upsert(s), %s delete(s)", len(upserts), len(delete_ids))
+        self._write(lambda conn: self._apply(conn, upserts, delete_ids))
+
+    def get_memory_version(self, user_id: str) -> Optional[int]:
+        """Returns the user's write counter (0 if never written)."""
+        row = self._read_conn().execute(
+            "SELECT version FROM user_memory_versions WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return row[0] if row else 0
@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Any, Callable, Deque, Dict, List, Tuple
+
+# listener(stage, provider, seconds, error)
+Listener = Callable[[str, str, float, bool], None]
+
+_NULL_SPAN = nullcontext()
+
+class _StageStats:
+    """Counters plus a bounded window of recent durations for one (stage, provider)."""
+    __slots__ = ("count", "errors", "total", "max", "samples")
+
+    def __init__(self, max_samples: int):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+
+    def add(self, seconds: float, error: bool):
+        self.count += 1
+        self.errors += error
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+
+        def pct(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": 1000 * self.total / self.count if self.count else 0.0,
+            "p50_ms": 1000 * pct(0.50),
+            "p95_ms": 1000 * pct(0.95),
+            "p99_ms": 1000 * pct(0.99),
+            "max_ms": 1000 * self.max,
+        }
+
+class _Span:
+    __slots__ = ("_owner", "_stage", "_provider", "_start")
+
+    def __init__(self, owner: "Instrumentation", stage: str, provider: str):
+        self._owner = owner
+        self._stage = stage
+        self._provider = provider
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._owner.record(self._stage, self._provider, time.perf_counter() - self._start, exc_type is not None)
+        return False
+
+class Instrumentation:
+    """
+    Collects per-stage, per-provider latency histograms for the memory pipeline.
+
+    Wrap work in `with instrumentation.span("search", "ChromaProvider"):`.
+    Results are available from `snapshot()`, `to_json()` and `to_text()`, and
+    each finished span is also pushed to registered listeners. When disabled,
+    `span()` returns a shared no-op context, so instrumented code pays almost
+    nothing.
+    """
+    def __init__(self, enabled: bool = True, max_samples: int = 10_000):
+        self.enabled = enabled
+        self.max_samples = max_samples
+        self._stats: Dict[Tuple[str, str], _StageStats] = {}
+        self._listeners: List[Listener] = []
+        self._lock = threading.Lock()
+
+    def span(self, stage: str, provider: Any = ""):
+        """Times the enclosed block. `provider` may be a name or any object (its class name is used)."""
+        if not self.enabled:
+            return _NULL_SPAN
+        if not isinstance(provider, str):
+            provider = type(provider).__name__
+        return _Span(self, stage, provider)
+
+    def record(self, stage: str, provider: str, seconds: float, error: bool = False):
+        """Adds one measurement and notifies listeners."""
+        key = (stage, provider)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _StageStats(self.max_samples)
+            stats.add(seconds, error)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(stage, provider, seconds, error)
+
+    def add_listener(self, listener: Listener):
+        """Registers a callback invoked as listener(stage, provider, seconds, error)."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Listener):
+        with self._lock:
+            self._listeners.remove(listener)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Returns {stage: {provider: summary}} with count, errors, mean and p50/p95/p99/max in ms."""
+        with self._lock:
+            items = [(stage, provider, stats.summary()) for (stage, provider), stats in self._stats.items()]
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for stage, provider, summary in sorted(items):
+            result.setdefault(stage, {})[provider or "-"] = summary
+        return result
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_text(self) -> str:
+        """A fixed-width table of the snapshot."""
+        lines = [f"{'stage':<16} {'provider':<22} {'count':>7} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        for stage, providers in self.snapshot().items():
+            for provider, s in providers.items():
+                lines.append(
+                    f"{stage:<16} {provider:<22} {s['count']:>7} {s['errors']:>5} "
+                    f"{s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f} {s['max_ms']:>9.2f}"
+                )
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+# Process-wide default used by the managers unless one is passed in. Disabled
+# until enabled, e.g. `memory_lib.instrumentation.metrics.enabled = True`.
+metrics = Instrumentation(enabled=False)
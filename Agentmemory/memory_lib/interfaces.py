@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List, Type
-from .schemas import Message, UserMemory, BaseModel, VectorMemory, RetrievedMemory
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple, Type
+from .schemas import Message, UserMemory, BaseModel, VectorMemory, RetrievedMemory, MemoryPage, SearchResult
+from .ranking import tokenize, reciprocal_rank_fusion
 
 class BaseModelProvider(ABC):
     """Interface for any AI model provider."""
@@ -29,6 +31,93 @@ class BaseDbProvider(ABC):
         """Delete a memory by its ID."""
         pass
 
+    def upsert_many(self, memories: List[UserMemory], keep_timestamps: bool = False):
+        """
+        Create or update many memories. Writes normally stamp `updated_at`
+        with the current time; `keep_timestamps=True` stores each memory's own
+        `updated_at` instead (for imports and migrations). The default loops
+        over upsert_memory() and always stamps.
+        """
+        for memory in memories:
+            self.upsert_memory(memory)
+
+    def delete_many(self, memory_ids: List[str]):
+        """Delete many memories by ID. The default loops over delete_memory()."""
+        for memory_id in memory_ids:
+            self.delete_memory(memory_id)
+
+    def apply_batch(self, upserts: List[UserMemory], delete_ids: List[str]):
+        """
+        Applies a plan's writes: upserts first, then deletes. Providers with
+        transactions should override this to apply both atomically.
+        """
+        if upserts:
+            self.upsert_many(upserts)
+        if delete_ids:
+            self.delete_many(delete_ids)
+
+    def get_relevant_memories(self, user_id: str, query: str, limit: int,
+                              recency_weight: float = 0.3) -> List[UserMemory]:
+        """
+        Returns up to `limit` of the user's memories, best first, blending
+        lexical relevance to `query` with recency (`updated_at`) by weighted
+        reciprocal rank fusion. Providers with a full-text index should
+        override this; the default ranks get_memories() in Python.
+        """
+        memories = self.get_memories(user_id)
+        query_tokens = set(tokenize(query))
+        overlap = {mem.memory_id: len(query_tokens.intersection(tokenize(mem.content, max_tokens=256))) for mem in memories}
+        lexical = [mem.memory_id for mem in sorted(memories, key=lambda m: overlap[m.memory_id], reverse=True)
+                   if overlap[mem.memory_id] > 0]
+        recent = [mem.memory_id for mem in sorted(memories, key=lambda m: m.updated_at, reverse=True)]
+        by_id = {mem.memory_id: mem for mem in memories}
+        ranked = reciprocal_rank_fusion([lexical, recent], [1.0 - recency_weight, recency_weight])
+        return [by_id[mem_id] for mem_id in ranked[:limit]]
+
+    def get_memory_version(self, user_id: str) -> Optional[int]:
+        """
+        Returns a counter that changes whenever the user's memories change,
+        or None if the provider does not track versions.
+        """
+        return None
+
+    def list_user_ids(self) -> List[str]:
+        """Every user_id with at least one memory, sorted."""
+        raise NotImplementedError(f"{type(self).__name__} cannot list users")
+
+    def count_memories(self, user_id: str) -> int:
+        """
+        Number of memories stored for a user. Providers that can count without
+        reading the rows should override this; the default reads them all.
+        """
+        return len(self.get_memories(user_id))
+
+    def iter_memories(self, user_id: str, batch_size: int = 500,
+                      after: Optional[str] = None) -> Iterator[MemoryPage]:
+        """
+        Streams a user's memories in (updated_at, memory_id) order, one page
+        of up to `batch_size` at a time. Pass a page's `cursor` as `after` to
+        resume after it. Providers should override this with keyset paging so
+        memory use stays flat; the default pages over get_memories().
+        """
+        memories = sorted(self.get_memories(user_id), key=lambda m: (m.updated_at, m.memory_id))
+        if after is not None:
+            key = self._parse_cursor(after)
+            memories = [m for m in memories if (m.updated_at, m.memory_id) > key]
+        for start in range(0, len(memories), batch_size):
+            batch = memories[start:start + batch_size]
+            yield MemoryPage(memories=batch, cursor=self._memory_cursor(batch[-1]))
+
+    @staticmethod
+    def _memory_cursor(memory: UserMemory) -> str:
+        """Keyset cursor: the (updated_at, memory_id) of the last memory returned."""
+        return f"{memory.updated_at.isoformat()}|{memory.memory_id}"
+
+    @staticmethod
+    def _parse_cursor(cursor: str) -> Tuple[datetime, str]:
+        updated_at, _, memory_id = cursor.partition("|")
+        return datetime.fromisoformat(updated_at), memory_id
+
 
 
 class BaseEmbedder(ABC):
@@ -38,12 +127,53 @@ class BaseEmbedder(ABC):
         """Embeds a single string of text."""
         pass
 
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds many strings at once, returning one vector per input in order.
+        Providers with a batch API should override this; the default falls
+        back to one embed_text call per string.
+        """
+        return [self.embed_text(text) for text in texts]
+
 class BaseVectorStore(ABC):
     """Interface for any vector database provider."""
     @abstractmethod
     def search(self, user_id: str, embedding: List[float], limit: int) -> List[RetrievedMemory]:
         """Search for similar memories for a user."""
         pass
+
+    def search_many(self, user_id: str, embeddings: List[List[float]], limit: int,
+                    dedupe: bool = False) -> List[List[RetrievedMemory]]:
+        """
+        Runs several searches for a user, returning one result list per query.
+        If `dedupe` is True, each memory id is kept only in the list of the
+        query where it scored best (lowest score). Stores that can answer many
+        queries at once should override this; the default loops over search().
+        """
+        results = [self.search(user_id, embedding, limit) for embedding in embeddings]
+        return self._dedupe_results(results) if dedupe else results
+
+    def search_columns(self, user_id: str, embedding: List[float], limit: int) -> SearchResult:
+        """
+        Like search(), but returns parallel id/score/content columns. Stores
+        that can fill them without building a model per hit should override
+        this; the default converts search() results.
+        """
+        return SearchResult.from_memories(user_id, self.search(user_id, embedding, limit))
+
+    @staticmethod
+    def _dedupe_results(results: List[List[RetrievedMemory]]) -> List[List[RetrievedMemory]]:
+        """Keeps each memory id once across all result lists, at its best score."""
+        best: Dict[str, RetrievedMemory] = {}
+        for query_results in results:
+            for res in query_results:
+                current = best.get(res.id)
+                if current is None or res.score < current.score:
+                    best[res.id] = res
+        return [
+            [res for res in query_results if best[res.id] is res]
+            for query_results in results
+        ]
     
     @abstractmethod
     def upsert(self, memory: VectorMemory, embedding: List[float]):
@@ -54,8 +184,79 @@ class BaseVectorStore(ABC):
     def delete(self, memory_id: str):
         """Delete a memory by its ID."""
         pass
+
+    def upsert_many(self, memories: List[VectorMemory], embeddings: List[List[float]]):
+        """Create or update many memories. The default loops over upsert()."""
+        for memory, embedding in zip(memories, embeddings):
+            self.upsert(memory, embedding)
+
+    def delete_many(self, memory_ids: List[str], user_id: Optional[str] = None):
+        """
+        Delete many memories by ID. Callers that know the memories all belong
+        to `user_id` should pass it, so stores split by user can go straight
+        to that user's data. The default loops over delete().
+        """
+        for memory_id in memory_ids:
+            self.delete(memory_id)
     
     @abstractmethod
     def get_all_memories(self, user_id: str) -> List[VectorMemory]:
         """Gets all memories for a user, without embeddings."""
-        pass
\ No newline at end of file
+        pass
+
+    def list_user_ids(self) -> List[str]:
+        """Every user_id with at least one memory, sorted."""
+        raise NotImplementedError(f"{type(self).__name__} cannot list users")
+
+    def count_memories(self, user_id: str) -> int:
+        """
+        Number of memories stored for a user. Stores that can count without
+        reading the rows should override this; the default reads them all.
+        """
+        return len(self.get_all_memories(user_id))
+
+    def iter_memories(self, user_id: str, batch_size: int = 500,
+                      after: Optional[str] = None,
+                      include_embeddings: bool = False) -> Iterator[MemoryPage]:
+        """
+        Streams a user's memories, one page of up to `batch_size` at a time,
+        in the store's native order. Pass a page's `cursor` as `after` to
+        resume after it. Cursors are offsets, so writes made between pages
+        can shift what a later page contains. With `include_embeddings`, each
+        page also carries its stored vectors as a float32 (n, dim) array.
+        Stores should override this to page natively; the default slices
+        get_all_memories() and cannot return embeddings.
+        """
+        if include_embeddings:
+            raise NotImplementedError(f"{type(self).__name__} cannot export embeddings")
+        memories = self.get_all_memories(user_id)
+        offset = int(after) if after is not None else 0
+        for start in range(offset, len(memories), batch_size):
+            batch = memories[start:start + batch_size]
+            yield MemoryPage(memories=batch, cursor=str(start + len(batch)))
+
+class BaseLexicalIndex(ABC):
+    """
+    Interface for a keyword (full-text) index kept next to a vector store, so
+    exact tokens such as names, IDs and product codes can be matched without
+    an embedding.
+    """
+    @abstractmethod
+    def search(self, user_id: str, query: str, limit: int) -> List[RetrievedMemory]:
+        """Best keyword matches for a user, best first. Lower scores are better."""
+        pass
+
+    @abstractmethod
+    def upsert_many(self, memories: List[VectorMemory]):
+        """Index new memories or re-index changed ones."""
+        pass
+
+    @abstractmethod
+    def delete_many(self, memory_ids: List[str]):
+        """Remove memories from the index."""
+        pass
+
+    @abstractmethod
+    def delete_user(self, user_id: str):
+        """Remove all of a user's memories from the index."""
+        pass
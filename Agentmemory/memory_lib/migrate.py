@@ -0,0 +1,384 @@
+"""
+Bulk export, import and cross-provider migration of memories.
+
+An export directory holds numbered parts. `part-NNNNN.jsonl` has one memory
+per line. For vector stores, `part-NNNNN.npy` holds the matching float32
+(n, dim) embeddings, so an import never calls an embedder. `manifest.json`
+describes the export and is marked complete only at the end.
+`export.checkpoint.json` lets an interrupted export resume where it stopped.
+
+    python -m memory_lib.migrate export sqlite:memory.db ./dump
+    python -m memory_lib.migrate import ./dump postgres:"dbname=agent user=me"
+    python -m memory_lib.migrate migrate chroma:./chroma_db numpy:./vectors
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .interfaces import BaseDbProvider, BaseEmbedder, BaseVectorStore
+from .schemas import UserMemory, VectorMemory
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "memory_lib-export"
+VERSION = 1
+MANIFEST = "manifest.json"
+USERS = "users.json"
+EXPORT_CHECKPOINT = "export.checkpoint.json"
+IMPORT_CHECKPOINT = "import.checkpoint.json"
+
+# --- Providers by spec: "<name>:<path or DSN>", name from the provider registry ---
+
+def _spec_names() -> List[str]:
+    """DB and vector provider names usable in a spec, including presets and entry points."""
+    from .registry import available_providers
+    return sorted(set(available_providers("db")["db"]) | set(available_providers("vector")["vector"]))
+
+def open_provider(spec: str):
+    """
+    Opens a provider from a spec such as 'sqlite:memory.db' or 'chroma:./chroma_db'.
+    The name is resolved through the provider registry (DB, then vector
+    backends, including presets such as 'numpy-int8' and entry points); the
+    target becomes the provider's first argument.
+    """
+    from .registry import available_providers, create_provider
+    kind, sep, target = spec.partition(":")
+    if not sep or kind not in _spec_names():
+        raise ValueError(f"Provider spec must look like '<kind>:<target>' with kind in {_spec_names()}, got '{spec}'")
+    for registry_kind in ("db", "vector"):
+        if kind in available_providers(registry_kind)[registry_kind]:
+            return create_provider(kind, target, kind=registry_kind)
+
+def _close(provider: Any):
+    close = getattr(provider, "close", None)
+    if callable(close):
+        close()
+
+def _identity(provider: Any, explicit: Optional[str] = None) -> Optional[str]:
+    """
+    Fingerprint of where `provider` keeps its data, recorded in checkpoints
+    so progress is only resumed against the same store. Hashed, since a DSN
+    may hold a password. None for in-memory or unrecognised stores, which
+    never resume unless an `explicit` id is given.
+    """
+    if explicit is None:
+        location = next((getattr(provider, attr) for attr in ("db_path", "path", "conn_string")
+                         if getattr(provider, attr, None)), None)
+        if location is None or location == ":memory:":
+            return None
+        if not hasattr(provider, "conn_string"):
+            location = os.path.abspath(location)
+        explicit = json.dumps([type(provider).__name__, location, getattr(provider, "collection_name", None)])
+    return hashlib.sha256(explicit.encode("utf-8")).hexdigest()[:16]
+
+def _matching(checkpoint: Optional[Dict[str, Any]], **identities: Optional[str]) -> Optional[Dict[str, Any]]:
+    """`checkpoint` if it was written for these stores, else None (with a warning)."""
+    if checkpoint is None:
+        return None
+    if any(identity is None or checkpoint.get(name) != identity for name, identity in identities.items()):
+        logger.warning("[migrate] Ignoring a checkpoint written for a different or unidentifiable store; starting over")
+        return None
+    return checkpoint
+
+def _kind(provider: Any) -> str:
+    if isinstance(provider, BaseVectorStore):
+        return "vector"
+    if isinstance(provider, BaseDbProvider):
+        return "db"
+    raise TypeError("provider must be a BaseDbProvider or a BaseVectorStore")
+
+# --- Files ---
+
+def _write_json(path: str, payload: Dict[str, Any]):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _part_paths(directory: str, part: int) -> Tuple[str, str]:
+    stem = os.path.join(directory, f"part-{part:05d}")
+    return stem + ".jsonl", stem + ".npy"
+
+def _write_part(directory: str, part: int, memories: List[Any], embeddings: Optional[np.ndarray]):
+    """Writes one part atomically: embeddings first, so a visible .jsonl always has its .npy."""
+    jsonl_path, npy_path = _part_paths(directory, part)
+    if embeddings is not None:
+        with open(npy_path + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(embeddings, dtype=np.float32))
+        os.replace(npy_path + ".tmp", npy_path)
+    with open(jsonl_path + ".tmp", "w", encoding="utf-8") as f:
+        for memory in memories:
+            f.write(memory.model_dump_json())
+            f.write("\n")
+    os.replace(jsonl_path + ".tmp", jsonl_path)
+
+def _read_part(directory: str, part: int, kind: str) -> Tuple[List[Any], Optional[np.ndarray]]:
+    jsonl_path, npy_path = _part_paths(directory, part)
+    model = VectorMemory if kind == "vector" else UserMemory
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        memories = [model.model_validate_json(line) for line in f if line.strip()]
+    embeddings = np.load(npy_path) if kind == "vector" else None
+    return memories, embeddings
+
+# --- Conversion ---
+
+def _convert(memories: List[Any], embeddings: Optional[np.ndarray], target: Any,
+             embedder: Optional[BaseEmbedder]) -> Tuple[List[Any], Optional[np.ndarray]]:
+    """Maps memories to the target's schema, embedding them only when no stored vectors exist."""
+    if _kind(target) == "db":
+        if memories and isinstance(memories[0], VectorMemory):
+            memories = [UserMemory(memory_id=mem.id, user_id=mem.user_id, content=mem.content,
+                                   updated_at=mem.updated_at) for mem in memories]
+        return memories, None
+    if memories and isinstance(memories[0], UserMemory):
+        memories = [VectorMemory(id=mem.memory_id, user_id=mem.user_id, content=mem.content,
+                                 created_at=mem.updated_at, updated_at=mem.updated_at) for mem in memories]
+    if embeddings is None:
+        if embedder is None:
+            raise ValueError("Source has no stored embeddings; pass an embedder (--embedder on the command line) to write to a vector store")
+        embeddings = np.asarray(embedder.embed_texts([mem.content for mem in memories]), dtype=np.float32)
+    return memories, embeddings
+
+def _write(target: Any, memories: List[Any], embeddings: Optional[np.ndarray]):
+    if not memories:
+        return
+    if embeddings is not None:
+        target.upsert_many(memories, embeddings.tolist())
+    else:
+        target.upsert_many(memories, keep_timestamps=True)
+
+# --- Streaming ---
+
+def _pages(source: Any, user_ids: List[str], user_index: int, cursor: Optional[str],
+           batch_size: int, include_embeddings: bool) -> Iterator[Tuple[int, Any]]:
+    """Yields (user_index, page) from position (user_index, cursor) onwards."""
+    for index in range(user_index, len(user_ids)):
+        after = cursor if index == user_index else None
+        if include_embeddings:
+            pages = source.iter_memories(user_ids[index], batch_size=batch_size, after=after, include_embeddings=True)
+        else:
+            pages = source.iter_memories(user_ids[index], batch_size=batch_size, after=after)
+        for page in pages:
+            yield index, page
+
+def _summary(rows: int, chunks: int, users: int, started: float, unit: str = "parts") -> Dict[str, Any]:
+    seconds = time.perf_counter() - started
+    return {"users": users, "rows": rows, unit: chunks, "seconds": seconds,
+            "rows_per_sec": rows / seconds if seconds > 0 else 0.0}
+
+def export_memories(source: Any, out_dir: str, user_ids: Optional[List[str]] = None,
+                    batch_size: int = 5000, resume: bool = True,
+                    source_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Streams every memory of `user_ids` (default: all users) into `out_dir`,
+    about `batch_size` rows per part. Vector stores export their stored
+    embeddings. A checkpoint is written after each part, so with
+    `resume=True` a rerun from the same source (see `import_memories` for
+    identity) continues an interrupted export instead of starting over.
+    Returns row/part counts and throughput.
+    """
+    kind = _kind(source)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    checkpoint_path = os.path.join(out_dir, EXPORT_CHECKPOINT)
+    started = time.perf_counter()
+    identity = _identity(source, source_id)
+
+    manifest = _matching(_read_json(manifest_path) if resume else None, source=identity)
+    if manifest is not None and manifest.get("complete"):
+        logger.info("[migrate] Export at %s is already complete (%s rows)", out_dir, manifest["rows"])
+        return _summary(0, 0, len(manifest["users"]), started)
+
+    checkpoint = _matching(_read_json(checkpoint_path) if resume else None, source=identity)
+    if checkpoint is not None:
+        users = _read_json(os.path.join(out_dir, USERS))["users"]
+        logger.info("[migrate] Resuming export at user %s/%s, part %s", checkpoint["user_index"], len(users), checkpoint["next_part"])
+    else:
+        for name in os.listdir(out_dir):
+            if name.startswith("part-") or name in (MANIFEST, EXPORT_CHECKPOINT):
+                os.remove(os.path.join(out_dir, name))
+        users = sorted(user_ids) if user_ids is not None else source.list_user_ids()
+        _write_json(os.path.join(out_dir, USERS), {"users": users})
+        checkpoint = {"user_index": 0, "cursor": None, "next_part": 0, "rows": 0, "dim": None}
+
+    part, rows, dim = checkpoint["next_part"], checkpoint["rows"], checkpoint["dim"]
+    memories: List[Any] = []
+    embeddings: List[np.ndarray] = []
+    position = (checkpoint["user_index"], checkpoint["cursor"])
+
+    def flush():
+        nonlocal part, rows, memories, embeddings
+        block = np.concatenate(embeddings) if kind == "vector" else None
+        _write_part(out_dir, part, memories, block)
+        part, rows = part + 1, rows + len(memories)
+        _write_json(checkpoint_path, {"source": identity, "user_index": position[0], "cursor": position[1],
+                                      "next_part": part, "rows": rows, "dim": dim})
+        logger.debug("[migrate] Wrote part %s (%s rows total)", part - 1, rows)
+        memories, embeddings = [], []
+
+    for index, page in _pages(source, users, checkpoint["user_index"], checkpoint["cursor"],
+                              batch_size, include_embeddings=kind == "vector"):
+        memories.extend(page.memories)
+        if kind == "vector":
+            embeddings.append(page.embeddings)
+            dim = dim or int(page.embeddings.shape[1])
+        position = (index, page.cursor)
+        if len(memories) >= batch_size:
+            flush()
+    if memories:
+        flush()
+
+    _write_json(manifest_path, {"format": FORMAT, "version": VERSION, "kind": kind, "source": identity, "users": users,
+                                "parts": part, "rows": rows, "dim": dim, "complete": True})
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    summary = _summary(rows - checkpoint["rows"], part - checkpoint["next_part"], len(users), started)
+    logger.info("[migrate] Exported %s rows in %s parts to %s (%.0f rows/s)", rows, part, out_dir, summary["rows_per_sec"])
+    return summary
+
+def import_memories(target: Any, in_dir: str, embedder: Optional[BaseEmbedder] = None,
+                    resume: bool = True, target_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Loads a complete export into `target` one part at a time. Stored
+    embeddings are reused; `embedder` is only needed to load a DB export
+    into a vector store. Original timestamps are kept. Progress is
+    checkpointed per part in the export directory, tagged with the target's
+    identity (its path or DSN, or `target_id`). A rerun into the same target
+    continues after a failure; any other target starts from the first part.
+    """
+    manifest = _read_json(os.path.join(in_dir, MANIFEST))
+    if manifest is None or manifest.get("format") != FORMAT:
+        raise ValueError(f"{in_dir} is not a memory export")
+    if not manifest.get("complete"):
+        raise ValueError(f"Export at {in_dir} is incomplete; rerun the export to finish it")
+    checkpoint_path = os.path.join(in_dir, IMPORT_CHECKPOINT)
+    identity = _identity(target, target_id)
+    checkpoint = _matching(_read_json(checkpoint_path) if resume else None, target=identity)
+    checkpoint = checkpoint or {"next_part": 0, "rows": 0}
+    started = time.perf_counter()
+
+    rows = 0
+    for part in range(checkpoint["next_part"], manifest["parts"]):
+        memories, embeddings = _read_part(in_dir, part, manifest["kind"])
+        memories, embeddings = _convert(memories, embeddings, target, embedder)
+        _write(target, memories, embeddings)
+        rows += len(memories)
+        _write_json(checkpoint_path, {"target": identity, "next_part": part + 1, "rows": checkpoint["rows"] + rows})
+
+    flush = getattr(target, "flush", None)
+    if callable(flush):
+        flush()
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    summary = _summary(rows, manifest["parts"] - checkpoint["next_part"], len(manifest["users"]), started)
+    logger.info("[migrate] Imported %s rows from %s (%.0f rows/s)", rows, in_dir, summary["rows_per_sec"])
+    return summary
+
+def migrate(source: Any, target: Any, user_ids: Optional[List[str]] = None, batch_size: int = 5000,
+            checkpoint_path: Optional[str] = None, embedder: Optional[BaseEmbedder] = None,
+            source_id: Optional[str] = None, target_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Copies memories straight from `source` to `target`, one page at a time,
+    reusing stored embeddings when both are vector stores. With
+    `checkpoint_path`, progress is saved after every page and a rerun
+    between the same two stores (see `import_memories` for identity)
+    resumes from it.
+    """
+    include_embeddings = _kind(source) == "vector" and _kind(target) == "vector"
+    identities = {"source": _identity(source, source_id), "target": _identity(target, target_id)}
+    checkpoint = _matching(_read_json(checkpoint_path) if checkpoint_path else None, **identities)
+    if checkpoint is None:
+        users = sorted(user_ids) if user_ids is not None else source.list_user_ids()
+        checkpoint = {"users": users, "user_index": 0, "cursor": None, "rows": 0}
+    else:
+        logger.info("[migrate] Resuming migration at user %s/%s", checkpoint["user_index"], len(checkpoint["users"]))
+    users = checkpoint["users"]
+    started = time.perf_counter()
+
+    rows = pages = 0
+    for index, page in _pages(source, users, checkpoint["user_index"], checkpoint["cursor"],
+                              batch_size, include_embeddings):
+        memories, embeddings = _convert(page.memories, page.embeddings, target, embedder)
+        _write(target, memories, embeddings)
+        rows, pages = rows + len(memories), pages + 1
+        if checkpoint_path:
+            _write_json(checkpoint_path, {**identities, "users": users, "user_index": index,
+                                          "cursor": page.cursor, "rows": checkpoint["rows"] + rows})
+
+    flush = getattr(target, "flush", None)
+    if callable(flush):
+        flush()
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    summary = _summary(rows, pages, len(users), started, unit="pages")
+    logger.info("[migrate] Migrated %s rows for %s users (%.0f rows/s)", rows, len(users), summary["rows_per_sec"])
+    return summary
+
+# --- CLI ---
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m memory_lib.migrate", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per page and per part")
+    parser.add_argument("--users", help="comma-separated user ids to export or migrate (default: all)")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="write a provider's memories to a directory")
+    export.add_argument("source", help=f"provider spec, kind one of {_spec_names()}")
+    export.add_argument("out_dir")
+    export.add_argument("--restart", action="store_true", help="ignore any checkpoint and start over")
+
+    load = commands.add_parser("import", help="load an export directory into a provider")
+    load.add_argument("in_dir")
+    load.add_argument("target", help="provider spec")
+    load.add_argument("--restart", action="store_true", help="ignore any checkpoint and start over")
+    load.add_argument("--embedder", help="embedder provider name, needed to load a DB export into a vector store")
+
+    copy = commands.add_parser("migrate", help="copy memories directly between providers")
+    copy.add_argument("source", help="provider spec")
+    copy.add_argument("target", help="provider spec")
+    copy.add_argument("--checkpoint", help="file to record progress in, for resuming")
+    copy.add_argument("--embedder", help="embedder provider name, needed to migrate a DB into a vector store")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    user_ids = args.users.split(",") if args.users else None
+    embedder = None
+    if getattr(args, "embedder", None):
+        from .registry import create_provider
+        embedder = create_provider(args.embedder, kind="embedder")
+
+    if args.command == "export":
+        source = open_provider(args.source)
+        try:
+            summary = export_memories(source, args.out_dir, user_ids, args.batch_size, resume=not args.restart)
+        finally:
+            _close(source)
+    elif args.command == "import":
+        target = open_provider(args.target)
+        try:
+            summary = import_memories(target, args.in_dir, embedder, resume=not args.restart)
+        finally:
+            _close(target)
+    else:
+        source, target = open_provider(args.source), open_provider(args.target)
+        try:
+            summary = migrate(source, target, user_ids, args.batch_size, args.checkpoint, embedder)
+        finally:
+            _close(source)
+            _close(target)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
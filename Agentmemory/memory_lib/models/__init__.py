@@ -1,4 +1,22 @@
-from .openai_provider import OpenAIProvider
-from .openai_embedder import OpenAIEmbedder
+# Providers are imported on first attribute access; see memory_lib/db/__init__.py.
+import importlib
 
-__all__ = ["OpenAIProvider", "OpenAIEmbedder"]
\ No newline at end of file
+_EXPORTS = {
+    "OpenAIProvider": ".openai_provider",
+    "OpenAIEmbedder": ".openai_embedder",
+    "CachedEmbedder": ".cached_embedder",
+    "CachedModelProvider": ".cached_provider",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
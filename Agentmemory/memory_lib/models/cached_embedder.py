@@ -0,0 +1,166 @@
+import logging
+import hashlib
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from ..interfaces import BaseEmbedder
+
+logger = logging.getLogger(__name__)
+
+class CachedEmbedder(BaseEmbedder):
+    """
+    Wraps any BaseEmbedder with a content-addressed cache.
+
+    Vectors are keyed on a hash of (model name, normalized text) and kept as
+    compact float32 arrays in a bounded in-memory LRU. If `db_path` is given,
+    a persistent SQLite tier stores the same float32 blobs so the cache
+    survives restarts.
+    """
+    def __init__(self,
+                 embedder: BaseEmbedder,
+                 max_entries: int = 10_000,
+                 db_path: Optional[str] = None,
+                 model_name: Optional[str] = None):
+        if not isinstance(embedder, BaseEmbedder):
+            raise TypeError("embedder must be an instance of BaseEmbedder")
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.embedder = embedder
+        self.max_entries = max_entries
+        self.model_name = model_name or getattr(embedder, "model", type(embedder).__name__)
+        self._lru: "OrderedDict[str, array]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.conn: Optional[sqlite3.Connection] = None
+        if db_path:
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._create_table()
+        logger.info("[CachedEmbedder] Initialized for model '%s' (max_entries=%s, db_path=%s)", self.model_name, max_entries, db_path)
+
+    def _create_table(self):
+        with self.conn:
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                cache_key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL
+            )
+            """)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Collapses whitespace so trivially different strings share a key."""
+        return " ".join(text.split())
+
+    def _key(self, text: str) -> str:
+        raw = f"{self.model_name}\x00{self._normalize(text)}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def _remember(self, key: str, vector: array):
+        """Inserts into the LRU, evicting the oldest entries past capacity."""
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def _load_from_disk(self, keys: List[str]) -> Dict[str, array]:
+        found: Dict[str, array] = {}
+        if self.conn is None or not keys:
+            return found
+        # Stay under SQLite's default bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT cache_key, vector FROM embedding_cache WHERE cache_key IN ({placeholders})",
+                chunk
+            ).fetchall()
+            for key, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                found[key] = vector
+        return found
+
+    def _store_to_disk(self, entries: Dict[str, array]):
+        if self.conn is None or not entries:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (cache_key, vector) VALUES (?, ?)",
+                [(key, vector.tobytes()) for key, vector in entries.items()]
+            )
+
+    def embed_text(self, text: str) -> List[float]:
+        """Embeds a single string of text, served from cache when possible."""
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds many strings. Cache misses (deduplicated) are sent to the
+        wrapped embedder in a single batched call.
+        """
+        keys = [self._key(text) for text in texts]
+        resolved: Dict[str, array] = {}
+        missing: "OrderedDict[str, str]" = OrderedDict()
+
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key in resolved or key in missing:
+                    continue
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    resolved[key] = vector
+                    self.hits += 1
+                else:
+                    missing[key] = text
+
+            from_disk = self._load_from_disk(list(missing.keys()))
+            for key, vector in from_disk.items():
+                del missing[key]
+                resolved[key] = vector
+                self._remember(key, vector)
+                self.disk_hits += 1
+
+        if missing:
+            fresh = self.embedder.embed_texts(list(missing.values()))
+            new_entries = {key: array("f", vector) for key, vector in zip(missing.keys(), fresh)}
+            with self._lock:
+                self.misses += len(new_entries)
+                for key, vector in new_entries.items():
+                    self._remember(key, vector)
+                self._store_to_disk(new_entries)
+            resolved.update(new_entries)
+
+        return [resolved[key].tolist() for key in keys]
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hit/miss counters for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._lru),
+                "max_entries": self.max_entries,
+            }
+
+    def clear(self):
+        """Drops the in-memory tier and resets the counters."""
+        with self._lock:
+            self._lru.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def close(self):
+        """Closes the persistent tier, if any."""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,180 @@
+import logging
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple, Type
+from ..interfaces import BaseModelProvider
+from ..schemas import Message, BaseModel
+
+logger = logging.getLogger(__name__)
+
+class CachedModelProvider(BaseModelProvider):
+    """
+    Wraps any BaseModelProvider and memoizes structured completions.
+
+    Responses are keyed on a hash of (model name, messages, output schema) and
+    kept in a bounded in-memory LRU. If `db_path` is given, they also go to a
+    persistent SQLite tier. Entries expire after `ttl` seconds (one day by
+    default; None keeps them forever). Only successful completions of the
+    requested type are cached; a provider that raises is never cached.
+    Concurrent identical requests are single-flighted: only one reaches the
+    wrapped provider and the others wait for its answer.
+    """
+    def __init__(self,
+                 provider: BaseModelProvider,
+                 max_entries: int = 1024,
+                 ttl: Optional[float] = 86400.0,
+                 db_path: Optional[str] = None,
+                 model_name: Optional[str] = None):
+        if not isinstance(provider, BaseModelProvider):
+            raise TypeError("provider must be an instance of BaseModelProvider")
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive, or None for no expiry")
+
+        self.provider = provider
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.model_name = model_name or getattr(provider, "model", type(provider).__name__)
+        # key -> (response JSON, expires_at or None)
+        self._lru: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        self.conn: Optional[sqlite3.Connection] = None
+        if db_path:
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._create_table()
+        logger.info("[CachedModelProvider] Initialized for model '%s' (max_entries=%s, ttl=%s, db_path=%s)", self.model_name, max_entries, ttl, db_path)
+
+    def _create_table(self):
+        with self.conn:
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS completion_cache (
+                cache_key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                expires_at REAL
+            )
+            """)
+
+    def _key(self, messages: List[Message], output_model: Type[BaseModel]) -> str:
+        payload = json.dumps({
+            "model": self.model_name,
+            "messages": [[msg.role, msg.content] for msg in messages],
+            "schema": [output_model.__name__, output_model.model_json_schema()],
+        }, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[str]:
+        """Returns a live cached response, checking memory then disk. Caller holds the lock."""
+        now = time.time()
+        entry = self._lru.get(key)
+        if entry is not None:
+            response, expires_at = entry
+            if expires_at is None or expires_at > now:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return response
+            del self._lru[key]
+
+        if self.conn is not None:
+            row = self.conn.execute(
+                "SELECT response, expires_at FROM completion_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is not None and (row[1] is None or row[1] > now):
+                self._remember(key, row[0], row[1])
+                self.disk_hits += 1
+                return row[0]
+        return None
+
+    def _remember(self, key: str, response: str, expires_at: Optional[float]):
+        self._lru[key] = (response, expires_at)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get_structured_completion(self, messages: List[Message], output_model: Type[BaseModel]) -> BaseModel:
+        """Returns a cached completion, or asks the wrapped provider once."""
+        key = self._key(messages, output_model)
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                return output_model.model_validate_json(cached)
+            leader = self._in_flight.get(key)
+            if leader is None:
+                future: Future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if leader is not None:
+            # Another thread is already asking; share its answer, or ask
+            # ourselves if it didn't produce a cacheable one
+            try:
+                return output_model.model_validate_json(leader.result())
+            except Exception:
+                return self.provider.get_structured_completion(messages, output_model)
+
+        try:
+            response = self.provider.get_structured_completion(messages, output_model)
+        except Exception as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        response_json = response.model_dump_json()
+        with self._lock:
+            del self._in_flight[key]
+            # Providers may fall back to a placeholder of another type on failure; never cache those
+            if isinstance(response, output_model):
+                expires_at = time.time() + self.ttl if self.ttl is not None else None
+                self._remember(key, response_json, expires_at)
+                if self.conn is not None:
+                    with self.conn:
+                        self.conn.execute(
+                            "INSERT OR REPLACE INTO completion_cache (cache_key, response, expires_at) VALUES (?, ?, ?)",
+                            (key, response_json, expires_at)
+                        )
+        if isinstance(response, output_model):
+            future.set_result(response_json)
+        else:
+            future.set_exception(ValueError(f"Provider returned {type(response).__name__}, expected {output_model.__name__}"))
+        return response
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hit/miss counters for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits + self.disk_hits + self.coalesced) / lookups if lookups else 0.0,
+                "entries": len(self._lru),
+                "max_entries": self.max_entries,
+            }
+
+    def clear(self):
+        """Drops the in-memory tier and resets the counters."""
+        with self._lock:
+            self._lru.clear()
+            self.hits = self.disk_hits = self.misses = self.coalesced = 0
+
+    def close(self):
+        """Closes the persistent tier, if any."""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
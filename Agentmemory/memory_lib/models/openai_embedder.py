@@ -1,20 +1,43 @@
+import logging
 import os
-from openai import OpenAI
 from typing import List, Optional
 from ..interfaces import BaseEmbedder
 
+logger = logging.getLogger(__name__)
+
 class OpenAIEmbedder(BaseEmbedder):
     """Creates embeddings using OpenAI."""
-    def __init__(self, model: str = "text-embedding-3-small", api_key: Optional[str] = None):
+    def __init__(self,
+                 model: str = "text-embedding-3-small",
+                 api_key: Optional[str] = None,
+                 max_batch_size: int = 256):
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not found in .env file.")
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        from openai import OpenAI # Imported on first use to keep `import memory_lib` fast
         self.client = OpenAI(api_key=self.api_key)
         self.model = model
-        print(f"[OpenAIEmbedder] Initialized with model: {self.model}")
+        self.max_batch_size = max_batch_size
+        logger.info("[OpenAIEmbedder] Initialized with model: %s", self.model)
 
     def embed_text(self, text: str) -> List[float]:
         """Embeds a single string of text."""
-        text = text.replace("\n", " ") # Per OpenAI recommendation
-        response = self.client.embeddings.create(input=[text], model=self.model)
-        return response.data[0].embedding
\ No newline at end of file
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds many strings, sending up to `max_batch_size` inputs per request.
+        Results are returned in the same order as `texts`.
+        """
+        cleaned = [text.replace("\n", " ") for text in texts] # Per OpenAI recommendation
+        embeddings: List[List[float]] = []
+
+        for start in range(0, len(cleaned), self.max_batch_size):
+            chunk = cleaned[start:start + self.max_batch_size]
+            response = self.client.embeddings.create(input=chunk, model=self.model)
+            # The API tags each item with its input index; don't rely on list order
+            for item in sorted(response.data, key=lambda d: d.index):
+                embeddings.append(item.embedding)
+        return embeddings
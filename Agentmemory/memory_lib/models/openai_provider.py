@@ -1,9 +1,11 @@
+import logging
 import os
 import json
-from openai import OpenAI
 from typing import List, Type, Optional
 from ..interfaces import BaseModelProvider
-from ..schemas import Message, BaseModel, MemoryUpdatePlan
+from ..schemas import Message, BaseModel
+
+logger = logging.getLogger(__name__)
 
 class OpenAIProvider(BaseModelProvider):
     """A real implementation of the AI provider using OpenAI."""
@@ -11,16 +13,17 @@ class OpenAIProvider(BaseModelProvider):
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not found in .env file.")
+        from openai import OpenAI # Imported on first use to keep `import memory_lib` fast
         self.client = OpenAI(api_key=self.api_key)
         self.model = model
-        print(f"[OpenAIProvider] Initialized with model: {self.model}")
+        logger.info("[OpenAIProvider] Initialized with model: %s", self.model)
 
     def get_structured_completion(self, messages: List[Message], output_model: Type[BaseModel]) -> BaseModel:
         """
         Gets a real, structured JSON completion from the OpenAI API.
         This is not a mock.
         """
-        print("[OpenAIProvider] Getting structured completion from API...")
+        logger.debug("[OpenAIProvider] Getting structured completion from API...")
         
         api_messages = [msg.model_dump() for msg in messages]
 
@@ -55,14 +58,13 @@ class OpenAIProvider(BaseModelProvider):
             if not response_args:
                 raise ValueError("Received empty tool call arguments from API.")
                 
-            print("[OpenAIProvider] Received and parsing tool call JSON response.")
+            logger.debug("[OpenAIProvider] Received and parsing tool call JSON response.")
             
             # Parse the raw JSON string from the tool call
             parsed_data = json.loads(response_args)
             return output_model.model_validate(parsed_data)
 
         except Exception as e:
-            print(f"[OpenAIProvider] CRITICAL ERROR: {e}")
-            print(f"[OpenAIProvider] Returning an empty plan to prevent errors.")
-            # On failure, return an empty plan to avoid crashing the manager
-            return MemoryUpdatePlan(plan=[])
\ No newline at end of file
+            # Raise rather than return a placeholder, so callers (and caches) can tell a failure from an answer
+            logger.error("[OpenAIProvider] CRITICAL ERROR: %s", e)
+            raise
\ No newline at end of file
@@ -0,0 +1,39 @@
+import re
+from typing import Dict, Hashable, List, Optional, Sequence
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text: str, min_length: int = 2, max_tokens: int = 32) -> List[str]:
+    """Lower-cased, de-duplicated word tokens, safe to splice into FTS queries."""
+    seen: Dict[str, None] = {}
+    for token in _TOKEN_RE.findall(text.lower()):
+        if len(token) >= min_length:
+            seen.setdefault(token, None)
+            if len(seen) >= max_tokens:
+                break
+    return list(seen)
+
+def reciprocal_rank_scores(rankings: Sequence[Sequence[Hashable]],
+                           weights: Optional[Sequence[float]] = None,
+                           k: int = 60) -> Dict[Hashable, float]:
+    """
+    Scores each id by sum(weight / (k + rank)) over several best-first
+    rankings. Ids missing from a ranking get nothing from it.
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[Hashable, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, item in enumerate(ranking):
+            scores[item] = scores.get(item, 0.0) + weight / (k + rank + 1)
+    return scores
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]],
+                           weights: Optional[Sequence[float]] = None,
+                           k: int = 60) -> List[Hashable]:
+    """Fuses several best-first rankings of ids into one, best first (see reciprocal_rank_scores)."""
+    scores = reciprocal_rank_scores(rankings, weights, k)
+    return sorted(scores, key=lambda item: scores[item], reverse=True)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for prompt budgeting."""
+    return len(text) // 4 + 1
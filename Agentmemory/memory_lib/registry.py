@@ -0,0 +1,148 @@
+"""
+Resolves providers by name, importing each backend only when it is asked for.
+
+    from memory_lib import create_provider
+    db = create_provider("sqlite", db_path="memory.db")
+    vector_db = create_provider("chroma", path="./chroma_db")
+
+Some names are presets of another backend: "numpy-int8" is a
+QuantizedVectorStore with mode="int8". Arguments given to create_provider
+override the preset's.
+
+Third-party packages can add backends through entry points, one group per
+kind (see ENTRY_POINT_GROUPS), e.g. in pyproject.toml:
+
+    [project.entry-points."memory_lib.vector_providers"]
+    faiss = "my_package.faiss_store:FaissVectorStore"
+"""
+import importlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("db", "vector", "model", "embedder", "lexical")
+
+ENTRY_POINT_GROUPS = {kind: f"memory_lib.{kind}_providers" for kind in KINDS}
+
+# kind -> name -> "module:attribute" or an already imported class
+_REGISTRY: Dict[str, Dict[str, Union[str, type]]] = {
+    "db": {
+        "sqlite": "memory_lib.db.sqlite_provider:SqliteProvider",
+        "sqlite-wal": "memory_lib.db.sqlite_provider:SqliteProvider",
+        "postgres": "memory_lib.db.postgres_provider:PostgresProvider",
+    },
+    "vector": {
+        "chroma": "memory_lib.db.chroma_provider:ChromaProvider",
+        "numpy": "memory_lib.db.numpy_provider:NumpyVectorStore",
+        "quantized": "memory_lib.db.quantized_provider:QuantizedVectorStore",
+        "numpy-int8": "memory_lib.db.quantized_provider:QuantizedVectorStore",
+        "numpy-float16": "memory_lib.db.quantized_provider:QuantizedVectorStore",
+        "ivf": "memory_lib.db.ivf_provider:IVFVectorStore",
+        "numpy-ivf": "memory_lib.db.ivf_provider:IVFVectorStore",
+        # ShardedVectorStore is left out: it wraps other stores, so it cannot be built from one target
+    },
+    "model": {
+        "openai": "memory_lib.models.openai_provider:OpenAIProvider",
+        "cached": "memory_lib.models.cached_provider:CachedModelProvider",
+    },
+    "embedder": {
+        "openai": "memory_lib.models.openai_embedder:OpenAIEmbedder",
+        "cached": "memory_lib.models.cached_embedder:CachedEmbedder",
+    },
+    "lexical": {
+        "sqlite": "memory_lib.db.lexical_provider:SqliteLexicalIndex",
+    },
+}
+
+# kind -> name -> keyword arguments create_provider passes by default
+_PRESETS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "db": {"sqlite-wal": {"concurrent": True}},
+    "vector": {"numpy-int8": {"mode": "int8"}, "numpy-float16": {"mode": "float16"}},
+    "model": {},
+    "embedder": {},
+    "lexical": {},
+}
+
+_loaded_groups = set()
+_lock = threading.Lock()
+
+def _check_kind(kind: str):
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {KINDS}, got '{kind}'")
+
+def _load_entry_points(kind: str):
+    """Adds entry-point backends for `kind`, without importing them. Runs once per kind."""
+    with _lock:
+        if kind in _loaded_groups:
+            return
+        _loaded_groups.add(kind)
+        try:
+            from importlib.metadata import entry_points
+            found = entry_points()
+            group = ENTRY_POINT_GROUPS[kind]
+            points = found.select(group=group) if hasattr(found, "select") else found.get(group, [])
+        except Exception as e:
+            logger.warning("[registry] Could not read entry points for '%s': %s", kind, e)
+            return
+        for point in points:
+            # Built-in and explicitly registered names win over entry points
+            _REGISTRY[kind].setdefault(point.name, point.value)
+
+def register_provider(kind: str, name: str, target: Union[str, type],
+                      defaults: Optional[Dict[str, Any]] = None):
+    """
+    Registers `target` (a class, or a lazy "module:attribute" string) as
+    provider `name` of `kind`. `defaults` are keyword arguments that
+    create_provider passes unless the caller overrides them, which makes
+    `name` a preset of `target`.
+    """
+    _check_kind(kind)
+    if not isinstance(target, (str, type)):
+        raise TypeError("target must be a class or a 'module:attribute' string")
+    with _lock:
+        _REGISTRY[kind][name] = target
+        if defaults:
+            _PRESETS[kind][name] = dict(defaults)
+        else:
+            _PRESETS[kind].pop(name, None)
+
+def available_providers(kind: Optional[str] = None) -> Dict[str, List[str]]:
+    """Provider names per kind, including entry points, without importing any of them."""
+    kinds = KINDS if kind is None else (kind,)
+    for each in kinds:
+        _check_kind(each)
+        _load_entry_points(each)
+    return {each: sorted(_REGISTRY[each]) for each in kinds}
+
+def get_provider(name: str, kind: Optional[str] = None) -> type:
+    """
+    Returns the provider class registered as `name`, importing it now.
+    Without `kind`, kinds are searched in KINDS order, so "sqlite" is the
+    DB provider and "openai" the model provider.
+    """
+    return _resolve(name, kind)[1]
+
+def _resolve(name: str, kind: Optional[str]) -> Tuple[str, type]:
+    """The kind `name` was found under and its class."""
+    kinds = KINDS if kind is None else (kind,)
+    for each in kinds:
+        _check_kind(each)
+        _load_entry_points(each)
+        target = _REGISTRY[each].get(name)
+        if target is None:
+            continue
+        if isinstance(target, str):
+            module_name, _, attribute = target.partition(":")
+            target = getattr(importlib.import_module(module_name), attribute)
+            with _lock:
+                _REGISTRY[each][name] = target
+        return each, target
+    known = sorted({known for each in kinds for known in _REGISTRY[each]})
+    raise ValueError(f"Unknown provider '{name}'{f' of kind {kind}' if kind else ''}. Available: {known}")
+
+def create_provider(name: str, *args: Any, kind: Optional[str] = None, **kwargs: Any) -> Any:
+    """Instantiates the provider registered as `name` with its preset and the given arguments."""
+    found, provider = _resolve(name, kind)
+    return provider(*args, **{**_PRESETS[found].get(name, {}), **kwargs})
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field  # <-- CORRECT IMPORT
-from typing import Any, Dict, List, Optional, Literal
+from typing import Any, Dict, List, Optional, Literal, Sequence, Union
 from uuid import uuid4
 from datetime import datetime
 
@@ -47,6 +47,36 @@ class RetrievedMemory(BaseModel):
     score: float
     user_id: str
 
+class SearchResult:
+    """
+    Columnar search results for one query: parallel `ids`, `scores`
+    (distances, lower is better) and `contents`, best first. Returned by
+    `BaseVectorStore.search_columns` for callers that only need the top-k
+    text, without building one model per hit.
+    """
+    __slots__ = ("user_id", "ids", "scores", "contents")
+
+    def __init__(self, user_id: str, ids: List[str], scores: Sequence[float], contents: List[str]):
+        self.user_id = user_id
+        self.ids = ids
+        self.scores = scores
+        self.contents = contents
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __repr__(self) -> str:
+        return f"SearchResult(user_id={self.user_id!r}, ids={self.ids!r})"
+
+    @classmethod
+    def from_memories(cls, user_id: str, results: List[RetrievedMemory]) -> "SearchResult":
+        return cls(user_id, [res.id for res in results], [res.score for res in results],
+                   [res.content for res in results])
+
+    def to_memories(self) -> List[RetrievedMemory]:
+        return [RetrievedMemory(id=mem_id, content=content, score=float(score), user_id=self.user_id)
+                for mem_id, score, content in zip(self.ids, self.scores, self.contents)]
+
 class Fact(BaseModel):
     """A single fact extracted from a user message."""
     fact: str
@@ -64,4 +94,19 @@ class VectorMemoryAction(BaseModel):
 
 class VectorMemoryUpdatePlan(BaseModel):
     """The full plan of actions for the vector memory."""
-    plan: List[VectorMemoryAction] = Field(description="A list of actions to modify vector memory.")
\ No newline at end of file
+    plan: List[VectorMemoryAction] = Field(description="A list of actions to modify vector memory.")
+
+class MemoryPage(BaseModel):
+    """One batch from `iter_memories`, with the cursor that resumes right after it."""
+    memories: List[Union[UserMemory, VectorMemory]]
+    cursor: Optional[str] = None
+    embeddings: Optional[Any] = Field(None, description="float32 (n, dim) array, when requested from a vector store.")
+
+class MergedCluster(BaseModel):
+    """The consolidated memory for one cluster of near-duplicates."""
+    cluster: int = Field(description="The cluster number, as given in the prompt.")
+    content: Optional[str] = Field(None, description="One memory that preserves every detail of the cluster, or null to keep the memories as they are.")
+
+class ConsolidationPlan(BaseModel):
+    """Merge decisions for a batch of near-duplicate clusters."""
+    merges: List[MergedCluster] = Field(description="One entry per cluster.")